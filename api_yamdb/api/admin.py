@@ -3,6 +3,8 @@ from import_export import resources
 from import_export.admin import ImportExportModelAdmin
 from reviews.models import User
 
+from .models import OutgoingEmail
+
 
 class UserResource(resources.ModelResource):
     class Meta:
@@ -20,3 +22,12 @@ class UserAdmin(ImportExportModelAdmin):
     )
     search_fields = ('email', 'username')
     list_filter = ('email', 'username')
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'recipient', 'subject', 'status', 'attempts', 'created', 'sent'
+    )
+    list_filter = ('status',)
+    search_fields = ('recipient',)
@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.core import checks
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from api_yamdb.db import router
+
+        from . import authentication, cache
+
+        authentication.connect_signals()
+        cache.connect_signals()
+        checks.register(cache.check_shared_cache, 'caches')
+        checks.register(router.check_shared_cache, 'caches')
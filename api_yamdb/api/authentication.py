@@ -0,0 +1,216 @@
+"""
+JWT-аутентификация без обращения к таблице пользователей.
+
+Токен содержит роль и имя пользователя, из которых собирается объект
+User без запроса к БД, и версию токенов пользователя. Версия
+увеличивается в БД при изменении роли, статуса суперпользователя или
+активности; токен с прежней версией, а также токен удалённого
+пользователя снова проверяются по БД. Текущие версии хранятся в
+LRU-кеше процесса не дольше VERSION_TTL секунд, поэтому изменения,
+сделанные в других процессах (воркерах, manage.py), учитываются не
+позже чем через VERSION_TTL секунд. Проверенные токены хранятся
+в таком же LRU-кеше.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import User
+
+DEFAULT_SETTINGS = {
+    'CACHE_SIZE': 10000,
+    'VERSION_TTL': 5,
+}
+CLAIM_FIELDS = ('username', 'role', 'is_superuser')
+VERSION_FIELDS = CLAIM_FIELDS + ('is_active',)
+VERSION_CLAIM = 'ver'
+
+
+def get_setting(name):
+    return getattr(settings, 'JWT_CLAIMS_AUTH', {}).get(
+        name, DEFAULT_SETTINGS[name]
+    )
+
+
+class LRUCache:
+    """
+    Ограниченный по размеру словарь, вытесняющий давно не читавшиеся ключи.
+    """
+    def __init__(self, size):
+        self.size = size
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.data.get(key)
+            if value is not None:
+                self.data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.data[key] = value
+            self.data.move_to_end(key)
+            while len(self.data) > self.size:
+                self.data.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.data.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+
+verified_tokens = LRUCache(get_setting('CACHE_SIZE'))
+user_versions = LRUCache(get_setting('CACHE_SIZE'))
+
+
+def remember_version(user_id, version):
+    user_versions.set(
+        user_id, (version, time.monotonic() + get_setting('VERSION_TTL'))
+    )
+
+
+def get_version(user_id):
+    """
+    Текущая версия токенов пользователя или None, если пользователь
+    удалён или заблокирован. Вытеснение из кеша приводит только
+    к повторному чтению из БД.
+    """
+    entry = user_versions.get(user_id)
+    if entry is not None and time.monotonic() < entry[1]:
+        return entry[0]
+    version = User.objects.filter(pk=user_id, is_active=True).values_list(
+        'token_version', flat=True
+    ).first()
+    remember_version(user_id, version)
+    return version
+
+
+def get_token_for_user(user):
+    """
+    Токен доступа с ролью, именем пользователя и версией токенов.
+    """
+    token = AccessToken.for_user(user)
+    for field in CLAIM_FIELDS:
+        token[field] = getattr(user, field)
+    token[VERSION_CLAIM] = user.token_version
+    remember_version(user.pk, user.token_version)
+    return token
+
+
+def build_user(user_id, snapshot):
+    user = User(id=user_id, **snapshot)
+    user._state.adding = False
+    user._state.db = 'default'
+    return user
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    Собирает пользователя из утверждений токена вместо чтения из БД.
+    Токены без роли и токены с устаревшей версией проверяются по БД.
+    """
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        entry = verified_tokens.get(raw_token)
+        if entry is not None:
+            validated_token, user_id, version, snapshot = entry
+            if (
+                time.time() < validated_token['exp']
+                and get_version(user_id) == version
+            ):
+                return build_user(user_id, snapshot), validated_token
+
+        validated_token = self.get_validated_token(raw_token)
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        version = validated_token.get(VERSION_CLAIM)
+        if has_fresh_claims(validated_token, user_id):
+            snapshot = {
+                field: validated_token[field] for field in CLAIM_FIELDS
+            }
+            user = build_user(user_id, snapshot)
+        else:
+            user = self.get_user(validated_token)
+            version = user.token_version
+            remember_version(user.pk, version)
+            snapshot = {field: getattr(user, field) for field in CLAIM_FIELDS}
+        verified_tokens.set(
+            raw_token, (validated_token, user.pk, version, snapshot)
+        )
+        return user, validated_token
+
+
+def has_fresh_claims(validated_token, user_id):
+    """
+    Токен содержит все нужные утверждения, а его версия совпадает
+    с текущей версией токенов пользователя.
+    """
+    version = validated_token.get(VERSION_CLAIM)
+    return (
+        version is not None
+        and all(field in validated_token for field in CLAIM_FIELDS)
+        and get_version(user_id) == version
+    )
+
+
+def remember_changed_user(sender, instance, raw=False, **kwargs):
+    """
+    Запоминает, изменились ли у сохраняемого пользователя поля,
+    влияющие на права доступа.
+    """
+    instance._access_changed = False
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    old = User.objects.filter(pk=instance.pk).values(*VERSION_FIELDS).first()
+    instance._access_changed = old is not None and any(
+        old[field] != getattr(instance, field) for field in VERSION_FIELDS
+    )
+
+
+def bump_token_version(sender, instance, raw=False, **kwargs):
+    """
+    Версия увеличивается отдельным UPDATE, поэтому сохранение
+    с update_fields её не пропускает.
+    """
+    if not getattr(instance, '_access_changed', False):
+        return
+    User.objects.filter(pk=instance.pk).update(
+        token_version=F('token_version') + 1
+    )
+    forget_version_on_commit(instance.pk)
+
+
+def forget_deleted_user(sender, instance, **kwargs):
+    forget_version_on_commit(instance.pk)
+
+
+def forget_version_on_commit(user_id):
+    """
+    Версия забывается сразу и повторно после фиксации транзакции, чтобы
+    версия, прочитанная до фиксации, не осталась в кеше.
+    """
+    user_versions.delete(user_id)
+    transaction.on_commit(lambda: user_versions.delete(user_id))
+
+
+def connect_signals():
+    pre_save.connect(remember_changed_user, sender=User)
+    post_save.connect(bump_token_version, sender=User)
+    post_delete.connect(forget_deleted_user, sender=User)
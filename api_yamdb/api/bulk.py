@@ -0,0 +1,145 @@
+"""
+Создание записей каталога массивом.
+
+Все элементы проверяются до вставки: связи и уникальность проверяются
+одним запросом на поле для всего массива. Если хотя бы один элемент не
+прошёл проверку, ничего не создаётся, а ответ содержит ошибки каждого
+элемента в том же порядке. Записи вставляются одной транзакцией.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.utils.encoding import smart_str
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.relations import SlugRelatedField
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .cache import DEPENDENCIES, invalidate
+
+DEFAULT_MAX_ITEMS = 5000
+
+
+def get_max_items():
+    return getattr(settings, 'BULK_CREATE_MAX_ITEMS', DEFAULT_MAX_ITEMS)
+
+
+def get_unique_message(model, field_name):
+    """
+    То же сообщение, что выдаёт UniqueValidator сериализатора модели.
+    """
+    field = model._meta.get_field(field_name)
+    return field.error_messages['unique'] % {
+        'model_name': model._meta.verbose_name,
+        'field_label': field.verbose_name,
+    }
+
+
+def get_does_not_exist_message(slug_field, value):
+    return SlugRelatedField.default_error_messages['does_not_exist'].format(
+        slug_name=slug_field, value=smart_str(value)
+    )
+
+
+def set_prefetched(instance, name, objects):
+    """
+    Заполняет кеш prefetch_related уже загруженными объектами, чтобы
+    сериализатор не обращался к БД за связями.
+    """
+    manager = getattr(instance, name)
+    queryset = manager.model.objects.none()
+    queryset._result_cache = list(objects)
+    queryset._prefetch_done = True
+    if not hasattr(instance, '_prefetched_objects_cache'):
+        instance._prefetched_objects_cache = {}
+    instance._prefetched_objects_cache[name] = queryset
+
+
+def add_error(errors, index, field, message):
+    errors[index].setdefault(field, []).append(message)
+
+
+class BulkCreateMixin:
+    """
+    POST со списком объектов создаёт их пачкой, с одним объектом —
+    как обычно.
+    """
+    bulk_serializer_class = None
+    bulk_unique_fields = ()
+
+    def create(self, request, *args, **kwargs):
+        if not isinstance(request.data, list):
+            return super().create(request, *args, **kwargs)
+        return self.bulk_create(request.data)
+
+    def bulk_create(self, data):
+        max_items = get_max_items()
+        if not data or len(data) > max_items:
+            raise ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    f'Передайте от 1 до {max_items} объектов'
+                ]
+            })
+        # Один экземпляр сериализатора на весь массив, как в ListSerializer:
+        # поля не собираются заново для каждого элемента.
+        serializer = self.bulk_serializer_class(
+            context=self.get_serializer_context()
+        )
+        items = []
+        errors = []
+        for item in data:
+            try:
+                items.append(dict(serializer.run_validation(item)))
+                errors.append({})
+            except ValidationError as error:
+                items.append(None)
+                errors.append(error.detail)
+        self.check_unique(items, errors)
+        self.resolve_relations(items, errors)
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            instances = self.bulk_insert(items)
+            self.invalidate_cache()
+        return Response(
+            self.get_bulk_response_data(instances),
+            status=status.HTTP_201_CREATED
+        )
+
+    def check_unique(self, items, errors):
+        """
+        Значения сверяются с БД одним запросом и между собой.
+        """
+        model = self.get_queryset().model
+        for field in self.bulk_unique_fields:
+            values = {item[field] for item in items if item is not None}
+            existing = set(model.objects.filter(
+                **{f'{field}__in': values}
+            ).values_list(field, flat=True))
+            message = get_unique_message(model, field)
+            seen = set()
+            for index, item in enumerate(items):
+                if item is None:
+                    continue
+                if item[field] in existing or item[field] in seen:
+                    add_error(errors, index, field, message)
+                seen.add(item[field])
+
+    def resolve_relations(self, items, errors):
+        pass
+
+    def bulk_insert(self, items):
+        model = self.get_queryset().model
+        return model.objects.bulk_create(model(**item) for item in items)
+
+    def invalidate_cache(self):
+        """
+        bulk_create не отправляет сигналы, поэтому кеш каталога
+        сбрасывается явно.
+        """
+        groups = DEPENDENCIES[self.get_queryset().model]
+        invalidate(*groups)
+        transaction.on_commit(lambda: invalidate(*groups))
+
+    def get_bulk_response_data(self, instances):
+        return self.get_serializer(instances, many=True).data
@@ -0,0 +1,215 @@
+"""
+Кеширование ответов каталога: произведений, категорий и жанров.
+
+Ключ ответа включает путь, параметры запроса и версию группы данных.
+Изменение любой записи, от которой зависит группа, увеличивает её версию,
+поэтому устаревшие ответы больше не читаются и вытесняются по таймауту.
+"""
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from rest_framework.response import Response
+from reviews.models import Category, Genre, GenreTitle, Review, Title
+
+from api_yamdb.db import router
+
+DEFAULT_SETTINGS = {
+    'ENABLED': True,
+    'ALIAS': 'default',
+    'TIMEOUT': 300,
+}
+GROUPS = ('titles', 'categories', 'genres')
+DEPENDENCIES = {
+    Title: ('titles',),
+    GenreTitle: ('titles',),
+    Review: ('titles',),
+    Genre: ('titles', 'genres'),
+    Category: ('titles', 'categories'),
+}
+COUNTERS = ('hits', 'misses')
+LOCAL_BACKENDS = ('django.core.cache.backends.locmem.LocMemCache',)
+
+
+def get_setting(name):
+    return getattr(settings, 'CATALOG_CACHE', {}).get(
+        name, DEFAULT_SETTINGS[name]
+    )
+
+
+def get_cache():
+    return caches[get_setting('ALIAS')]
+
+
+def is_process_local(alias):
+    return settings.CACHES[alias]['BACKEND'] in LOCAL_BACKENDS
+
+
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Сброс кеша из команд manage.py, контейнера outbox и других воркеров
+    не виден процессу с кешем в памяти.
+    """
+    if not get_setting('ENABLED') or not is_process_local(
+        get_setting('ALIAS')
+    ):
+        return []
+    return [checks.Warning(
+        'Кеш каталога хранится в памяти процесса: изменения из других '
+        'процессов не сбрасывают его до истечения CATALOG_CACHE_TIMEOUT.',
+        hint='Укажите адрес общего кеша в CACHE_LOCATION или выключите '
+             'кеш каталога (CATALOG_CACHE_ENABLED=False).',
+        id='api.W001',
+    )]
+
+
+def get_version_key(group):
+    return f'catalog:{group}:version'
+
+
+def get_counter_key(group, counter):
+    return f'catalog:{group}:{counter}'
+
+
+def increment(key, initial=1):
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, initial, timeout=None):
+            cache.incr(key)
+
+
+def get_version(group):
+    """
+    Возвращает текущую версию группы. Начальное значение берётся
+    из времени, чтобы после вытеснения ключа версии не повторялись.
+    """
+    cache = get_cache()
+    key = get_version_key(group)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        return cache.get(key)
+    return version
+
+
+def get_changed_key(group):
+    return f'catalog:{group}:changed'
+
+
+def invalidate(*groups):
+    for group in groups:
+        increment(get_version_key(group), initial=time.time_ns())
+    if router.get_setting('ALIASES'):
+        get_cache().set_many(
+            {get_changed_key(group): True for group in groups},
+            router.get_setting('STICKY_SECONDS')
+        )
+
+
+def is_lagging(group):
+    """
+    Ответ прочитан с реплики, которая могла ещё не получить изменение,
+    сбросившее кеш группы.
+    """
+    return router.reads_from_replica() and (
+        get_cache().get(get_changed_key(group)) is not None
+    )
+
+
+def make_key(group, request):
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    digest = hashlib.md5(f'{request.path}?{query}'.encode()).hexdigest()
+    return f'catalog:{group}:{get_version(group)}:{digest}'
+
+
+def cached_response(group, request, handler, *args, **kwargs):
+    """
+    Возвращает ответ из кеша или вызывает обработчик и сохраняет
+    успешный ответ.
+    """
+    # Клиент, закреплённый после записи за основной БД, не должен
+    # получить ответ, сохранённый по данным реплики.
+    if (
+        not get_setting('ENABLED')
+        or request.method != 'GET'
+        or router.is_sticky()
+    ):
+        return handler(request, *args, **kwargs)
+    cache = get_cache()
+    key = make_key(group, request)
+    data = cache.get(key)
+    if data is not None:
+        increment(get_counter_key(group, 'hits'))
+        return Response(data)
+    increment(get_counter_key(group, 'misses'))
+    response = handler(request, *args, **kwargs)
+    if response.status_code == 200 and not is_lagging(group):
+        cache.set(key, response.data, get_setting('TIMEOUT'))
+    return response
+
+
+def get_stats():
+    keys = {
+        (group, counter): get_counter_key(group, counter)
+        for group in GROUPS
+        for counter in COUNTERS
+    }
+    values = get_cache().get_many(keys.values())
+    stats = {'enabled': get_setting('ENABLED'), 'groups': {}}
+    for group in GROUPS:
+        hits, misses = (
+            values.get(keys[group, counter], 0) for counter in COUNTERS
+        )
+        total = hits + misses
+        stats['groups'][group] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / total, 4) if total else None,
+        }
+    return stats
+
+
+class CachedListMixin:
+    """
+    Кеширует ответы на запросы списка объектов.
+    """
+    cache_group = None
+
+    def list(self, request, *args, **kwargs):
+        return cached_response(
+            self.cache_group, request, super().list, *args, **kwargs
+        )
+
+
+class CachedRetrieveMixin:
+    """
+    Кеширует ответы на запросы отдельного объекта.
+    """
+    cache_group = None
+
+    def retrieve(self, request, *args, **kwargs):
+        return cached_response(
+            self.cache_group, request, super().retrieve, *args, **kwargs
+        )
+
+
+def invalidate_on_change(sender, action='post', **kwargs):
+    if action.startswith('pre_'):
+        return
+    groups = DEPENDENCIES[sender]
+    invalidate(*groups)
+    transaction.on_commit(lambda: invalidate(*groups))
+
+
+def connect_signals():
+    for model in DEPENDENCIES:
+        post_save.connect(invalidate_on_change, sender=model)
+        post_delete.connect(invalidate_on_change, sender=model)
+    m2m_changed.connect(invalidate_on_change, sender=Title.genre.through)
@@ -0,0 +1,58 @@
+import hashlib
+import math
+import time
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+class ConditionalListMixin:
+    """
+    Отвечает 304 Not Modified на условные запросы списка.
+    Валидатор строится по времени последнего изменения списка, которое
+    хранится в родительской записи, поэтому для проверки достаточно
+    прочитать одну строку по первичному ключу. Время меняется и при
+    изменении выводимых в списке названия произведения, текста отзыва
+    и имени автора (см. reviews.signals).
+    Вьюсет определяет метод get_list_modified(), возвращающий это время;
+    без него список выводится без валидаторов.
+    """
+    get_list_modified = None
+
+    def get_list_etag(self, request, modified):
+        validator = '|'.join((
+            modified.isoformat() if modified else '',
+            request.get_full_path(),
+            request.accepted_renderer.format,
+        ))
+        return quote_etag(hashlib.md5(validator.encode()).hexdigest())
+
+    def get_last_modified(self, modified):
+        """
+        Last-Modified с точностью до секунды. Время округляется вверх
+        и не отдаётся, пока секунда изменения не закончилась: иначе
+        запись в ту же секунду не изменила бы заголовок, и клиент
+        с If-Modified-Since получил бы ошибочный ответ 304.
+        """
+        if modified is None:
+            return None
+        last_modified = math.ceil(modified.timestamp())
+        if time.time() < last_modified:
+            return None
+        return last_modified
+
+    def list(self, request, *args, **kwargs):
+        if self.get_list_modified is None:
+            return super().list(request, *args, **kwargs)
+        modified = self.get_list_modified()
+        etag = self.get_list_etag(request, modified)
+        last_modified = self.get_last_modified(modified)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
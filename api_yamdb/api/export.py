@@ -0,0 +1,137 @@
+import csv
+import json
+from itertools import islice
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer
+from reviews import models
+
+TITLE_FIELDS = (
+    'id', 'name', 'year', 'description', 'category', 'genre', 'rating'
+)
+REVIEW_FIELDS = ('id', 'title_id', 'author', 'text', 'score', 'pub_date')
+
+
+def get_chunk_size():
+    return getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+
+
+class Echo:
+    """
+    Файлоподобный объект для csv.writer, возвращающий записанную строку.
+    """
+    def write(self, value):
+        return value
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Одна JSON-запись на строку.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return self.render_row(data).encode(self.charset)
+
+    @staticmethod
+    def render_header(fields):
+        return ''
+
+    @staticmethod
+    def render_row(row, fields=None):
+        return json.dumps(
+            row, cls=DjangoJSONEncoder, ensure_ascii=False
+        ) + '\n'
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    CSV с заголовком; списки записываются через запятую.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        fields = tuple(data)
+        return (
+            self.render_header(fields) + self.render_row(data, fields)
+        ).encode(self.charset)
+
+    @staticmethod
+    def render_header(fields):
+        return csv.writer(Echo()).writerow(fields)
+
+    @staticmethod
+    def render_row(row, fields):
+        values = []
+        for field in fields:
+            value = row[field]
+            if isinstance(value, (list, tuple)):
+                value = ','.join(value)
+            values.append(value)
+        return csv.writer(Echo()).writerow(values)
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
+
+
+def iter_titles(after=0):
+    """
+    Произведения по возрастанию id, начиная после after.
+    Жанры подгружаются одним запросом на каждую пачку записей.
+    """
+    chunk_size = get_chunk_size()
+    queryset = models.Title.objects.filter(pk__gt=after).order_by(
+        'pk'
+    ).values(
+        'id', 'name', 'year', 'description', 'category__slug',
+        'rating_sum', 'rating_count'
+    ).iterator(chunk_size=chunk_size)
+    for chunk in chunked(queryset, chunk_size):
+        genres = {}
+        links = models.GenreTitle.objects.filter(
+            title_id__in=[title['id'] for title in chunk]
+        ).order_by('genre_id__slug').values_list(
+            'title_id', 'genre_id__slug'
+        )
+        for title_id, slug in links:
+            genres.setdefault(title_id, []).append(slug)
+        for title in chunk:
+            count = title.pop('rating_count')
+            rating_sum = title.pop('rating_sum')
+            title['category'] = title.pop('category__slug')
+            title['genre'] = genres.get(title['id'], [])
+            title['rating'] = rating_sum // count if count else None
+            yield title
+
+
+def iter_reviews(after=0):
+    """
+    Отзывы по возрастанию id, начиная после after.
+    """
+    queryset = models.Review.objects.filter(pk__gt=after).order_by(
+        'pk'
+    ).values(
+        'id', 'title_id', 'author__username', 'text', 'score', 'pub_date'
+    ).iterator(chunk_size=get_chunk_size())
+    for review in queryset:
+        review['author'] = review.pop('author__username')
+        yield review
+
+
+def stream(rows, fields, renderer):
+    """
+    Построчно отдаёт выгрузку в формате выбранного рендерера.
+    """
+    yield renderer.render_header(fields)
+    for row in rows:
+        yield renderer.render_row(row, fields)
@@ -1,25 +1,68 @@
 import django_filters
-from reviews.models import Title
+from django.db import connections
+from reviews.models import Category, Genre, GenreTitle, Title
+from reviews.search import search_titles
 
 
-class TitleFilter(django_filters.FilterSet):
-    genre = django_filters.Filter(
-        field_name="genre__slug",
-        lookup_expr='iexact'
-    )
-    category = django_filters.Filter(
-        field_name="category__slug",
-        lookup_expr='iexact'
+def get_ids_by_slug(model, slug):
+    return list(
+        model.objects.filter(slug__iexact=slug).values_list('pk', flat=True)
     )
+
+
+class TitleFilter(django_filters.FilterSet):
+    genre = django_filters.CharFilter(method='filter_genre')
+    category = django_filters.CharFilter(method='filter_category')
     name = django_filters.Filter(
         field_name='name',
         lookup_expr='contains'
     )
-    year = django_filters.Filter(
-        field_name='year',
-        lookup_expr='iexact'
+    year = django_filters.NumberFilter(field_name='year')
+    search = django_filters.CharFilter(method='filter_search')
+    search_description = django_filters.BooleanFilter(
+        method='filter_search_description'
     )
 
     class Meta:
         fields = '__all__'
         model = Title
+
+    # Слаг сравнивается без учёта регистра, что не использует индекс,
+    # поэтому id жанров и категорий выбираются отдельным запросом по
+    # маленькой таблице. Произведения затем читаются по индексу сортировки
+    # (name, id) или (category, name, id) без сортировки найденных записей.
+    def filter_genre(self, queryset, name, value):
+        genre_ids = get_ids_by_slug(Genre, value)
+        if not genre_ids:
+            return queryset.none()
+        link = GenreTitle._meta
+        title = queryset.model._meta
+        quote_name = connections[queryset.db].ops.quote_name
+        placeholders = ', '.join(['%s'] * len(genre_ids))
+        return queryset.extra(
+            where=[
+                f'EXISTS (SELECT 1 FROM {quote_name(link.db_table)} '
+                f'WHERE {quote_name(link.get_field("title_id").column)} = '
+                f'{quote_name(title.db_table)}.{quote_name(title.pk.column)} '
+                f'AND {quote_name(link.get_field("genre_id").column)} '
+                f'IN ({placeholders}))'
+            ],
+            params=genre_ids
+        )
+
+    def filter_category(self, queryset, name, value):
+        return queryset.filter(
+            category_id__in=get_ids_by_slug(Category, value)
+        )
+
+    def filter_search(self, queryset, name, value):
+        return search_titles(
+            queryset,
+            value,
+            with_description=bool(
+                self.form.cleaned_data.get('search_description')
+            )
+        )
+
+    def filter_search_description(self, queryset, name, value):
+        return queryset
@@ -0,0 +1,40 @@
+"""
+Карта объектов запроса: каждая запись загружается из БД не более одного
+раза за запрос и переиспользуется вьюсетами, сериализаторами и проверками
+прав.
+"""
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+
+
+class IdentityMap:
+    def __init__(self):
+        self.objects = {}
+
+    def get_key(self, model, pk):
+        try:
+            pk = model._meta.pk.to_python(pk)
+        except ValidationError:
+            raise Http404
+        return model._meta.label, pk
+
+    def get_or_404(self, queryset, pk):
+        """
+        Объект из карты или из queryset, если он ещё не загружался.
+        """
+        model = getattr(queryset, 'model', queryset)
+        key = self.get_key(model, pk)
+        if key not in self.objects:
+            self.objects[key] = get_object_or_404(queryset, pk=pk)
+        return self.objects[key]
+
+    def add(self, instance):
+        self.objects[self.get_key(type(instance), instance.pk)] = instance
+        return instance
+
+
+def get_identity_map(request):
+    if getattr(request, 'identity_map', None) is None:
+        request.identity_map = IdentityMap()
+    return request.identity_map
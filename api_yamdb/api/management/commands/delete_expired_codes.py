@@ -0,0 +1,31 @@
+from api.models import ConfirmationCode
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Удаляет просроченные коды подтверждения.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Количество кодов, удаляемых одним запросом.'
+        )
+
+    def handle(self, *args, **options):
+        deleted = 0
+        while True:
+            # Короткие DELETE по найденным через индекс срока id не держат
+            # долгих блокировок на таблице.
+            ids = list(
+                ConfirmationCode.objects.expired().order_by().values_list(
+                    'pk', flat=True
+                )[:options['chunk_size']]
+            )
+            if not ids:
+                break
+            deleted += ConfirmationCode.objects.filter(pk__in=ids).delete()[0]
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено просроченных кодов: {deleted}'
+        ))
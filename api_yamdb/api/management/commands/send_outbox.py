@@ -0,0 +1,54 @@
+import time
+
+from api.outbox import get_setting, purge_sent, send_batch
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди исходящих писем.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Количество писем, отправляемых через одно соединение.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Пауза в секундах, если в очереди нет писем.'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Отправить готовые письма и завершить работу.'
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        purged_at = None
+        while True:
+            processed = send_batch(options['batch_size'])
+            total += processed
+            if processed:
+                self.stdout.write(f'Обработано писем: {processed}')
+                continue
+            # Старые отправленные письма удаляются, когда очередь пуста,
+            # не чаще раза в PURGE_INTERVAL секунд.
+            if purged_at is None or (
+                time.monotonic() - purged_at >= get_setting('PURGE_INTERVAL')
+            ):
+                self.purge()
+                purged_at = time.monotonic()
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Всего обработано писем: {total}'
+        ))
+
+    def purge(self):
+        deleted = purge_sent()
+        if deleted:
+            self.stdout.write(f'Удалено отправленных писем: {deleted}')
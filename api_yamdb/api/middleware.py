@@ -0,0 +1,196 @@
+"""
+Учёт SQL-запросов и времени обработки каждого запроса к API.
+
+Количество запросов, время в БД, время работы представления и время
+рендеринга ответа отдаются в заголовке Server-Timing и пишутся в лог
+с именем маршрута. Для подключений с пулом добавляются время ожидания
+соединения и загрузка пула. Медленные запросы логируются вместе с планом.
+При выключенной настройке middleware исключается из цепочки целиком.
+"""
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+DEFAULT_SETTINGS = {
+    'ENABLED': False,
+    'SLOW_QUERY_MS': 100,
+    'EXPLAIN': True,
+}
+EXPLAIN_PREFIXES = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'postgresql': 'EXPLAIN ',
+    'mysql': 'EXPLAIN ',
+}
+
+logger = logging.getLogger('api.sql')
+
+
+def get_setting(name):
+    return getattr(settings, 'SQL_INSTRUMENTATION', {}).get(
+        name, DEFAULT_SETTINGS[name]
+    )
+
+
+def elapsed_ms(start):
+    return (time.perf_counter() - start) * 1000
+
+
+def get_pooled_connections():
+    return [
+        connection for connection in connections.all()
+        if getattr(connection, 'get_pool', None) and connection.get_pool()
+    ]
+
+
+class RequestMetrics:
+    """
+    Метрики одного запроса: execute_wrapper для всех подключений к БД.
+    """
+    def __init__(self, slow_query_ms):
+        self.slow_query_ms = slow_query_ms
+        self.route = None
+        self.queries = 0
+        self.db_ms = 0.0
+        self.view_ms = None
+        self.render_ms = 0.0
+        self.slow_queries = []
+        self.view_started = None
+        self.render_started = None
+        self.pooled = get_pooled_connections()
+        self.pool_wait_started = sum(
+            connection.pool_wait_ms for connection in self.pooled
+        )
+        self.pool_wait_ms = 0.0
+        self.pool_utilization = None
+
+    def end_pool(self):
+        if not self.pooled:
+            return
+        self.pool_wait_ms = sum(
+            connection.pool_wait_ms for connection in self.pooled
+        ) - self.pool_wait_started
+        self.pool_utilization = max(
+            connection.get_pool().stats()['utilization']
+            for connection in self.pooled
+        )
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = elapsed_ms(start)
+            self.queries += 1
+            self.db_ms += duration
+            if duration >= self.slow_query_ms:
+                self.slow_queries.append((
+                    context['connection'].alias, sql, params, many, duration
+                ))
+
+    def end_render(self, response):
+        self.render_ms = elapsed_ms(self.render_started)
+
+    def server_timing(self, total_ms):
+        metrics = [
+            f'db;dur={self.db_ms:.1f};desc="{self.queries} queries"',
+            f'view;dur={self.view_ms or 0:.1f}',
+            f'render;dur={self.render_ms:.1f}',
+            f'total;dur={total_ms:.1f}',
+        ]
+        if self.pool_utilization is not None:
+            metrics.append(
+                f'pool;dur={self.pool_wait_ms:.1f};'
+                f'desc="utilization {self.pool_utilization:.0%}"'
+            )
+        return ', '.join(metrics)
+
+
+def explain(alias, sql, params):
+    """
+    План выполнения запроса или None, если его не получить.
+    """
+    connection = connections[alias]
+    prefix = EXPLAIN_PREFIXES.get(connection.vendor)
+    if prefix is None or not sql.lstrip().upper().startswith('SELECT'):
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            return '\n'.join(
+                ' '.join(str(value) for value in row)
+                for row in cursor.fetchall()
+            )
+    except Exception as error:
+        return f'EXPLAIN не выполнен: {error}'
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Включается настройкой SQL_INSTRUMENTATION['ENABLED'].
+    """
+    def __init__(self, get_response):
+        if not get_setting('ENABLED'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_query_ms = get_setting('SLOW_QUERY_MS')
+        self.explain = get_setting('EXPLAIN')
+
+    def __call__(self, request):
+        metrics = RequestMetrics(self.slow_query_ms)
+        request.sql_metrics = metrics
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics))
+            response = self.get_response(request)
+        total_ms = elapsed_ms(start)
+        metrics.end_pool()
+        if metrics.view_started is not None and metrics.view_ms is None:
+            metrics.view_ms = elapsed_ms(metrics.view_started)
+        response['Server-Timing'] = metrics.server_timing(total_ms)
+        self.log(request, response, metrics, total_ms)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = request.sql_metrics
+        metrics.route = request.resolver_match.url_name
+        metrics.view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        metrics = request.sql_metrics
+        metrics.view_ms = elapsed_ms(metrics.view_started)
+        metrics.render_started = time.perf_counter()
+        response.add_post_render_callback(metrics.end_render)
+        return response
+
+    def log(self, request, response, metrics, total_ms):
+        route = metrics.route or '-'
+        logger.info(
+            'route=%s method=%s status=%s queries=%d db_ms=%.1f '
+            'view_ms=%.1f render_ms=%.1f total_ms=%.1f',
+            route, request.method, response.status_code, metrics.queries,
+            metrics.db_ms, metrics.view_ms or 0, metrics.render_ms, total_ms,
+            extra={
+                'route': route,
+                'queries': metrics.queries,
+                'db_ms': metrics.db_ms,
+                'view_ms': metrics.view_ms or 0,
+                'render_ms': metrics.render_ms,
+                'total_ms': total_ms,
+                'pool_wait_ms': metrics.pool_wait_ms,
+                'pool_utilization': metrics.pool_utilization,
+            }
+        )
+        for alias, sql, params, many, duration in metrics.slow_queries:
+            plan = None
+            if self.explain and not many:
+                plan = explain(alias, sql, params)
+            logger.warning(
+                'slow query route=%s duration_ms=%.1f sql=%s plan=%s',
+                route, duration, sql, plan,
+                extra={'route': route, 'duration_ms': duration}
+            )
@@ -0,0 +1,127 @@
+import hashlib
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class OutgoingEmail(models.Model):
+    """
+    Письмо в очереди на отправку.
+    Письма сохраняются в одной транзакции с изменением данных
+    и отправляются фоновым обработчиком (команда send_outbox).
+    """
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Ожидает отправки'),
+        (SENT, 'Отправлено'),
+        (FAILED, 'Не отправлено'),
+    )
+    subject = models.CharField('Тема', max_length=255)
+    body = models.TextField('Текст')
+    from_email = models.CharField('Отправитель', max_length=254)
+    recipient = models.EmailField('Получатель', max_length=254)
+    status = models.CharField(
+        'Статус',
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(
+        'Попытки отправки',
+        default=0
+    )
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    send_after = models.DateTimeField(
+        'Отправить не ранее',
+        default=timezone.now
+    )
+    sent = models.DateTimeField('Отправлено', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        indexes = [
+            models.Index(
+                fields=['status', 'send_after'],
+                name='outbox_status_send_after'
+            ),
+            models.Index(fields=['status', 'sent'], name='outbox_status_sent'),
+        ]
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
+
+
+def hash_code(code):
+    return hashlib.sha256(code.encode()).hexdigest()
+
+
+class ConfirmationCodeQuerySet(models.QuerySet):
+    def issue(self, user):
+        """
+        Создаёт код подтверждения одним INSERT и возвращает его.
+        В БД хранится только хеш кода.
+        """
+        code = secrets.token_urlsafe(settings.CONFIRMATION_CODE_BYTES)
+        self.create(
+            user=user,
+            code_hash=hash_code(code),
+            expires_at=timezone.now() + timedelta(
+                seconds=settings.CONFIRMATION_CODE_TTL
+            )
+        )
+        return code
+
+    def consume(self, user, code):
+        """
+        Проверяет код и гасит его: код действителен один раз, вместе
+        с ним удаляются остальные коды пользователя. Проверка и удаление
+        выполняются одним DELETE, поэтому два одновременных запроса
+        с одним кодом не получат два токена.
+        """
+        codes = self.filter(user=user)
+        matched, _ = codes.filter(
+            code_hash=hash_code(code), expires_at__gt=timezone.now()
+        ).delete()
+        if not matched:
+            return False
+        codes.delete()
+        return True
+
+    def expired(self):
+        return self.filter(expires_at__lte=timezone.now())
+
+
+class ConfirmationCode(models.Model):
+    """
+    Код подтверждения регистрации, ожидающий использования.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='confirmation_codes',
+        db_index=False
+    )
+    code_hash = models.CharField('Хеш кода', max_length=64)
+    expires_at = models.DateTimeField('Действует до')
+
+    objects = ConfirmationCodeQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Код подтверждения'
+        verbose_name_plural = 'Коды подтверждения'
+        indexes = [
+            models.Index(
+                fields=['user', 'code_hash'], name='confcode_user_hash_idx'
+            ),
+            models.Index(fields=['expires_at'], name='confcode_expires_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id}: {self.expires_at}'
@@ -0,0 +1,184 @@
+"""
+Очередь исходящих писем.
+
+Письма ставятся в очередь в транзакции запроса и отправляются пачками:
+обработчик забирает пачку, продлевая срок её отправки на время аренды,
+отправляет письма через одно соединение с почтовым сервером и
+записывает результат. При ошибке письмо откладывается с экспоненциально
+растущей задержкой, после исчерпания попыток помечается как неотправленное.
+Отправленные письма хранятся RETENTION секунд, затем удаляются.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+DEFAULT_SETTINGS = {
+    'BATCH_SIZE': 100,
+    'MAX_ATTEMPTS': 5,
+    'RETRY_DELAY': 60,
+    'MAX_RETRY_DELAY': 3600,
+    'LEASE': 300,
+    'LATENCY_SAMPLE': 1000,
+    'RETENTION': 7 * 24 * 3600,
+    'PURGE_INTERVAL': 3600,
+    'PURGE_CHUNK_SIZE': 5000,
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'EMAIL_OUTBOX', {}).get(
+        name, DEFAULT_SETTINGS[name]
+    )
+
+
+def enqueue_email(subject, body, recipient, from_email=None):
+    return OutgoingEmail.objects.create(
+        subject=subject,
+        body=body,
+        recipient=recipient,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL
+    )
+
+
+def get_retry_delay(attempts):
+    delay = get_setting('RETRY_DELAY') * 2 ** (attempts - 1)
+    return timedelta(seconds=min(delay, get_setting('MAX_RETRY_DELAY')))
+
+
+def claim_batch(batch_size):
+    """
+    Забирает пачку писем, готовых к отправке. Другие обработчики не видят
+    эти письма до окончания аренды.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutgoingEmail.PENDING, send_after__lte=now)
+            .order_by('send_after', 'id')[:batch_size]
+        )
+        OutgoingEmail.objects.filter(
+            pk__in=[email.pk for email in batch]
+        ).update(send_after=now + timedelta(seconds=get_setting('LEASE')))
+    return batch
+
+
+def send_batch(batch_size=None):
+    """
+    Отправляет одну пачку писем и возвращает количество обработанных.
+    """
+    batch = claim_batch(batch_size or get_setting('BATCH_SIZE'))
+    if not batch:
+        return 0
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as error:
+        for email in batch:
+            register_failure(email, error)
+    else:
+        try:
+            for email in batch:
+                send_email(email, connection)
+        finally:
+            connection.close()
+    OutgoingEmail.objects.bulk_update(
+        batch, ['status', 'attempts', 'last_error', 'send_after', 'sent']
+    )
+    return len(batch)
+
+
+def send_email(email, connection):
+    message = EmailMessage(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email,
+        to=[email.recipient],
+        connection=connection
+    )
+    try:
+        message.send()
+    except Exception as error:
+        register_failure(email, error)
+        return
+    email.attempts += 1
+    email.status = OutgoingEmail.SENT
+    email.sent = timezone.now()
+    email.last_error = ''
+
+
+def register_failure(email, error):
+    email.attempts += 1
+    email.last_error = f'{type(error).__name__}: {error}'
+    if email.attempts >= get_setting('MAX_ATTEMPTS'):
+        email.status = OutgoingEmail.FAILED
+    else:
+        email.send_after = timezone.now() + get_retry_delay(email.attempts)
+
+
+def purge_sent(chunk_size=None):
+    """
+    Удаляет письма, отправленные раньше RETENTION секунд назад,
+    и возвращает их количество.
+    """
+    chunk_size = chunk_size or get_setting('PURGE_CHUNK_SIZE')
+    expired = OutgoingEmail.objects.filter(
+        status=OutgoingEmail.SENT,
+        sent__lt=timezone.now() - timedelta(seconds=get_setting('RETENTION'))
+    ).order_by()
+    deleted = 0
+    while True:
+        # Короткие DELETE по найденным через индекс outbox_status_sent id
+        # не держат долгих блокировок на таблице.
+        ids = list(expired.values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            return deleted
+        deleted += OutgoingEmail.objects.filter(pk__in=ids).delete()[0]
+
+
+def percentile(values, share):
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def get_stats():
+    """
+    Глубина очереди и задержка отправки последних писем в секундах.
+    """
+    pending = OutgoingEmail.objects.filter(status=OutgoingEmail.PENDING)
+    oldest = pending.order_by('created').values_list(
+        'created', flat=True
+    ).first()
+    now = timezone.now()
+    latencies = sorted(
+        (sent - created).total_seconds()
+        for created, sent in OutgoingEmail.objects.filter(
+            status=OutgoingEmail.SENT
+        ).order_by('-sent').values_list(
+            'created', 'sent'
+        )[:get_setting('LATENCY_SAMPLE')]
+    )
+    return {
+        'pending': pending.count(),
+        'failed': OutgoingEmail.objects.filter(
+            status=OutgoingEmail.FAILED
+        ).count(),
+        'oldest_pending_age': (
+            (now - oldest).total_seconds() if oldest else None
+        ),
+        'latency': {
+            'sample': len(latencies),
+            'avg': (
+                sum(latencies) / len(latencies) if latencies else None
+            ),
+            'p50': percentile(latencies, 0.5),
+            'p95': percentile(latencies, 0.95),
+            'max': latencies[-1] if latencies else None,
+        },
+    }
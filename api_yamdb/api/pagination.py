@@ -0,0 +1,184 @@
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import (BasePagination, CursorPagination,
+                                       LimitOffsetPagination,
+                                       PageNumberPagination)
+
+
+def reverse_order(field):
+    return field[1:] if field.startswith('-') else f'-{field}'
+
+
+def get_keyset_filter(ordering, values):
+    """
+    Условие на строки после позиции values в порядке ordering:
+    a >= x AND (a > x OR (a = x AND b > y)). Первая часть условия
+    позволяет читать индекс по полям сортировки диапазоном.
+    """
+    condition = None
+    for field, value in reversed(list(zip(ordering, values))):
+        name = field.lstrip('-')
+        after = Q(**{
+            f'{name}__lt' if field.startswith('-') else f'{name}__gt': value
+        })
+        if condition is not None:
+            after |= Q(**{name: value}) & condition
+        condition = after
+    if len(ordering) > 1:
+        first = ordering[0].lstrip('-')
+        condition &= Q(**{
+            f'{first}__lte' if ordering[0].startswith('-')
+            else f'{first}__gte': values[0]
+        })
+    return condition
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Курсор по всем полям сортировки. CursorPagination DRF отбирает строки
+    только по первому полю, а строки с тем же значением пропускает
+    смещением. Здесь позиция курсора содержит значения всех полей
+    сортировки, которая должна заканчиваться уникальным полем, поэтому
+    страница всегда начинается условием по индексу без OFFSET. Курсор
+    со смещением считается недействительным.
+    """
+    def get_page_ordering(self, reverse):
+        if reverse:
+            return [reverse_order(field) for field in self.ordering]
+        return list(self.ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            reverse, current_position = False, None
+        else:
+            _, reverse, current_position = self.cursor
+        ordering = self.get_page_ordering(reverse)
+        queryset = queryset.order_by(*ordering)
+        if current_position is not None:
+            queryset = queryset.filter(
+                get_keyset_filter(ordering, json.loads(current_position))
+            )
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        following_position = None
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+        has_current = current_position is not None
+        if reverse:
+            self.page.reverse()
+            self.has_next = has_current
+            self.next_position = current_position
+            self.has_previous = following_position is not None
+            self.previous_position = following_position
+        else:
+            self.has_next = following_position is not None
+            self.next_position = following_position
+            self.has_previous = has_current
+            self.previous_position = current_position
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def decode_cursor(self, request):
+        """
+        Позиции уникальны, поэтому ссылки на страницы выдаются
+        со смещением 0, а курсор с другим смещением отклоняется.
+        """
+        cursor = super().decode_cursor(request)
+        if cursor is not None and cursor.offset:
+            raise NotFound(self.invalid_cursor_message)
+        if cursor is not None and cursor.position is not None:
+            try:
+                values = json.loads(cursor.position)
+            except ValueError:
+                values = None
+            if not isinstance(values, list) or (
+                len(values) != len(self.ordering)
+            ):
+                raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def _get_position_from_instance(self, instance, ordering):
+        return json.dumps([
+            str(
+                instance[field.lstrip('-')] if isinstance(instance, dict)
+                else getattr(instance, field.lstrip('-'))
+            )
+            for field in ordering
+        ])
+
+
+class KeysetPagination(BasePagination):
+    """
+    Постраничный вывод со смещением или по курсору.
+    Режим курсора включается параметром cursor, для первой страницы
+    его значение оставляется пустым. Следующие страницы выбираются
+    по значениям всех полей сортировки, а не смещением, поэтому время
+    ответа не зависит от номера страницы.
+    Без параметра cursor используется прежний постраничный вывод.
+    """
+    cursor_query_param = 'cursor'
+    offset_pagination_class = PageNumberPagination
+    ordering = ('pk',)
+    # Параметры, меняющие сортировку списка: курсор по полям ordering
+    # с ними не сочетается.
+    cursor_excluded_params = ()
+
+    def get_cursor_paginator(self):
+        paginator = KeysetCursorPagination()
+        paginator.cursor_query_param = self.cursor_query_param
+        paginator.ordering = self.ordering
+        return paginator
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param in request.query_params:
+            self.check_cursor_params(request)
+            self.paginator = self.get_cursor_paginator()
+        else:
+            self.paginator = self.offset_pagination_class()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def check_cursor_params(self, request):
+        for param in self.cursor_excluded_params:
+            if param in request.query_params:
+                raise ValidationError({
+                    self.cursor_query_param: [
+                        f'Параметр {self.cursor_query_param} нельзя '
+                        f'сочетать с параметром {param}.'
+                    ]
+                })
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+
+class TitlePagination(KeysetPagination):
+    offset_pagination_class = LimitOffsetPagination
+    ordering = ('name', 'id')
+    # Результаты поиска сортируются по релевантности.
+    cursor_excluded_params = ('search',)
+
+
+class PublicationPagination(KeysetPagination):
+    ordering = ('pub_date', 'id')
+
+
+class ActivityPagination(KeysetCursorPagination):
+    """
+    Ленты активности выводятся только по курсору: от новых событий
+    к старым по индексу activity_feed_idx.
+    """
+    ordering = '-event_id'
+    page_size = 20
+    page_size_query_param = 'limit'
+    max_page_size = 100
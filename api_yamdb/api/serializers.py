@@ -1,11 +1,11 @@
+from operator import itemgetter
+
 from django.conf import settings
 from rest_framework import serializers
-from rest_framework.exceptions import ValidationError
-from rest_framework.generics import get_object_or_404
 from rest_framework.relations import SlugRelatedField
 from rest_framework.validators import UniqueValidator
 from reviews import models
-from reviews.models import Review, Title, User
+from reviews.models import User
 
 from .validators import username_validation, year_validation
 
@@ -81,6 +81,24 @@ class GenreSerializer(serializers.ModelSerializer):
         model = models.Genre
 
 
+class CategoryBulkSerializer(CategorySerializer):
+    """
+    Элемент массового создания категорий: уникальность slug проверяется
+    вьюсетом сразу для всего массива.
+    """
+    class Meta(CategorySerializer.Meta):
+        extra_kwargs = {'slug': {'validators': []}}
+
+
+class GenreBulkSerializer(GenreSerializer):
+    """
+    Элемент массового создания жанров: уникальность slug проверяется
+    вьюсетом сразу для всего массива.
+    """
+    class Meta(GenreSerializer.Meta):
+        extra_kwargs = {'slug': {'validators': []}}
+
+
 class TitleSerializer(serializers.ModelSerializer):
     genre = SlugRelatedField(
         slug_field='slug',
@@ -94,25 +112,158 @@ class TitleSerializer(serializers.ModelSerializer):
     )
 
     class Meta:
-        fields = '__all__'
+        exclude = ('rating_sum', 'rating_count', 'reviews_modified')
         model = models.Title
 
     def validate_year(self, year):
         return year_validation(year)
 
 
+class TitleBulkSerializer(TitleSerializer):
+    """
+    Элемент массового создания произведений: слаги жанров и категории
+    проверяются вьюсетом сразу для всего массива.
+    """
+    genre = serializers.ListField(child=serializers.SlugField())
+    category = serializers.SlugField()
+
+
+class SlugOrderedListSerializer(serializers.ListSerializer):
+    """
+    Список, упорядоченный по slug. Жанры произведения сортируются
+    в Python: их немного, а ORDER BY в prefetch_related требует
+    сортировки без индекса.
+    """
+
+    def to_representation(self, data):
+        return sorted(
+            super().to_representation(data), key=itemgetter('slug')
+        )
+
+
 class TitleGetSerializer(serializers.ModelSerializer):
-    genre = GenreSerializer(many=True)
+    genre = SlugOrderedListSerializer(child=GenreSerializer())
     category = CategorySerializer()
-    rating = serializers.IntegerField(
-        source='reviews__score__avg', read_only=True
+    rating = serializers.IntegerField(read_only=True)
+    reviews_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        exclude = ('rating_sum', 'rating_count', 'reviews_modified')
+        model = models.Title
+
+
+class LeaderboardParamsSerializer(serializers.Serializer):
+    """
+    Параметры рейтинга: количество позиций, диапазон лет выпуска
+    и минимальное количество отзывов.
+    """
+    limit = serializers.IntegerField(
+        min_value=1, max_value=settings.LEADERBOARD_MAX_LIMIT, default=10
     )
+    year_from = serializers.IntegerField(required=False)
+    year_to = serializers.IntegerField(required=False)
+    min_reviews = serializers.IntegerField(min_value=1, required=False)
+
+    def validate(self, data):
+        year_from = data.get('year_from')
+        year_to = data.get('year_to')
+        if None not in (year_from, year_to) and year_from > year_to:
+            raise serializers.ValidationError(
+                'year_from не может быть больше year_to'
+            )
+        return data
+
+
+class LeaderboardEntrySerializer(serializers.Serializer):
+    position = serializers.IntegerField()
+    average = serializers.DecimalField(
+        source='rank', max_digits=4, decimal_places=2, coerce_to_string=False
+    )
+    rating_count = serializers.IntegerField()
+    title = TitleGetSerializer()
+
+
+class ActivityParamsSerializer(serializers.Serializer):
+    """
+    Фильтр ленты активности: id произведения, slug жанра или имя
+    автора. Без фильтра выводится общая лента.
+    """
+    SCOPES = ('title', 'genre', 'user')
+
+    title = serializers.IntegerField(min_value=1, required=False)
+    genre = serializers.SlugField(required=False)
+    user = serializers.CharField(required=False)
 
+    def validate(self, data):
+        if len(data) > 1:
+            raise serializers.ValidationError(
+                'Укажите только один из параметров title, genre, user'
+            )
+        return data
+
+
+class ActivityTitleSerializer(serializers.ModelSerializer):
     class Meta:
-        fields = '__all__'
+        fields = ('id', 'name')
         model = models.Title
 
 
+class ActivityEventSerializer(serializers.ModelSerializer):
+    type = serializers.CharField(source='kind')
+    title = ActivityTitleSerializer()
+    author = SlugRelatedField(slug_field='username', read_only=True)
+    text = serializers.SerializerMethodField()
+    score = serializers.SerializerMethodField()
+    pub_date = serializers.DateTimeField(source='created')
+
+    class Meta:
+        fields = (
+            'id', 'type', 'title', 'review', 'comment', 'author', 'text',
+            'score', 'pub_date'
+        )
+        read_only_fields = fields
+        model = models.ActivityEvent
+
+    def get_text(self, event):
+        if event.comment_id is None:
+            return event.review.text
+        return event.comment.text
+
+    def get_score(self, event):
+        if event.comment_id is None:
+            return event.review.score
+        return None
+
+
+class TitlePageParamsSerializer(serializers.Serializer):
+    """
+    Параметры страницы произведения: количество и порядок отзывов
+    и поля произведения через запятую.
+    """
+    ORDER_CHOICES = ('latest', 'top')
+    FIELDS = (
+        'id', 'name', 'year', 'rating', 'reviews_count', 'description',
+        'genre', 'category'
+    )
+
+    reviews = serializers.IntegerField(
+        min_value=0, max_value=settings.TITLE_PAGE_MAX_REVIEWS, default=5
+    )
+    order = serializers.ChoiceField(choices=ORDER_CHOICES, default='latest')
+    fields = serializers.CharField(required=False)
+
+    def validate_fields(self, value):
+        fields = list(dict.fromkeys(
+            name.strip() for name in value.split(',') if name.strip()
+        ))
+        unknown = [name for name in fields if name not in self.FIELDS]
+        if unknown or not fields:
+            raise serializers.ValidationError(
+                f'Допустимые поля: {", ".join(self.FIELDS)}'
+            )
+        return fields
+
+
 class CommentSerializer(serializers.ModelSerializer):
     review = serializers.SlugRelatedField(
         slug_field='text',
@@ -139,16 +290,13 @@ class ReviewSerializer(serializers.ModelSerializer):
         read_only=True
     )
 
-    def validate(self, data):
-        request = self.context['request']
-        author = request.user
-        title_id = self.context['view'].kwargs.get('title_id')
-        title = get_object_or_404(Title, pk=title_id)
-        if request.method == 'POST':
-            if Review.objects.filter(title=title, author=author).exists():
-                raise ValidationError('Нельзя добавлять более одного отзыва')
-        return data
-
     class Meta:
         model = models.Review
-        fields = '__all__'
+        exclude = ('comments_modified',)
+
+
+class TitlePageReviewSerializer(ReviewSerializer):
+    latest_comment = CommentSerializer(read_only=True, allow_null=True)
+
+    class Meta(ReviewSerializer.Meta):
+        pass
@@ -0,0 +1,102 @@
+"""
+Ограничение частоты запросов регистрации и получения токена.
+
+Для каждого ключа запроса — IP-адреса клиента, username и email из тела
+запроса — ведётся своя корзина маркеров: ёмкость равна числу запросов
+из AUTH_THROTTLE['RATES'], маркеры восполняются равномерно за период.
+Корзина хранится в кеше Django одним числом — временем, когда она снова
+станет полной (GCRA), поэтому проверка всех ключей — это один get_many
+и один set_many без обращения к БД. Кеш должен быть общим для воркеров
+gunicorn. Одновременные запросы могут изредка пройти сверх лимита:
+чтение и запись корзины не атомарны, как и в throttle-классах DRF.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+DEFAULT_SETTINGS = {
+    'ENABLED': True,
+    'CACHE_ALIAS': 'default',
+    'RATES': {},
+}
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+KEY = 'throttle:{scope}:{name}:{digest}'
+BODY_FIELDS = ('username', 'email')
+
+
+def get_setting(name):
+    return getattr(settings, 'AUTH_THROTTLE', {}).get(
+        name, DEFAULT_SETTINGS[name]
+    )
+
+
+def parse_rate(rate):
+    """
+    '5/min' -> (5, 60), как в SimpleRateThrottle.
+    """
+    limit, period = rate.split('/')
+    return int(limit), PERIODS[period[0]]
+
+
+def get_digest(value):
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Лимиты берутся по throttle_scope представления. Запрос отклоняется,
+    если пуста хотя бы одна из его корзин; маркеры остальных корзин
+    при этом не расходуются.
+    """
+    def get_values(self, request):
+        values = {'ip': self.get_ident(request)}
+        data = request.data if isinstance(request.data, dict) else {}
+        for field in BODY_FIELDS:
+            value = data.get(field)
+            if isinstance(value, str) and value.strip():
+                values[field] = value.strip().lower()
+        return values
+
+    def get_buckets(self, request, view):
+        rates = get_setting('RATES').get(view.throttle_scope, {})
+        return {
+            KEY.format(
+                scope=view.throttle_scope, name=name, digest=get_digest(value)
+            ): parse_rate(rates[name])
+            for name, value in self.get_values(request).items()
+            if name in rates
+        }
+
+    def allow_request(self, request, view):
+        self.retry_after = 0
+        if not get_setting('ENABLED'):
+            return True
+        buckets = self.get_buckets(request, view)
+        if not buckets:
+            return True
+        cache = caches[get_setting('CACHE_ALIAS')]
+        now = time.time()
+        full_at = cache.get_many(list(buckets))
+        updates = {}
+        for key, (limit, period) in buckets.items():
+            # Каждый запрос отодвигает время полной корзины на один
+            # интервал; дальше, чем на период вперёд, корзина пуста.
+            next_full_at = max(full_at.get(key, now), now) + period / limit
+            if next_full_at - now > period:
+                self.retry_after = max(
+                    self.retry_after, next_full_at - now - period
+                )
+            else:
+                updates[key] = next_full_at
+        if self.retry_after:
+            return False
+        cache.set_many(
+            updates, max(period for _, period in buckets.values())
+        )
+        return True
+
+    def wait(self):
+        return self.retry_after
@@ -1,8 +1,11 @@
 from django.urls import include, path
 from rest_framework import routers
 
-from .views import (CategoryViewSet, CommentViewSet, GenreViewSet,
-                    GetJWTTokenView, ReviewViewSet, SignUpView, TitleViewSet,
+from .views import (ActivityView, CacheStatsView, CategoryLeaderboardView,
+                    CategoryViewSet, CommentViewSet, DatabasePoolStatsView,
+                    GenreLeaderboardView, GenreViewSet, GetJWTTokenView,
+                    LeaderboardView, OutboxStatsView, ReviewExportView,
+                    ReviewViewSet, SignUpView, TitleExportView, TitleViewSet,
                     UserViewSet)
 
 router_v1 = routers.DefaultRouter()
@@ -26,6 +29,36 @@ urlpatterns = [
     path('v1/', include(router_v1.urls)),
     path('v1/auth/signup/', SignUpView.as_view(), name='sign_up'),
     path('v1/auth/token/', GetJWTTokenView.as_view(), name='get_token'),
+    path('v1/stats/cache/', CacheStatsView.as_view(), name='cache_stats'),
+    path(
+        'v1/stats/outbox/', OutboxStatsView.as_view(), name='outbox_stats'
+    ),
+    path(
+        'v1/stats/db-pool/', DatabasePoolStatsView.as_view(),
+        name='db_pool_stats'
+    ),
+    path(
+        'v1/export/titles/', TitleExportView.as_view(), name='export_titles'
+    ),
+    path(
+        'v1/export/reviews/', ReviewExportView.as_view(),
+        name='export_reviews'
+    ),
+    path(
+        'v1/leaderboards/titles/', LeaderboardView.as_view(),
+        name='leaderboard'
+    ),
+    path(
+        'v1/leaderboards/genres/<slug:slug>/',
+        GenreLeaderboardView.as_view(),
+        name='genre_leaderboard'
+    ),
+    path(
+        'v1/leaderboards/categories/<slug:slug>/',
+        CategoryLeaderboardView.as_view(),
+        name='category_leaderboard'
+    ),
+    path('v1/activity/', ActivityView.as_view(), name='activity'),
     path('v1/', include('djoser.urls')),
     path('v1/', include('djoser.urls.jwt')),
 ]
@@ -1,19 +1,18 @@
-from django.conf import settings
-from django.core.mail import send_mail
+from .outbox import enqueue_email
 
 
-def send_confirmation_code(user):
+def send_confirmation_code(user, code):
     """
-    Отправляет код подтверждения, необходимый для регистрации на почту.
+    Ставит в очередь письмо с кодом подтверждения, необходимым для
+    регистрации.
     """
-    send_mail(
+    enqueue_email(
         subject='Регистрация на Yamdb',
-        message=(
+        body=(
             'Чтобы завершить регистрацию на Yamdb и получить токен отправьте '
             f'запрос с именем пользователя (username) {user.username} и '
-            f'кодом подтверждения (confirmation_code) {user.confirmation_code}'
+            f'кодом подтверждения (confirmation_code) {code}'
             ' на эндпойнт /api/v1/auth/token/.'
         ),
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[user.email]
+        recipient=user.email
     )
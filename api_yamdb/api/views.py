@@ -1,29 +1,56 @@
-from django.contrib.auth.tokens import default_token_generator
-from django.db import IntegrityError
-from django.db.models import Avg
+from django.db import IntegrityError, connection, transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, mixins, status, viewsets
+from rest_framework import filters, generics, mixins, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.pagination import (LimitOffsetPagination,
                                        PageNumberPagination)
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
 from reviews import models
 from reviews.models import User
 
+from api_yamdb.db import pool
+
+from . import export, outbox, projections
+from .authentication import get_token_for_user
+from .bulk import (BulkCreateMixin, add_error, get_does_not_exist_message,
+                   set_prefetched)
+from .cache import (CachedListMixin, CachedRetrieveMixin, cached_response,
+                    get_stats)
+from .conditional import ConditionalListMixin
 from .filters import TitleFilter
+from .identity import get_identity_map
+from .models import ConfirmationCode
+from .pagination import (ActivityPagination, PublicationPagination,
+                         TitlePagination)
 from .permissions import (IsAdmin, IsAdminOrReadOnly,
                           IsAuthorModeratorAdminOrReadOnly)
-from .serializers import (CategorySerializer, CommentSerializer,
+from .projections import ProjectedListMixin
+from .serializers import (ActivityEventSerializer, ActivityParamsSerializer,
+                          CategoryBulkSerializer, CategorySerializer,
+                          CommentSerializer, GenreBulkSerializer,
                           GenreSerializer, GetJWTTokenSerializer,
-                          ReviewSerializer, SignUpSerializer,
-                          TitleGetSerializer, TitleSerializer,
+                          LeaderboardEntrySerializer,
+                          LeaderboardParamsSerializer, ReviewSerializer,
+                          SignUpSerializer, TitleBulkSerializer,
+                          TitleGetSerializer, TitlePageParamsSerializer,
+                          TitlePageReviewSerializer, TitleSerializer,
                           UserRestrictedSerializer, UserSerializer)
+from .throttling import TokenBucketThrottle
 from .utils import send_confirmation_code
 
+# Порядок отзывов на странице произведения совпадает с индексами
+# review_title_pub_date_idx и review_title_score_idx.
+TITLE_PAGE_ORDERINGS = {
+    'latest': ('-pub_date', '-id'),
+    'top': ('-score', '-pub_date', '-id'),
+}
+
 
 class UserViewSet(viewsets.ModelViewSet):
     """
@@ -47,8 +74,9 @@ class UserViewSet(viewsets.ModelViewSet):
     )
     def me(self, request):
         """Просмотр и изменение своего аккаунта."""
+        user = get_object_or_404(User, pk=request.user.pk)
         serializer = UserRestrictedSerializer(
-            request.user,
+            user,
             data=request.data,
             partial=True
         )
@@ -65,6 +93,8 @@ class SignUpView(APIView):
     """
     permission_classes = [AllowAny]
     pagination_class = None
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'signup'
 
     def post(self, request):
         serializer = SignUpSerializer(data=request.data)
@@ -93,18 +123,22 @@ class SignUpView(APIView):
                     ('Ошибка при создании новой записи в БД')
                 ) from error
 
-        user.confirmation_code = default_token_generator.make_token(user)
-        user.save()
-        send_confirmation_code(user)
+        with transaction.atomic():
+            send_confirmation_code(
+                user, ConfirmationCode.objects.issue(user)
+            )
         return Response(serializer.validated_data, status=status.HTTP_200_OK)
 
 
 class GetJWTTokenView(APIView):
     """
     Получение JWT токена при предоставлении username и confirmation_code.
+    Код действует CONFIRMATION_CODE_TTL секунд и только один раз.
     """
     permission_classes = [AllowAny]
     pagination_class = None
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'token'
 
     def post(self, request):
         serializer = GetJWTTokenSerializer(data=request.data)
@@ -112,7 +146,7 @@ class GetJWTTokenView(APIView):
         username = serializer.validated_data.get('username')
         confirmation_code = serializer.validated_data['confirmation_code']
         user = get_object_or_404(User, username=username)
-        if user.confirmation_code != confirmation_code:
+        if not ConfirmationCode.objects.consume(user, confirmation_code):
             return Response(
                 {"confirmation_code": ("Неверный код доступа "
                                        f"{confirmation_code}")},
@@ -120,16 +154,188 @@ class GetJWTTokenView(APIView):
             )
         return Response(
             {
-                "token": str(RefreshToken.for_user(user).access_token)
+                "token": str(get_token_for_user(user))
             }
         )
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = models.Title.objects.all().annotate(
-        Avg("reviews__score")
-    ).order_by("name")
-    pagination_class = LimitOffsetPagination
+class CacheStatsView(APIView):
+    """
+    Счётчики попаданий и промахов кеша каталога.
+    """
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        return Response(get_stats())
+
+
+class OutboxStatsView(APIView):
+    """
+    Глубина очереди исходящих писем и задержка их отправки.
+    """
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        return Response(outbox.get_stats())
+
+
+class DatabasePoolStatsView(APIView):
+    """
+    Загрузка пулов соединений с БД и время ожидания соединений
+    в процессе, обработавшем запрос.
+    """
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        return Response(pool.get_stats())
+
+
+class ExportView(APIView):
+    """
+    Потоковая выгрузка всех записей в NDJSON или CSV (?format=csv).
+    Записи отдаются по возрастанию id; параметр after продолжает
+    прерванную выгрузку после последнего полученного id.
+    rows_function(after) возвращает записи выгрузки.
+    """
+    permission_classes = [IsAdmin]
+    renderer_classes = [export.NDJSONRenderer, export.CSVRenderer]
+    export_name = None
+    export_fields = None
+    rows_function = None
+
+    def get(self, request):
+        after = request.query_params.get('after', '0')
+        if not after.isdigit():
+            raise ValidationError(
+                {'after': 'Укажите id последней полученной записи'}
+            )
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            export.stream(
+                self.rows_function(int(after)), self.export_fields, renderer
+            ),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}'
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{self.export_name}.{renderer.format}"'
+        )
+        return response
+
+
+class TitleExportView(ExportView):
+    export_name = 'titles'
+    export_fields = export.TITLE_FIELDS
+    rows_function = staticmethod(export.iter_titles)
+
+
+class ReviewExportView(ExportView):
+    export_name = 'reviews'
+    export_fields = export.REVIEW_FIELDS
+    rows_function = staticmethod(export.iter_reviews)
+
+
+class LeaderboardView(APIView):
+    """
+    Лучшие произведения по средней оценке. Позиции читаются из заранее
+    рассчитанных рейтингов, поэтому ответ строится за несколько запросов
+    независимо от размера каталога.
+    """
+    permission_classes = [AllowAny]
+    scope = models.LeaderboardEntry.SCOPE_ALL
+    scope_model = None
+
+    def get_scope_id(self, slug):
+        if self.scope_model is None:
+            return 0
+        return get_object_or_404(
+            self.scope_model.objects.only('pk'), slug=slug
+        ).pk
+
+    def get(self, request, slug=None):
+        return cached_response('titles', request, self.get_leaderboard, slug)
+
+    def get_leaderboard(self, request, slug):
+        params = LeaderboardParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        min_reviews = max(
+            params.validated_data.pop('min_reviews', 0),
+            models.get_min_reviews()
+        )
+        entries = list(models.LeaderboardEntry.objects.top(
+            self.scope,
+            self.get_scope_id(slug),
+            min_reviews=min_reviews,
+            **params.validated_data
+        ))
+        titles = models.Title.objects.with_relations().in_bulk(
+            [entry.title_id for entry in entries]
+        )
+        # Произведение могли удалить после чтения рейтинга.
+        entries = [entry for entry in entries if entry.title_id in titles]
+        for position, entry in enumerate(entries, 1):
+            entry.position = position
+            entry.title = titles[entry.title_id]
+        return Response(LeaderboardEntrySerializer(entries, many=True).data)
+
+
+class GenreLeaderboardView(LeaderboardView):
+    scope = models.LeaderboardEntry.SCOPE_GENRE
+    scope_model = models.Genre
+
+
+class CategoryLeaderboardView(LeaderboardView):
+    scope = models.LeaderboardEntry.SCOPE_CATEGORY
+    scope_model = models.Category
+
+
+class ActivityView(generics.ListAPIView):
+    """
+    Лента новых отзывов и комментариев: общая или произведения, жанра
+    или автора. Каждая лента хранится своими записями, поэтому страница
+    читается по индексу без обращения к таблицам отзывов и комментариев
+    с сортировкой.
+    """
+    permission_classes = [AllowAny]
+    pagination_class = ActivityPagination
+    serializer_class = ActivityEventSerializer
+
+    def get_scope(self, data):
+        if 'title' in data:
+            return models.ActivityFeedEntry.SCOPE_TITLE, get_object_or_404(
+                models.Title.objects.only('pk'), pk=data['title']
+            ).pk
+        if 'genre' in data:
+            return models.ActivityFeedEntry.SCOPE_GENRE, get_object_or_404(
+                models.Genre.objects.only('pk'), slug=data['genre']
+            ).pk
+        if 'user' in data:
+            return models.ActivityFeedEntry.SCOPE_USER, get_object_or_404(
+                User.objects.only('pk'), username=data['user']
+            ).pk
+        return models.ActivityFeedEntry.SCOPE_ALL, 0
+
+    def get_queryset(self):
+        params = ActivityParamsSerializer(data=self.request.query_params)
+        params.is_valid(raise_exception=True)
+        return models.ActivityFeedEntry.objects.feed(
+            *self.get_scope(params.validated_data)
+        )
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer(
+            [entry.event for entry in page], many=True
+        )
+        return self.get_paginated_response(serializer.data)
+
+
+class TitleViewSet(BulkCreateMixin, CachedListMixin, CachedRetrieveMixin,
+                   ProjectedListMixin, viewsets.ModelViewSet):
+    cache_group = 'titles'
+    bulk_serializer_class = TitleBulkSerializer
+    list_columns = projections.TITLE_COLUMNS
+    queryset = models.Title.objects.with_relations().order_by('name', 'id')
+    pagination_class = TitlePagination
     permission_classes = [IsAdminOrReadOnly]
     filter_backends = [DjangoFilterBackend]
     filterset_class = TitleFilter
@@ -140,10 +346,49 @@ class TitleViewSet(viewsets.ModelViewSet):
         else:
             return TitleSerializer
 
+    def project_rows(self, rows):
+        return projections.project_titles(rows)
+
+    @action(detail=True, url_path='page')
+    def page(self, request, pk=None):
+        """
+        Произведение вместе с первыми отзывами, количеством комментариев
+        к каждому и последним комментарием. Ответ строится за четыре
+        запроса при любом количестве отзывов и комментариев.
+        """
+        params = TitlePageParamsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        title = self.get_object()
+        reviews = list(
+            title.reviews.select_related('author').with_latest_comment()
+            .order_by(*TITLE_PAGE_ORDERINGS[params.validated_data['order']])
+            [:params.validated_data['reviews']]
+        )
+        comments = models.Comment.objects.select_related('author').in_bulk([
+            review.latest_comment_id for review in reviews
+            if review.latest_comment_id is not None
+        ])
+        for review in reviews:
+            review.title = title
+            review.latest_comment = comments.get(review.latest_comment_id)
+            if review.latest_comment is not None:
+                review.latest_comment.review = review
+        title_data = TitleGetSerializer(title).data
+        fields = params.validated_data.get('fields')
+        if fields:
+            title_data = {name: title_data[name] for name in fields}
+        return Response({
+            'title': title_data,
+            'reviews_count': title.rating_count,
+            'reviews': TitlePageReviewSerializer(reviews, many=True).data,
+        })
+
     def perform_create(self, serializer):
         return serializer.save()
 
     def create(self, request, *args, **kwargs):
+        if isinstance(request.data, list):
+            return self.bulk_create(request.data)
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         instance = self.perform_create(serializer)
@@ -153,11 +398,74 @@ class TitleViewSet(viewsets.ModelViewSet):
             status=status.HTTP_201_CREATED
         )
 
+    def resolve_relations(self, items, errors):
+        """
+        Слаги жанров и категорий всего массива загружаются двумя запросами.
+        """
+        valid = [item for item in items if item is not None]
+        genres = models.Genre.objects.in_bulk(
+            {slug for item in valid for slug in item['genre']},
+            field_name='slug'
+        )
+        categories = models.Category.objects.in_bulk(
+            {item['category'] for item in valid}, field_name='slug'
+        )
+        for index, item in enumerate(items):
+            if item is None:
+                continue
+            for slug in item['genre']:
+                if slug not in genres:
+                    add_error(errors, index, 'genre',
+                              get_does_not_exist_message('slug', slug))
+            if item['category'] not in categories:
+                add_error(errors, index, 'category',
+                          get_does_not_exist_message('slug', item['category']))
+                continue
+            item['genre'] = list(dict.fromkeys(
+                genres[slug] for slug in item['genre'] if slug in genres
+            ))
+            item['category'] = categories[item['category']]
+
+    def bulk_insert(self, items):
+        """
+        Если бэкенд не возвращает id после bulk_create (SQLite в Django 2.2),
+        произведения сохраняются по одному; связи с жанрами всегда
+        вставляются пачкой.
+        """
+        titles = [
+            models.Title(**{
+                field: value for field, value in item.items()
+                if field != 'genre'
+            })
+            for item in items
+        ]
+        if connection.features.can_return_ids_from_bulk_insert:
+            models.Title.objects.bulk_create(titles)
+        else:
+            for title in titles:
+                title.save()
+        models.GenreTitle.objects.bulk_create(
+            models.GenreTitle(title_id=title, genre_id=genre)
+            for title, item in zip(titles, items)
+            for genre in item['genre']
+        )
+        for title, item in zip(titles, items):
+            set_prefetched(title, 'genre', item['genre'])
+        return titles
+
+    def get_bulk_response_data(self, instances):
+        return TitleGetSerializer(instances, many=True).data
 
-class CategoryViewSet(mixins.CreateModelMixin,
+
+class CategoryViewSet(BulkCreateMixin,
+                      CachedListMixin,
+                      mixins.CreateModelMixin,
                       mixins.ListModelMixin,
                       mixins.DestroyModelMixin,
                       viewsets.GenericViewSet):
+    cache_group = 'categories'
+    bulk_serializer_class = CategoryBulkSerializer
+    bulk_unique_fields = ('slug',)
     queryset = models.Category.objects.all()
     pagination_class = LimitOffsetPagination
     serializer_class = CategorySerializer
@@ -167,10 +475,15 @@ class CategoryViewSet(mixins.CreateModelMixin,
     permission_classes = [IsAdminOrReadOnly]
 
 
-class GenreViewSet(mixins.CreateModelMixin,
+class GenreViewSet(BulkCreateMixin,
+                   CachedListMixin,
+                   mixins.CreateModelMixin,
                    mixins.ListModelMixin,
                    mixins.DestroyModelMixin,
                    viewsets.GenericViewSet):
+    cache_group = 'genres'
+    bulk_serializer_class = GenreBulkSerializer
+    bulk_unique_fields = ('slug',)
     queryset = models.Genre.objects.all()
     pagination_class = LimitOffsetPagination
     serializer_class = GenreSerializer
@@ -180,36 +493,91 @@ class GenreViewSet(mixins.CreateModelMixin,
     permission_classes = [IsAdminOrReadOnly]
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(ConditionalListMixin, ProjectedListMixin,
+                    viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
+    list_columns = projections.REVIEW_COLUMNS
+    pagination_class = PublicationPagination
     permission_classes = [IsAuthorModeratorAdminOrReadOnly]
 
+    def get_title(self):
+        return get_identity_map(self.request).get_or_404(
+            models.Title, self.kwargs.get('title_id')
+        )
+
+    def get_list_modified(self):
+        return self.get_title().reviews_modified
+
+    def project_rows(self, rows):
+        return projections.project_reviews(rows, self.get_title())
+
     def get_queryset(self):
-        title = get_object_or_404(models.Title, pk=self.kwargs.get('title_id'))
-        return title.reviews.all()
+        return self.get_title().reviews.select_related('author', 'title')
 
     def perform_create(self, serializer):
-        title_id = self.kwargs.get('title_id')
-        title = get_object_or_404(models.Title, id=title_id)
-        serializer.save(author=self.request.user, title=title)
+        """
+        Повторный отзыв отсекает ограничение unique_review в БД, без
+        предварительной проверки, которая не защищает от гонки.
+        Оценку произведения обновляют обработчики сигналов отзыва.
+        """
+        title = self.get_title()
+        try:
+            with transaction.atomic():
+                serializer.save(author=self.request.user, title=title)
+        except IntegrityError:
+            if not models.Review.objects.filter(
+                title=title, author=self.request.user
+            ).exists():
+                raise
+            raise ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    'Нельзя добавлять более одного отзыва'
+                ]
+            })
+
+    def perform_update(self, serializer):
+        # Прежняя оценка блокируется до изменения рейтинга произведения.
+        with transaction.atomic():
+            serializer.save()
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ConditionalListMixin, ProjectedListMixin,
+                     viewsets.ModelViewSet):
     serializer_class = CommentSerializer
+    list_columns = projections.COMMENT_COLUMNS
+    pagination_class = PublicationPagination
     permission_classes = [IsAuthorModeratorAdminOrReadOnly]
 
-    def get_queryset(self):
-        review = get_object_or_404(
-            models.Review,
-            pk=self.kwargs.get('review_id')
+    def get_review(self):
+        """
+        Отзыв и его принадлежность произведению проверяются одним запросом.
+        """
+        return get_identity_map(self.request).get_or_404(
+            models.Review.objects.filter(title_id=self.kwargs.get('title_id')),
+            self.kwargs.get('review_id')
         )
-        return review.comments.all()
+
+    def get_list_modified(self):
+        return self.get_review().comments_modified
+
+    def project_rows(self, rows):
+        return projections.project_comments(rows, self.get_review())
+
+    def get_queryset(self):
+        return self.get_review().comments.select_related('author', 'review')
 
     def perform_create(self, serializer):
-        title_id = self.kwargs.get('title_id')
-        review_id = self.kwargs.get('review_id')
-        review = get_object_or_404(models.Review, id=review_id, title=title_id)
-        serializer.save(author=self.request.user, review=review)
+        """
+        Комментарий, счётчик отзыва и события ленты записываются одной
+        транзакцией.
+        """
+        with transaction.atomic():
+            serializer.save(author=self.request.user, review=self.get_review())
+
+    def perform_update(self, serializer):
+        # Прежний отзыв комментария блокируется до изменения счётчиков.
+        with transaction.atomic():
+            serializer.save()
 
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
@@ -0,0 +1,276 @@
+"""
+Пул соединений с БД для бэкендов Django.
+
+Django открывает соединение в начале запроса и закрывает в конце
+(CONN_MAX_AGE = 0). Бэкенды из этого пакета вместо закрытия возвращают
+соединение в пул процесса, а следующий запрос берёт его оттуда без
+установки нового соединения. Соединение, простоявшее в пуле дольше
+PING_AFTER секунд, перед выдачей проверяется запросом SELECT 1:
+соединения, возвращённые недавно, выдаются без лишнего обращения
+к серверу. Соединения, простоявшие дольше IDLE_TIMEOUT, закрываются.
+Если все MAX_SIZE соединений заняты, запрос ждёт освобождения не дольше
+TIMEOUT секунд.
+
+Пул включается ключом POOL в настройках подключения:
+
+    DATABASES['default']['POOL'] = {'MAX_SIZE': 10, 'IDLE_TIMEOUT': 300}
+"""
+import os
+import threading
+import time
+from collections import deque
+from functools import partial
+
+DEFAULT_OPTIONS = {
+    'MAX_SIZE': 10,
+    'IDLE_TIMEOUT': 300,
+    'TIMEOUT': 10,
+    'PRE_PING': True,
+    'PING_AFTER': 30,
+}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeoutError(Exception):
+    pass
+
+
+def ping(connection):
+    """
+    Проверка соединения перед выдачей. Откат завершает транзакцию,
+    которую SELECT открывает вне режима autocommit.
+    """
+    cursor = connection.cursor()
+    try:
+        cursor.execute('SELECT 1')
+    finally:
+        cursor.close()
+    connection.rollback()
+
+
+def close_quietly(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+class ConnectionPool:
+    """
+    Соединения одного подключения в процессе. Свободные соединения
+    выдаются в порядке LIFO: часто используемые остаются тёплыми,
+    а лишние дольше простаивают и закрываются по IDLE_TIMEOUT.
+    """
+    def __init__(self, max_size, idle_timeout, timeout, pre_ping,
+                 ping_after=0):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.pre_ping = pre_ping
+        self.ping_after = ping_after
+        self.pid = os.getpid()
+        self.condition = threading.Condition()
+        self.idle = deque()
+        self.size = 0
+        self.in_use = 0
+        self.checkouts = 0
+        self.connects = 0
+        self.timeouts = 0
+        self.ping_failures = 0
+        self.wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    def acquire(self):
+        """
+        Свободное соединение или None, если нужно открыть новое.
+        """
+        started = time.monotonic()
+        deadline = started + self.timeout
+        with self.condition:
+            while not self.idle and self.size >= self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    self.add_wait(started)
+                    raise PoolTimeoutError(
+                        f'Все {self.max_size} соединений пула заняты '
+                        f'дольше {self.timeout} с'
+                    )
+                self.condition.wait(remaining)
+            wait_ms = self.add_wait(started)
+            self.checkouts += 1
+            self.in_use += 1
+            if self.idle:
+                return self.idle.pop(), wait_ms
+            self.size += 1
+            return None, wait_ms
+
+    def add_wait(self, started):
+        wait_ms = (time.monotonic() - started) * 1000
+        self.wait_ms += wait_ms
+        self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+        return wait_ms
+
+    def is_alive(self, connection, returned_at):
+        idle = time.monotonic() - returned_at
+        if idle > self.idle_timeout:
+            return False
+        if not self.pre_ping or idle <= self.ping_after:
+            return True
+        try:
+            ping(connection)
+        except Exception:
+            self.ping_failures += 1
+            return False
+        return True
+
+    def checkout(self, connect):
+        """
+        Соединение из пула или новое, открытое функцией connect,
+        и время ожидания свободного места в миллисекундах.
+        """
+        item, wait_ms = self.acquire()
+        if item is not None:
+            connection, returned_at = item
+            if self.is_alive(connection, returned_at):
+                return connection, wait_ms
+            close_quietly(connection)
+        try:
+            connection = connect()
+        except Exception:
+            self.release()
+            raise
+        with self.condition:
+            self.connects += 1
+        return connection, wait_ms
+
+    def checkin(self, connection):
+        """
+        Возвращает соединение в пул. Незавершённая транзакция
+        откатывается; соединение, на котором откат не удался, закрывается.
+        """
+        try:
+            connection.rollback()
+        except Exception:
+            close_quietly(connection)
+            self.release()
+            return
+        expired = []
+        now = time.monotonic()
+        with self.condition:
+            self.in_use -= 1
+            self.idle.append((connection, now))
+            while self.idle and now - self.idle[0][1] > self.idle_timeout:
+                expired.append(self.idle.popleft()[0])
+                self.size -= 1
+            self.condition.notify()
+        for connection in expired:
+            close_quietly(connection)
+
+    def release(self):
+        """
+        Освобождает место закрытого соединения.
+        """
+        with self.condition:
+            self.in_use -= 1
+            self.size -= 1
+            self.condition.notify()
+
+    def close(self):
+        with self.condition:
+            idle = [connection for connection, _ in self.idle]
+            self.idle.clear()
+            self.size -= len(idle)
+        for connection in idle:
+            close_quietly(connection)
+
+    def stats(self):
+        with self.condition:
+            return {
+                'max_size': self.max_size,
+                'size': self.size,
+                'idle': len(self.idle),
+                'in_use': self.in_use,
+                'utilization': round(self.in_use / self.max_size, 3),
+                'checkouts': self.checkouts,
+                'connects': self.connects,
+                'timeouts': self.timeouts,
+                'ping_failures': self.ping_failures,
+                'wait_ms': round(self.wait_ms, 3),
+                'max_wait_ms': round(self.max_wait_ms, 3),
+            }
+
+
+def get_pool(alias, options):
+    """
+    Пул подключения alias. После fork, например в воркере gunicorn
+    с --preload, создаётся новый пул: соединения родителя не
+    используются.
+    """
+    with _pools_lock:
+        pool = _pools.get(alias)
+        if pool is not None and pool.pid == os.getpid():
+            return pool
+        options = dict(DEFAULT_OPTIONS, **options)
+        _pools[alias] = ConnectionPool(
+            max_size=options['MAX_SIZE'],
+            idle_timeout=options['IDLE_TIMEOUT'],
+            timeout=options['TIMEOUT'],
+            pre_ping=options['PRE_PING'],
+            ping_after=options['PING_AFTER'],
+        )
+        return _pools[alias]
+
+
+def get_stats():
+    """
+    Метрики пулов процесса по именам подключений.
+    """
+    with _pools_lock:
+        pools = dict(_pools)
+    return {alias: pool.stats() for alias, pool in pools.items()}
+
+
+def close_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+class PooledDatabaseWrapperMixin:
+    """
+    Подмешивается к DatabaseWrapper бэкенда. Без ключа POOL
+    в настройках подключения бэкенд работает как исходный.
+    pool_wait_ms накапливает время ожидания соединений этим
+    подключением (подключения Django свои у каждого потока).
+    """
+    pool_wait_ms = 0.0
+
+    def get_pool(self):
+        options = self.settings_dict.get('POOL')
+        if not options:
+            return None
+        return get_pool(self.alias, options)
+
+    def get_new_connection(self, conn_params):
+        pool = self.get_pool()
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        try:
+            connection, wait_ms = pool.checkout(
+                partial(super().get_new_connection, conn_params)
+            )
+        except PoolTimeoutError as error:
+            raise self.Database.OperationalError(str(error)) from error
+        self.pool_wait_ms += wait_ms
+        return connection
+
+    def _close(self):
+        pool = self.get_pool()
+        if pool is None or self.connection is None:
+            return super()._close()
+        return pool.checkin(self.connection)
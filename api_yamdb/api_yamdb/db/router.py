@@ -0,0 +1,166 @@
+"""
+Чтение с реплик БД.
+
+ReplicaRoutingMiddleware разрешает чтение с реплик только в запросах
+безопасными методами (GET, HEAD, OPTIONS); вне запросов, например
+в командах manage.py, и в запросах на изменение всё читается
+с основной БД. ReplicaRouter направляет чтение на реплику, выбранную
+один раз на запрос, а запись — на основную БД.
+
+После записи чтение клиента на STICKY_SECONDS секунд закрепляется за
+основной БД, чтобы он видел свои изменения, например только что
+оставленный отзыв: отметка хранится в кеше по заголовку Authorization.
+Реплика, к которой не удалось подключиться, пропускается RETRY_AFTER
+секунд; если доступных реплик нет, чтение идёт с основной БД.
+Закреплённые за основной БД клиенты не читают кеш каталога, а ответы,
+прочитанные с реплик в течение STICKY_SECONDS после сброса кеша, в него
+не сохраняются (см. api.cache).
+"""
+import hashlib
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+DEFAULT_SETTINGS = {
+    'ALIASES': (),
+    'STICKY_SECONDS': 10,
+    'RETRY_AFTER': 30,
+    'CACHE_ALIAS': 'default',
+}
+STICKY_KEY = 'db-sticky:{}'
+LOCAL_BACKEND = 'django.core.cache.backends.locmem.LocMemCache'
+
+_state = threading.local()
+_unavailable = {}
+
+
+def get_setting(name):
+    return getattr(settings, 'DATABASE_REPLICAS', {}).get(
+        name, DEFAULT_SETTINGS[name]
+    )
+
+
+def get_sticky_key(request):
+    """
+    Ключ клиента по заголовку Authorization; у анонимных клиентов
+    ключа нет.
+    """
+    authorization = request.META.get('HTTP_AUTHORIZATION')
+    if not authorization:
+        return None
+    return STICKY_KEY.format(
+        hashlib.sha256(authorization.encode()).hexdigest()
+    )
+
+
+def is_sticky():
+    """
+    Клиент текущего запроса недавно записывал данные.
+    """
+    return getattr(_state, 'sticky', False)
+
+
+def reads_from_replica():
+    return getattr(_state, 'use_replica', False)
+
+
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Отметка записи, поставленная одним воркером, должна быть видна
+    остальным.
+    """
+    alias = get_setting('CACHE_ALIAS')
+    if not get_setting('ALIASES') or (
+        settings.CACHES[alias]['BACKEND'] != LOCAL_BACKEND
+    ):
+        return []
+    return [checks.Error(
+        'Отметки записи клиентов хранятся в кеше в памяти процесса: '
+        'после записи клиент может читать с отстающей реплики.',
+        hint='Укажите адрес общего кеша в CACHE_LOCATION.',
+        id='api_yamdb.E001',
+    )]
+
+
+def is_available(alias):
+    """
+    Подключается к реплике; при ошибке реплика пропускается
+    RETRY_AFTER секунд.
+    """
+    if _unavailable.get(alias, 0) > time.monotonic():
+        return False
+    try:
+        connections[alias].ensure_connection()
+    except DatabaseError:
+        _unavailable[alias] = time.monotonic() + get_setting('RETRY_AFTER')
+        return False
+    _unavailable.pop(alias, None)
+    return True
+
+
+def choose_replica():
+    aliases = list(get_setting('ALIASES'))
+    random.shuffle(aliases)
+    for alias in aliases:
+        if is_available(alias):
+            return alias
+    return DEFAULT_DB_ALIAS
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if not getattr(_state, 'use_replica', False):
+            return DEFAULT_DB_ALIAS
+        # Внутри транзакции читаются её же незафиксированные изменения.
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        if getattr(_state, 'replica', None) is None:
+            _state.replica = choose_replica()
+        return _state.replica
+
+    def db_for_write(self, model, **hints):
+        _state.use_replica = False
+        _state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """
+        Реплики содержат те же данные, что и основная БД.
+        """
+        return True
+
+
+class ReplicaRoutingMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        key = get_sticky_key(request)
+        cache = caches[get_setting('CACHE_ALIAS')]
+        _state.sticky = bool(
+            get_setting('ALIASES')
+            and key is not None
+            and cache.get(key) is not None
+        )
+        _state.use_replica = bool(
+            get_setting('ALIASES')
+            and request.method in ('GET', 'HEAD', 'OPTIONS')
+            and not _state.sticky
+        )
+        _state.replica = None
+        _state.wrote = False
+        try:
+            return self.get_response(request)
+        finally:
+            if _state.wrote and key is not None:
+                cache.set(key, True, get_setting('STICKY_SECONDS'))
+            _state.use_replica = False
+            _state.sticky = False
+            _state.replica = None
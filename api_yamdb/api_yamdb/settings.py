@@ -30,18 +30,20 @@ INSTALLED_APPS = [
     'djoser',
     'import_export',
     'django_filters',
-    'api',
-    'reviews'
+    'api.apps.ApiConfig',
+    'reviews.apps.ReviewsConfig'
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api_yamdb.db.router.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.QueryInstrumentationMiddleware',
 ]
 
 ROOT_URLCONF = 'api_yamdb.urls'
@@ -75,10 +77,75 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
-        'PORT': os.getenv('DB_PORT')
+        'PORT': os.getenv('DB_PORT'),
+        # Соединения бэкендов api_yamdb.db (DB_ENGINE=api_yamdb.db.postgresql)
+        # возвращаются в пул процесса в конце запроса и переиспользуются
+        # следующими запросами; стандартный бэкенд ключ POOL не читает.
+        'POOL': {
+            'MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+            'IDLE_TIMEOUT': int(os.getenv('DB_POOL_IDLE_TIMEOUT', 300)),
+            'TIMEOUT': int(os.getenv('DB_POOL_TIMEOUT', 10)),
+            'PRE_PING': True,
+            'PING_AFTER': int(os.getenv('DB_POOL_PING_AFTER', 30)),
+        },
     }
 }
 
+# Read replicas: GET requests read from replica1, replica2, ... (hosts from
+# DB_REPLICA_HOSTS); after a write the client reads from default for
+# STICKY_SECONDS
+
+DATABASE_REPLICAS = {
+    'ALIASES': [],
+    'STICKY_SECONDS': int(os.getenv('DB_REPLICA_STICKY_SECONDS', 10)),
+    'RETRY_AFTER': int(os.getenv('DB_REPLICA_RETRY_AFTER', 30)),
+    'CACHE_ALIAS': 'default',
+}
+for index, host in enumerate(
+    filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), 1
+):
+    DATABASES[f'replica{index}'] = dict(
+        DATABASES['default'], HOST=host.strip(), TEST={'MIRROR': 'default'}
+    )
+    DATABASE_REPLICAS['ALIASES'].append(f'replica{index}')
+
+DATABASE_ROUTERS = ['api_yamdb.db.router.ReplicaRouter']
+
+
+# Cache
+# Кеш должен быть общим для воркеров gunicorn, контейнера outbox и команд
+# manage.py, иначе сброс кеша виден только одному процессу. docker-compose
+# запускает memcached и передаёт его адрес в CACHE_LOCATION; без адреса
+# кеш хранится в памяти процесса, и кеш каталога по умолчанию выключен.
+
+CACHE_LOCATION = os.getenv('CACHE_LOCATION', '')
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.memcached.MemcachedCache'
+            if CACHE_LOCATION
+            else 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': CACHE_LOCATION,
+    }
+}
+
+CATALOG_CACHE = {
+    'ENABLED': os.getenv(
+        'CATALOG_CACHE_ENABLED', str(bool(CACHE_LOCATION))
+    ) == 'True',
+    'ALIAS': 'default',
+    'TIMEOUT': int(os.getenv('CATALOG_CACHE_TIMEOUT', 300)),
+}
+
+
+SQL_INSTRUMENTATION = {
+    'ENABLED': os.getenv('SQL_INSTRUMENTATION_ENABLED', 'False') == 'True',
+    'SLOW_QUERY_MS': int(os.getenv('SLOW_QUERY_MS', 100)),
+    'EXPLAIN': True,
+}
+
 
 # Password validation
 
@@ -130,10 +197,13 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.ClaimsJWTAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
+    # nginx заменяет X-Forwarded-For адресом клиента; адрес берётся
+    # из последнего значения заголовка, а не из REMOTE_ADDR nginx.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 1)),
 }
 
 SIMPLE_JWT = {
@@ -141,13 +211,72 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Signup and token requests per client IP and per username/email from
+# the request body; rejected requests get 429 with Retry-After
+
+AUTH_THROTTLE = {
+    'ENABLED': os.getenv('AUTH_THROTTLE_ENABLED', 'True') == 'True',
+    'CACHE_ALIAS': 'default',
+    'RATES': {
+        'signup': {'ip': '30/min', 'username': '5/min', 'email': '5/min'},
+        'token': {'ip': '30/min', 'username': '10/min'},
+    },
+}
+
+# Confirmation codes are single-use and expire after CONFIRMATION_CODE_TTL
+# seconds; expired codes are removed by delete_expired_codes
+
+CONFIRMATION_CODE_TTL = int(os.getenv('CONFIRMATION_CODE_TTL', 24 * 60 * 60))
+CONFIRMATION_CODE_BYTES = 16
+
+JWT_CLAIMS_AUTH = {
+    'CACHE_SIZE': 10000,
+    'VERSION_TTL': 5,
+}
+
 # Email configuration
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 DEFAULT_FROM_EMAIL = "api_yamdb@yandex.ru"
 
+EMAIL_OUTBOX = {
+    'BATCH_SIZE': 100,
+    'MAX_ATTEMPTS': 5,
+    'RETRY_DELAY': 60,
+    'MAX_RETRY_DELAY': 3600,
+    'LEASE': 300,
+    # Отправленные письма хранятся неделю.
+    'RETENTION': 7 * 24 * 3600,
+}
+
 # Variables
 
 USERNAME_MAX_LENGTH = 150
 EMAIL_MAX_LENGTH = 254
+
+# Full-text search
+
+TITLE_SEARCH_CONFIG = os.getenv('TITLE_SEARCH_CONFIG', 'russian')
+
+# Streaming export
+
+EXPORT_CHUNK_SIZE = 2000
+
+# Bulk create of titles, genres and categories
+
+BULK_CREATE_MAX_ITEMS = 5000
+
+# Leaderboards: titles with fewer reviews are not ranked
+
+LEADERBOARD_MIN_REVIEWS = 3
+LEADERBOARD_MAX_LIMIT = 100
+
+# Title page: a title with its first reviews in one response
+
+TITLE_PAGE_MAX_REVIEWS = 20
+
+# Title, review and comment lists are built from values() rows without
+# DRF serializers; the output is identical
+
+FAST_LIST_SERIALIZATION = True
@@ -74,7 +74,13 @@ class TitleResource(resources.ModelResource):
 
     class Meta:
         model = Title
-        exclude = ('genre', 'description',)
+        exclude = (
+            'genre',
+            'description',
+            'rating_sum',
+            'rating_count',
+            'reviews_modified',
+        )
 
 
 class TitleAdmin(ImportExportModelAdmin):
@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ReviewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reviews'
+
+    def ready(self):
+        from .search import create_search_index
+        from .signals import connect_signals
+
+        post_migrate.connect(create_search_index, sender=self)
+        connect_signals()
@@ -0,0 +1,247 @@
+import csv
+import io
+import os
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from itertools import islice
+
+from api.cache import GROUPS, invalidate
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from reviews.models import (ActivityEvent, ActivityFeedEntry, Category,
+                            Comment, Genre, GenreTitle, Review, Title, User)
+
+Source = namedtuple('Source', ('filename', 'model', 'relations'))
+
+# Порядок загрузки учитывает зависимости между таблицами. В relations
+# указано, в какое поле-ссылку попадает столбец файла.
+SOURCES = (
+    Source('users.csv', User, {}),
+    Source('category.csv', Category, {}),
+    Source('genre.csv', Genre, {}),
+    Source('titles.csv', Title, {'category': 'category'}),
+    Source(
+        'genre_title.csv',
+        GenreTitle,
+        {'title_id': 'title_id', 'genre_id': 'genre_id'}
+    ),
+    Source('review.csv', Review, {'title_id': 'title', 'author': 'author'}),
+    Source(
+        'comments.csv',
+        Comment,
+        {'review_id': 'review', 'author': 'author'}
+    ),
+)
+NULL = '\\N'
+
+
+@contextmanager
+def preserve_auto_now_add(model):
+    """
+    Сохраняет даты из файла вместо подстановки текущего времени.
+    """
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = (
+        'Быстро загружает данные из CSV-файлов static/data: читает файлы '
+        'потоком, проверяет ссылки по множествам загруженных id и вставляет '
+        'строки пачками (на PostgreSQL — через COPY).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=os.path.join(settings.BASE_DIR, 'static', 'data'),
+            help='Каталог с CSV-файлами.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Количество строк, вставляемых за один запрос.'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только прочитать и проверить файлы, ничего не записывая.'
+        )
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        self.dry_run = options['dry_run']
+        self.use_copy = connection.vendor == 'postgresql'
+        self.known_ids = {}
+        loaded = []
+        for source in SOURCES:
+            path = os.path.join(options['path'], source.filename)
+            if not os.path.exists(path):
+                self.stdout.write(f'{source.filename}: файл не найден')
+                continue
+            with transaction.atomic():
+                self.load(source, path)
+            loaded.append(source.model)
+        if self.dry_run or not loaded:
+            return
+        self.reset_sequences(loaded)
+        self.refresh_denormalized(loaded)
+
+    def get_known_ids(self, model):
+        if model not in self.known_ids:
+            self.known_ids[model] = set(
+                model.objects.values_list('pk', flat=True).iterator()
+            )
+        return self.known_ids[model]
+
+    def load(self, source, path):
+        model = source.model
+        relations = {
+            column: model._meta.get_field(name)
+            for column, name in source.relations.items()
+        }
+        known_ids = self.get_known_ids(model)
+        parent_ids = {
+            column: self.get_known_ids(field.related_model)
+            for column, field in relations.items()
+        }
+        started = time.monotonic()
+        total = skipped = 0
+        with preserve_auto_now_add(model), open(
+            path, encoding='utf-8', newline=''
+        ) as file:
+            rows = csv.DictReader(file)
+            while True:
+                chunk = list(islice(rows, self.batch_size))
+                if not chunk:
+                    break
+                batch = []
+                for row in chunk:
+                    instance = self.build(model, row, relations, parent_ids)
+                    if instance is None:
+                        skipped += 1
+                    else:
+                        batch.append(instance)
+                if batch and not self.dry_run:
+                    self.insert(model, batch)
+                known_ids.update(instance.pk for instance in batch)
+                total += len(batch)
+                elapsed = max(time.monotonic() - started, 1e-6)
+                self.stdout.write(
+                    f'{source.filename}: {total} строк '
+                    f'({total / elapsed:.0f} строк/с)'
+                )
+        action = 'проверено' if self.dry_run else 'загружено'
+        self.stdout.write(self.style.SUCCESS(
+            f'{source.filename}: {action} {total}, '
+            f'пропущено из-за неизвестных ссылок {skipped}'
+        ))
+
+    def build(self, model, row, relations, parent_ids):
+        values = {}
+        for column, raw in row.items():
+            field = relations.get(column)
+            if field is None:
+                field = model._meta.get_field(column)
+                values[field.attname] = field.to_python(raw)
+                continue
+            if raw == '':
+                if not field.null:
+                    return None
+                values[field.attname] = None
+                continue
+            value = field.target_field.to_python(raw)
+            if value not in parent_ids[column]:
+                return None
+            values[field.attname] = value
+        return model(**values)
+
+    def insert(self, model, batch):
+        if not self.use_copy:
+            model.objects.bulk_create(batch)
+            return
+        fields = model._meta.local_concrete_fields
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for instance in batch:
+            writer.writerow([
+                NULL if value is None else value
+                for value in (
+                    field.get_db_prep_save(
+                        field.pre_save(instance, True), connection
+                    )
+                    for field in fields
+                )
+            ])
+        buffer.seek(0)
+        columns = ', '.join(
+            connection.ops.quote_name(field.column) for field in fields
+        )
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {connection.ops.quote_name(model._meta.db_table)} '
+                f"({columns}) FROM STDIN WITH (FORMAT csv, NULL '{NULL}')",
+                buffer
+            )
+
+    def reset_sequences(self, models):
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+    def refresh_denormalized(self, models):
+        """
+        Вставка пачками обходит обработчики сигналов, поэтому рейтинги,
+        счётчики комментариев, отметки изменений, ленты активности и кеш
+        каталога обновляются после загрузки.
+        """
+        now = timezone.now()
+        if Review in models:
+            call_command('recalculate_ratings', stdout=io.StringIO())
+            Title.objects.filter(reviews__isnull=False).update(
+                reviews_modified=now
+            )
+        if Comment in models:
+            call_command('recount_comments', stdout=io.StringIO())
+            Review.objects.filter(comments__isnull=False).update(
+                comments_modified=now
+            )
+        if Review in models or Comment in models:
+            call_command('rebuild_activity', stdout=io.StringIO())
+        elif GenreTitle in models:
+            self.refresh_genre_feeds()
+        # Позиции в рейтингах зависят от года, категории и жанров
+        # произведений, даже если их оценки не изменились.
+        if {Title, GenreTitle, Review} & set(models):
+            call_command('rebuild_leaderboards', stdout=io.StringIO())
+        invalidate(*GROUPS)
+
+    def refresh_genre_feeds(self):
+        """
+        Ленты жанров произведений, у которых есть события.
+        """
+        title_ids = ActivityEvent.objects.order_by('title_id').values_list(
+            'title_id', flat=True
+        ).distinct().iterator()
+        while True:
+            chunk = list(islice(title_ids, self.batch_size))
+            if not chunk:
+                break
+            with transaction.atomic():
+                ActivityFeedEntry.objects.refresh_genres(chunk)
@@ -0,0 +1,121 @@
+import heapq
+from itertools import islice
+from operator import itemgetter
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from reviews.models import (ActivityEvent, ActivityFeedEntry, Comment,
+                            GenreTitle, Review)
+
+
+def lock_tables(*models):
+    """
+    Запрещает запись в таблицы до конца транзакции. SQLite запрещает
+    запись в БД другим соединениям с первой записи транзакции.
+    """
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('LOCK TABLE {} IN SHARE MODE'.format(', '.join(
+            connection.ops.quote_name(model._meta.db_table)
+            for model in models
+        )))
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересоздаёт ленты активности по отзывам и комментариям, например '
+        'после загрузки данных из CSV. На время пересоздания добавление '
+        'отзывов, комментариев и изменение жанров произведений ждут его '
+        'окончания.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Количество событий, добавляемых за один проход.'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        created = 0
+        # Ленты пересоздаются одной транзакцией: до её фиксации читатели
+        # видят прежние ленты, а отзывы и комментарии, добавляемые
+        # в это время, ждут её окончания и получают событие один раз.
+        with transaction.atomic():
+            lock_tables(Review, Comment, GenreTitle)
+            self.delete_events(chunk_size)
+            publications = heapq.merge(
+                self.get_reviews(chunk_size),
+                self.get_comments(chunk_size),
+                key=itemgetter(0)
+            )
+            while True:
+                chunk = list(islice(publications, chunk_size))
+                if not chunk:
+                    break
+                self.create_events(chunk)
+                created += len(chunk)
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано событий: {created}, записей в лентах: '
+            f'{ActivityFeedEntry.objects.count()}.'
+        ))
+
+    def delete_events(self, chunk_size):
+        ActivityFeedEntry.objects.all().delete()
+        while True:
+            ids = list(
+                ActivityEvent.objects.order_by().values_list(
+                    'pk', flat=True
+                )[:chunk_size]
+            )
+            if not ids:
+                break
+            ActivityEvent.objects.filter(pk__in=ids).delete()
+
+    def get_reviews(self, chunk_size):
+        for pub_date, title_id, review_id, author_id in (
+            Review.objects.order_by('pub_date', 'pk').values_list(
+                'pub_date', 'title_id', 'pk', 'author_id'
+            ).iterator(chunk_size=chunk_size)
+        ):
+            yield pub_date, title_id, review_id, None, author_id
+
+    def get_comments(self, chunk_size):
+        return Comment.objects.order_by('pub_date', 'pk').values_list(
+            'pub_date', 'review__title_id', 'review_id', 'pk', 'author_id'
+        ).iterator(chunk_size=chunk_size)
+
+    def create_events(self, chunk):
+        """
+        События добавляются в порядке публикации, чтобы порядок id
+        совпадал с порядком лент.
+        """
+        last_id = ActivityEvent.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first() or 0
+        events = ActivityEvent.objects.bulk_create(
+            ActivityEvent(
+                kind=(
+                    ActivityEvent.REVIEW if comment_id is None
+                    else ActivityEvent.COMMENT
+                ),
+                title_id=title_id,
+                review_id=review_id,
+                comment_id=comment_id,
+                author_id=author_id,
+                created=pub_date
+            )
+            for pub_date, title_id, review_id, comment_id, author_id in chunk
+        )
+        if not connection.features.can_return_ids_from_bulk_insert:
+            # SQLite не возвращает id добавленных строк. Другие события
+            # до конца транзакции не добавляются.
+            events = list(
+                ActivityEvent.objects.filter(pk__gt=last_id).only(
+                    'id', 'title_id', 'author_id'
+                )
+            )
+        ActivityFeedEntry.objects.fan_out(events)
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from reviews.models import LeaderboardEntry, Title
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересоздаёт рейтинги произведений по их текущим оценкам, например '
+        'после изменения LEADERBOARD_MIN_REVIEWS.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Количество произведений, обрабатываемых за один проход.'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        last_id = 0
+        processed = 0
+        while True:
+            title_ids = list(
+                Title.objects.filter(pk__gt=last_id)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:chunk_size]
+            )
+            if not title_ids:
+                break
+            last_id = title_ids[-1]
+            with transaction.atomic():
+                LeaderboardEntry.objects.refresh(title_ids)
+            processed += len(title_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано произведений: {processed}, записей в рейтингах: '
+            f'{LeaderboardEntry.objects.count()}.'
+        ))
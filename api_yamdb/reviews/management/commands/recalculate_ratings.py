@@ -0,0 +1,80 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+from reviews.models import LeaderboardEntry, Review, Title
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает сумму и количество оценок произведений по отзывам '
+        'и сообщает о найденных расхождениях.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Количество произведений, пересчитываемых за один проход.'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только сообщить о расхождениях, не исправляя их.'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        dry_run = options['dry_run']
+        last_id = 0
+        checked = drifted = 0
+        while True:
+            with transaction.atomic():
+                titles = list(
+                    Title.objects.select_for_update()
+                    .filter(pk__gt=last_id)
+                    .order_by('pk')
+                    .only('id', 'rating_sum', 'rating_count')[:chunk_size]
+                )
+                if not titles:
+                    break
+                last_id = titles[-1].pk
+                changed = self.recalculate_chunk(titles)
+                if changed and not dry_run:
+                    Title.objects.bulk_update(
+                        changed, ['rating_sum', 'rating_count']
+                    )
+                    LeaderboardEntry.objects.refresh(
+                        title.pk for title in changed
+                    )
+            checked += len(titles)
+            drifted += len(changed)
+        action = 'найдено' if dry_run else 'исправлено'
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено произведений: {checked}, '
+            f'{action} расхождений: {drifted}.'
+        ))
+
+    def recalculate_chunk(self, titles):
+        totals = {
+            row['title_id']: (row['score_sum'], row['score_count'])
+            for row in Review.objects.filter(
+                title_id__in=[title.pk for title in titles]
+            ).order_by().values('title_id').annotate(
+                score_sum=Sum('score'),
+                score_count=Count('id')
+            )
+        }
+        changed = []
+        for title in titles:
+            expected = totals.get(title.pk, (0, 0))
+            actual = (title.rating_sum, title.rating_count)
+            if actual == expected:
+                continue
+            self.stdout.write(
+                f'Произведение {title.pk}: сумма {actual[0]} -> '
+                f'{expected[0]}, количество {actual[1]} -> {expected[1]}'
+            )
+            title.rating_sum, title.rating_count = expected
+            changed.append(title)
+        return changed
@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from reviews.models import Comment, Review
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает количество комментариев к отзывам и сообщает '
+        'о найденных расхождениях.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Количество отзывов, пересчитываемых за один проход.'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только сообщить о расхождениях, не исправляя их.'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        dry_run = options['dry_run']
+        last_id = 0
+        checked = drifted = 0
+        while True:
+            with transaction.atomic():
+                reviews = list(
+                    Review.objects.select_for_update()
+                    .filter(pk__gt=last_id)
+                    .order_by('pk')
+                    .only('id', 'comments_count')[:chunk_size]
+                )
+                if not reviews:
+                    break
+                last_id = reviews[-1].pk
+                changed = self.recount_chunk(reviews)
+                if changed and not dry_run:
+                    Review.objects.bulk_update(changed, ['comments_count'])
+            checked += len(reviews)
+            drifted += len(changed)
+        action = 'найдено' if dry_run else 'исправлено'
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено отзывов: {checked}, {action} расхождений: {drifted}.'
+        ))
+
+    def recount_chunk(self, reviews):
+        totals = dict(
+            Comment.objects.filter(
+                review_id__in=[review.pk for review in reviews]
+            ).order_by().values('review_id').annotate(
+                total=Count('id')
+            ).values_list('review_id', 'total')
+        )
+        changed = []
+        for review in reviews:
+            expected = totals.get(review.pk, 0)
+            if review.comments_count == expected:
+                continue
+            self.stdout.write(
+                f'Отзыв {review.pk}: количество комментариев '
+                f'{review.comments_count} -> {expected}'
+            )
+            review.comments_count = expected
+            changed.append(review)
+        return changed
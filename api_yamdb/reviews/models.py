@@ -1,14 +1,100 @@
+import threading
+from contextlib import contextmanager
+
 from api.validators import username_validation
 from django.conf import settings
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import (Case, Count, ExpressionWrapper, F, FloatField,
+                              OuterRef, Q, Subquery, Sum, When)
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
+
+_deferred_counters = threading.local()
+
+
+def get_deferred_counters():
+    """
+    Id произведений и отзывов, счётчики которых пересчитываются в конце
+    текущего удаления, или None вне такого удаления.
+    """
+    return getattr(_deferred_counters, 'ids', None)
+
+
+@contextmanager
+def deferred_counters():
+    """
+    Удаление, которое каскадом удаляет много отзывов и комментариев.
+    Обработчики сигналов не меняют счётчики для каждой удаляемой строки,
+    а только запоминают затронутые произведения и отзывы. Их счётчики
+    пересчитываются после удаления одним запросом на таблицу.
+    """
+    if get_deferred_counters() is not None:
+        yield
+        return
+    ids = _deferred_counters.ids = {'titles': set(), 'reviews': set()}
+    try:
+        with transaction.atomic():
+            yield
+            recount_counters(ids['titles'], ids['reviews'])
+    finally:
+        _deferred_counters.ids = None
+
+
+def get_total(queryset, parent, aggregate):
+    return Coalesce(Subquery(
+        queryset.filter(**{parent: OuterRef('pk')}).order_by().values(
+            parent
+        ).annotate(total=aggregate).values('total')
+    ), 0)
+
+
+def recount_counters(title_ids, review_ids):
+    now = timezone.now()
+    if review_ids:
+        Review.objects.filter(pk__in=review_ids).update(
+            comments_count=get_total(Comment.objects, 'review', Count('pk')),
+            comments_modified=now
+        )
+        # Список отзывов содержит количество комментариев.
+        title_ids |= set(Review.objects.filter(
+            pk__in=review_ids
+        ).values_list('title_id', flat=True))
+    if title_ids:
+        Title.objects.filter(pk__in=title_ids).update(
+            rating_sum=get_total(Review.objects, 'title', Sum('score')),
+            rating_count=get_total(Review.objects, 'title', Count('pk')),
+            reviews_modified=now
+        )
+        LeaderboardEntry.objects.refresh(title_ids)
+
+
+class DeferredCountersQuerySet(models.QuerySet):
+    def delete(self):
+        with deferred_counters():
+            return super().delete()
+
+
+class DeferredCountersMixin:
+    """
+    Удаление записи, у которой есть отзывы или комментарии.
+    """
+    def delete(self, using=None, keep_parents=False):
+        with deferred_counters():
+            return super().delete(using, keep_parents)
+
 
+class DeferredCountersUserManager(
+    UserManager.from_queryset(DeferredCountersQuerySet)
+):
+    pass
 
-class User(AbstractUser):
+
+class User(DeferredCountersMixin, AbstractUser):
     """
     Модель пользователя.
-    Дополнительные поля: биография, роль, код подтверждения.
+    Дополнительные поля: биография, роль, версия токенов.
     Возможные роли: user, moderator, admin.
     Новым пользователям по умолчанию присваивается роль user.
     Суперпользователю присваивается роль admin.
@@ -50,11 +136,14 @@ class User(AbstractUser):
         verbose_name='Пароль',
         blank=True
     )
-    confirmation_code = models.CharField(
-        max_length=254,
-        blank=True
+    token_version = models.PositiveIntegerField(
+        verbose_name='Версия токенов',
+        default=0,
+        editable=False
     )
 
+    objects = DeferredCountersUserManager()
+
     def __str__(self):
         return self.username
 
@@ -89,7 +178,61 @@ class Genre(models.Model):
         return self.name
 
 
-class Title(models.Model):
+class CounterFieldsMixin:
+    """
+    Счётчики и отметки изменений меняются только запросами UPDATE
+    с выражениями F(), поэтому при сохранении экземпляра целиком они не
+    перезаписываются значениями, прочитанными до параллельных изменений.
+    Если строки в БД уже нет, экземпляр, как обычно, добавляется
+    запросом INSERT со всеми полями.
+    """
+    counter_fields = ()
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields,
+                   forced_update):
+        if update_fields is None:
+            values = [
+                value for value in values
+                if value[0].name not in self.counter_fields
+            ]
+        return super()._do_update(
+            base_qs, using, pk_val, values, update_fields, forced_update
+        )
+
+
+class TitleQuerySet(DeferredCountersQuerySet):
+    def with_relations(self):
+        """
+        Категория и жанры для вывода произведений.
+        """
+        return self.select_related('category').prefetch_related('genre')
+
+    def add_score(self, title_ids, score_delta, count_delta=0, **fields):
+        """
+        Атомарно изменяет сумму и количество оценок произведений
+        и их позиции в рейтингах. В том же запросе обновляются
+        переданные поля.
+        """
+        updated = self.filter(pk__in=title_ids).update(
+            rating_sum=F('rating_sum') + score_delta,
+            rating_count=F('rating_count') + count_delta,
+            **fields
+        )
+        if updated and (score_delta or count_delta):
+            LeaderboardEntry.objects.add_score(
+                title_ids, score_delta, count_delta
+            )
+        return updated
+
+
+class Title(DeferredCountersMixin, CounterFieldsMixin, models.Model):
+    """
+    Модель произведения.
+    Сумма и количество оценок хранятся в самой записи и обновляются
+    при изменении отзывов, чтобы не агрегировать отзывы при каждом чтении.
+    Каждый отзыв содержит ровно одну оценку, поэтому количество оценок
+    совпадает с количеством отзывов.
+    """
     name = models.TextField('Название', max_length=256)
     year = models.IntegerField('Год выпуска')
     description = models.TextField()
@@ -99,28 +242,103 @@ class Title(models.Model):
         blank=True,
         null=True,
         on_delete=models.SET_NULL,
-        related_name='category'
+        related_name='category',
+        db_index=False
+    )
+    rating_sum = models.PositiveIntegerField(
+        'Сумма оценок',
+        default=0,
+        editable=False
+    )
+    rating_count = models.PositiveIntegerField(
+        'Количество оценок',
+        default=0,
+        editable=False
     )
+    reviews_modified = models.DateTimeField(
+        'Последнее изменение отзывов',
+        null=True,
+        editable=False
+    )
+
+    objects = TitleQuerySet.as_manager()
+    counter_fields = ('rating_sum', 'rating_count', 'reviews_modified')
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        # Индексы повторяют сортировку списка произведений (name, id),
+        # поэтому фильтр по году или категории не требует сортировки.
+        indexes = [
+            models.Index(fields=['name', 'id'], name='title_name_idx'),
+            models.Index(
+                fields=['year', 'name', 'id'], name='title_year_name_idx'
+            ),
+            models.Index(
+                fields=['category', 'name', 'id'],
+                name='title_category_name_idx'
+            ),
+        ]
+
+    @property
+    def rating(self):
+        if not self.rating_count:
+            return None
+        return self.rating_sum // self.rating_count
+
+    @property
+    def reviews_count(self):
+        return self.rating_count
 
 
 class GenreTitle(models.Model):
-    genre_id = models.ForeignKey(Genre, on_delete=models.CASCADE)
-    title_id = models.ForeignKey(Title, on_delete=models.CASCADE)
+    genre_id = models.ForeignKey(
+        Genre, on_delete=models.CASCADE, db_index=False
+    )
+    title_id = models.ForeignKey(
+        Title, on_delete=models.CASCADE, db_index=False
+    )
+
+    class Meta:
+        # Покрывающие индексы для связей в обе стороны: выбор произведений
+        # жанра и загрузка жанров произведений читают только индекс.
+        indexes = [
+            models.Index(
+                fields=['genre_id', 'title_id'],
+                name='genretitle_genre_title_idx'
+            ),
+            models.Index(
+                fields=['title_id', 'genre_id'],
+                name='genretitle_title_genre_idx'
+            ),
+        ]
 
     def __str__(self):
         return f'{self.title_id.name} {self.genre_id.name}'
 
 
-class Review(models.Model):
+class ReviewQuerySet(DeferredCountersQuerySet):
+    def with_latest_comment(self):
+        """
+        Добавляет к отзывам id последнего комментария (latest_comment_id)
+        подзапросом по индексу comment_review_pub_date_idx.
+        """
+        return self.annotate(
+            latest_comment_id=Subquery(
+                Comment.objects.filter(review=OuterRef('pk')).order_by(
+                    '-pub_date', '-pk'
+                ).values('pk')[:1]
+            )
+        )
+
+
+class Review(DeferredCountersMixin, CounterFieldsMixin, models.Model):
     title = models.ForeignKey(
         Title,
         verbose_name='Произведение',
         on_delete=models.CASCADE,
-        related_name='reviews'
+        related_name='reviews',
+        db_index=False
     )
     text = models.TextField(
         verbose_name='Текст',
@@ -143,11 +361,34 @@ class Review(models.Model):
         auto_now_add=True,
         db_index=True
     )
+    comments_modified = models.DateTimeField(
+        verbose_name='Последнее изменение комментариев',
+        null=True,
+        editable=False
+    )
+    comments_count = models.PositiveIntegerField(
+        verbose_name='Количество комментариев',
+        default=0,
+        editable=False
+    )
+
+    objects = ReviewQuerySet.as_manager()
+    counter_fields = ('comments_count', 'comments_modified')
 
     class Meta:
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
         ordering = ['pub_date']
+        indexes = [
+            models.Index(
+                fields=['title', 'pub_date', 'id'],
+                name='review_title_pub_date_idx'
+            ),
+            models.Index(
+                fields=['title', 'score', 'pub_date', 'id'],
+                name='review_title_score_idx'
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['title', 'author'],
@@ -161,7 +402,8 @@ class Comment(models.Model):
         Review,
         verbose_name='Отзыв',
         on_delete=models.CASCADE,
-        related_name='comments'
+        related_name='comments',
+        db_index=False
     )
     text = models.TextField(
         verbose_name='Текст',
@@ -182,3 +424,338 @@ class Comment(models.Model):
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ['pub_date']
+        indexes = [
+            models.Index(
+                fields=['review', 'pub_date', 'id'],
+                name='comment_review_pub_date_idx'
+            ),
+        ]
+
+
+class LeaderboardQuerySet(models.QuerySet):
+    def add_score(self, title_ids, score_delta, count_delta=0):
+        """
+        Изменяет оценки произведений во всех рейтингах одним запросом.
+        Записи произведения, у которого их ещё нет, создаются заново.
+        """
+        rating_sum = F('rating_sum') + score_delta
+        rating_count = F('rating_count') + count_delta
+        updated = self.filter(title_id__in=title_ids).update(
+            rating_sum=rating_sum,
+            rating_count=rating_count,
+            rank=Case(
+                When(
+                    rating_count__gte=get_min_reviews() - count_delta,
+                    then=ExpressionWrapper(
+                        Cast(rating_sum, FloatField()) / rating_count,
+                        output_field=FloatField()
+                    )
+                ),
+                default=0.0,
+                output_field=FloatField()
+            )
+        )
+        if not updated:
+            self.refresh(title_ids)
+
+    def refresh(self, title_ids):
+        """
+        Пересоздаёт записи произведений во всех рейтингах по текущим
+        оценкам, году, категории и жанрам.
+        """
+        title_ids = list(title_ids)
+        self.filter(title_id__in=title_ids).delete()
+        titles = list(Title.objects.filter(
+            pk__in=title_ids, rating_count__gt=0
+        ).values_list('id', 'year', 'category_id', 'rating_sum',
+                      'rating_count'))
+        if not titles:
+            return
+        genres = get_title_genres([title[0] for title in titles])
+        self.bulk_create(
+            self.model(
+                title_id=title_id,
+                scope=scope,
+                scope_id=scope_id,
+                year=year,
+                rating_sum=rating_sum,
+                rating_count=rating_count,
+                rank=get_rank(rating_sum, rating_count)
+            )
+            for title_id, year, category_id, rating_sum, rating_count in titles
+            for scope, scope_id in get_scopes(
+                category_id, genres.get(title_id, ())
+            )
+        )
+
+    def delete_scope(self, scope, scope_id):
+        return self.filter(scope=scope, scope_id=scope_id).delete()
+
+    def top(self, scope, scope_id=0, limit=10, min_reviews=None,
+            year_from=None, year_to=None):
+        """
+        Лучшие произведения рейтинга. Записи читаются по индексу
+        leaderboard_rank_idx в порядке позиций, поэтому без фильтров
+        по годам чтение заканчивается после limit записей.
+        """
+        queryset = self.filter(scope=scope, scope_id=scope_id, rank__gt=0)
+        if min_reviews is not None:
+            queryset = queryset.filter(rating_count__gte=min_reviews)
+        if year_from is not None:
+            queryset = queryset.filter(year__gte=year_from)
+        if year_to is not None:
+            queryset = queryset.filter(year__lte=year_to)
+        return queryset.order_by('-rank', '-rating_count', 'title_id')[:limit]
+
+
+def get_min_reviews():
+    """
+    Наименьшее число отзывов для попадания в рейтинг. Произведения без
+    отзывов в рейтинг не попадают даже при LEADERBOARD_MIN_REVIEWS = 0,
+    иначе их средняя оценка делилась бы на ноль.
+    """
+    return max(settings.LEADERBOARD_MIN_REVIEWS, 1)
+
+
+def get_rank(rating_sum, rating_count):
+    if rating_count < get_min_reviews():
+        return 0.0
+    return rating_sum / rating_count
+
+
+def get_scopes(category_id, genre_ids):
+    yield LeaderboardEntry.SCOPE_ALL, 0
+    if category_id is not None:
+        yield LeaderboardEntry.SCOPE_CATEGORY, category_id
+    for genre_id in genre_ids:
+        yield LeaderboardEntry.SCOPE_GENRE, genre_id
+
+
+def get_title_genres(title_ids):
+    """
+    Словарь {id произведения: [id жанров]} по индексу
+    genretitle_title_genre_idx.
+    """
+    genres = {}
+    for title_id, genre_id in GenreTitle.objects.filter(
+        title_id__in=title_ids
+    ).values_list('title_id', 'genre_id'):
+        genres.setdefault(title_id, []).append(genre_id)
+    return genres
+
+
+class LeaderboardEntry(models.Model):
+    """
+    Позиция произведения в общем рейтинге и в рейтингах его категории
+    и жанров.
+    Записи обновляются вместе с оценками произведения, поэтому лучшие
+    произведения читаются по индексу без агрегации отзывов и сортировки.
+    Произведения, у которых меньше LEADERBOARD_MIN_REVIEWS отзывов,
+    получают rank 0 и в рейтинг не попадают.
+    """
+    SCOPE_ALL = 'all'
+    SCOPE_GENRE = 'genre'
+    SCOPE_CATEGORY = 'category'
+    SCOPE_CHOICES = (
+        (SCOPE_ALL, 'Все произведения'),
+        (SCOPE_GENRE, 'Жанр'),
+        (SCOPE_CATEGORY, 'Категория'),
+    )
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='leaderboard_entries',
+        db_index=False
+    )
+    scope = models.CharField(max_length=10, choices=SCOPE_CHOICES)
+    scope_id = models.PositiveIntegerField()
+    year = models.IntegerField()
+    rating_sum = models.PositiveIntegerField()
+    rating_count = models.PositiveIntegerField()
+    rank = models.FloatField()
+
+    objects = LeaderboardQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Позиция в рейтинге'
+        verbose_name_plural = 'Позиции в рейтингах'
+        indexes = [
+            models.Index(
+                fields=['scope', 'scope_id', '-rank', '-rating_count',
+                        'title'],
+                name='leaderboard_rank_idx'
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['title', 'scope', 'scope_id'],
+                name='unique_leaderboard_entry'
+            ),
+        ]
+
+
+class ActivityEventQuerySet(models.QuerySet):
+    def record(self, review, comment=None):
+        """
+        Добавляет событие о новом отзыве или комментарии и его записи
+        в ленты активности.
+        """
+        publication = review if comment is None else comment
+        event = self.create(
+            kind=(
+                ActivityEvent.REVIEW if comment is None
+                else ActivityEvent.COMMENT
+            ),
+            title_id=review.title_id,
+            review=review,
+            comment=comment,
+            author_id=publication.author_id,
+            created=publication.pub_date
+        )
+        ActivityFeedEntry.objects.fan_out([event])
+        return event
+
+
+class ActivityEvent(models.Model):
+    """
+    Событие ленты активности: новый отзыв или комментарий.
+    События только добавляются; вместе с отзывом, комментарием,
+    произведением или автором они удаляются каскадно.
+    """
+    REVIEW = 'review'
+    COMMENT = 'comment'
+    KIND_CHOICES = (
+        (REVIEW, 'Отзыв'),
+        (COMMENT, 'Комментарий'),
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    title = models.ForeignKey(
+        Title, on_delete=models.CASCADE, related_name='activity_events'
+    )
+    review = models.ForeignKey(
+        Review, on_delete=models.CASCADE, related_name='activity_events'
+    )
+    comment = models.ForeignKey(
+        Comment,
+        on_delete=models.CASCADE,
+        related_name='activity_events',
+        null=True,
+        db_index=False
+    )
+    author = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='activity_events'
+    )
+    created = models.DateTimeField()
+
+    objects = ActivityEventQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Событие'
+        verbose_name_plural = 'События'
+        # У отзыва и у комментария не больше одного события. Индекс
+        # событий комментариев используется и при их каскадном удалении.
+        constraints = [
+            models.UniqueConstraint(
+                fields=['review'],
+                condition=Q(comment__isnull=True),
+                name='unique_review_event'
+            ),
+            models.UniqueConstraint(
+                fields=['comment'],
+                condition=Q(comment__isnull=False),
+                name='unique_comment_event'
+            ),
+        ]
+
+
+class ActivityFeedQuerySet(models.QuerySet):
+    def fan_out(self, events):
+        """
+        Добавляет события в общую ленту и в ленты их произведений,
+        авторов и жанров произведений.
+        """
+        genres = get_title_genres({event.title_id for event in events})
+        self.bulk_create(
+            self.model(scope=scope, scope_id=scope_id, event_id=event.pk)
+            for event in events
+            for scope, scope_id in get_feed_scopes(
+                event, genres.get(event.title_id, ())
+            )
+        )
+
+    def refresh_genres(self, title_ids):
+        """
+        Пересоздаёт записи событий произведений в лентах жанров.
+        """
+        title_ids = list(title_ids)
+        events = ActivityEvent.objects.filter(title_id__in=title_ids)
+        self.filter(
+            scope=ActivityFeedEntry.SCOPE_GENRE, event__in=events
+        ).delete()
+        genres = get_title_genres(title_ids)
+        self.bulk_create(
+            self.model(
+                scope=ActivityFeedEntry.SCOPE_GENRE,
+                scope_id=genre_id,
+                event_id=event_id
+            )
+            for event_id, title_id in events.values_list('pk', 'title_id')
+            for genre_id in genres.get(title_id, ())
+        )
+
+    def delete_scope(self, scope, scope_id):
+        return self.filter(scope=scope, scope_id=scope_id).delete()
+
+    def feed(self, scope, scope_id=0):
+        """
+        Записи ленты вместе с событиями. Порядок задаёт пагинатор:
+        по индексу activity_feed_idx лента читается без сортировки.
+        """
+        return self.filter(scope=scope, scope_id=scope_id).select_related(
+            'event__title', 'event__review', 'event__comment',
+            'event__author'
+        )
+
+
+def get_feed_scopes(event, genre_ids):
+    yield ActivityFeedEntry.SCOPE_ALL, 0
+    yield ActivityFeedEntry.SCOPE_TITLE, event.title_id
+    yield ActivityFeedEntry.SCOPE_USER, event.author_id
+    for genre_id in genre_ids:
+        yield ActivityFeedEntry.SCOPE_GENRE, genre_id
+
+
+class ActivityFeedEntry(models.Model):
+    """
+    Событие в общей ленте активности и в лентах произведения, жанра
+    и автора.
+    Записи добавляются вместе с событием, поэтому ленты читаются по
+    индексу без объединения отзывов и комментариев и без сортировки.
+    """
+    SCOPE_ALL = 'all'
+    SCOPE_TITLE = 'title'
+    SCOPE_GENRE = 'genre'
+    SCOPE_USER = 'user'
+    SCOPE_CHOICES = (
+        (SCOPE_ALL, 'Все события'),
+        (SCOPE_TITLE, 'Произведение'),
+        (SCOPE_GENRE, 'Жанр'),
+        (SCOPE_USER, 'Автор'),
+    )
+    scope = models.CharField(max_length=10, choices=SCOPE_CHOICES)
+    scope_id = models.PositiveIntegerField()
+    event = models.ForeignKey(
+        ActivityEvent, on_delete=models.CASCADE, related_name='feed_entries'
+    )
+
+    objects = ActivityFeedQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи лент'
+        indexes = [
+            models.Index(
+                fields=['scope', 'scope_id', '-event'],
+                name='activity_feed_idx'
+            ),
+        ]
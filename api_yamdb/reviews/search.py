@@ -0,0 +1,150 @@
+"""
+Полнотекстовый поиск произведений.
+
+На PostgreSQL поиск идёт по GIN-индексам по выражению to_tsvector
+и по триграммам названия, на SQLite — по виртуальной таблице FTS5,
+которую поддерживают в актуальном состоянии триггеры. Индексы и таблица
+создаются после применения миграций, повторный запуск ничего не меняет.
+"""
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from .models import Title
+
+TITLE_TABLE = Title._meta.db_table
+FTS_TABLE = f'{TITLE_TABLE}_fts'
+TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def get_search_config():
+    config = getattr(settings, 'TITLE_SEARCH_CONFIG', 'russian')
+    if not re.fullmatch(r'\w+', config):
+        raise ValueError(f'Недопустимая конфигурация поиска: {config}')
+    return config
+
+
+def get_postgresql_document(with_description, prefix=''):
+    columns = f'{prefix}name'
+    if with_description:
+        columns += f" || ' ' || {prefix}description"
+    return f"to_tsvector('{get_search_config()}', {columns})"
+
+
+def create_postgresql_indexes(cursor):
+    cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, expression in (
+        ('name_fts', get_postgresql_document(with_description=False)),
+        ('text_fts', get_postgresql_document(with_description=True)),
+        ('name_trgm', 'name gin_trgm_ops'),
+    ):
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS {TITLE_TABLE}_{name} '
+            f'ON {TITLE_TABLE} USING gin ({expression})'
+        )
+
+
+def create_sqlite_index(cursor):
+    cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+        [FTS_TABLE]
+    )
+    exists = cursor.fetchone() is not None
+    cursor.execute(
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+        f"name, description, content='{TITLE_TABLE}', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2')"
+    )
+    delete_row = (
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description) "
+        "VALUES ('delete', old.id, old.name, old.description);"
+    )
+    insert_row = (
+        f'INSERT INTO {FTS_TABLE}(rowid, name, description) '
+        'VALUES (new.id, new.name, new.description);'
+    )
+    for suffix, event, body in (
+        ('ai', 'INSERT', insert_row),
+        ('ad', 'DELETE', delete_row),
+        ('au', 'UPDATE OF name, description', delete_row + insert_row),
+    ):
+        cursor.execute(
+            f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_{suffix} '
+            f'AFTER {event} ON {TITLE_TABLE} BEGIN {body} END'
+        )
+    if not exists:
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+        )
+
+
+def create_search_index(using='default', **kwargs):
+    """
+    Создаёт индексы полнотекстового поиска для текущей СУБД.
+    Подключается к сигналу post_migrate.
+    """
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            create_postgresql_indexes(cursor)
+        elif connection.vendor == 'sqlite':
+            create_sqlite_index(cursor)
+
+
+def get_sqlite_match(words, with_description):
+    terms = [f'"{word}"*' for word in words]
+    if not with_description:
+        terms = [f'name : {term}' for term in terms]
+    return ' AND '.join(terms)
+
+
+def search_titles(queryset, query, with_description=False):
+    """
+    Отбирает произведения, подходящие под поисковый запрос, и сортирует
+    их по релевантности.
+    """
+    words = TOKEN_PATTERN.findall(query)
+    if not words:
+        return queryset.none()
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        document = get_postgresql_document(
+            with_description, prefix=f'{TITLE_TABLE}.'
+        )
+        tsquery = f"plainto_tsquery('{get_search_config()}', %s)"
+        pattern = '%{}%'.format(re.sub(r'([\\%_])', r'\\\1', query))
+        queryset = queryset.extra(
+            where=[
+                f'{document} @@ {tsquery} '
+                f'OR {TITLE_TABLE}.name ILIKE %s'
+            ],
+            params=(query, pattern)
+        ).annotate(search_rank=RawSQL(
+            f'ts_rank({document}, {tsquery}) '
+            f'+ similarity({TITLE_TABLE}.name, %s)',
+            (query, query),
+            output_field=FloatField()
+        ))
+    elif vendor == 'sqlite':
+        match = get_sqlite_match(words, with_description)
+        queryset = queryset.extra(
+            where=[
+                f'{TITLE_TABLE}.id IN (SELECT rowid FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s)'
+            ],
+            params=(match,)
+        ).annotate(search_rank=RawSQL(
+            f'SELECT -bm25({FTS_TABLE}, 10.0, 1.0) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = {TITLE_TABLE}.id',
+            (match,),
+            output_field=FloatField()
+        ))
+    else:
+        condition = Q(name__icontains=query)
+        if with_description:
+            condition |= Q(description__icontains=query)
+        return queryset.filter(condition)
+    return queryset.order_by('-search_rank', 'name', 'id')
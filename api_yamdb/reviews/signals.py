@@ -0,0 +1,273 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+from django.utils import timezone
+
+from .models import (ActivityEvent, ActivityFeedEntry, Category, Comment,
+                     Genre, LeaderboardEntry, Review, Title, User,
+                     get_deferred_counters)
+
+# Оценки и количество отзывов произведений, количество комментариев
+# к отзывам и отметки изменения списков обновляются обработчиками
+# сигналов, поэтому счётчики остаются верными при записи через API,
+# админку и при каскадном удалении. Изменения выполняются относительно
+# значения в БД выражениями F(), а строка, которую изменяют или удаляют,
+# блокируется до конца транзакции, чтобы параллельные записи не
+# учитывали одно изменение дважды. При удалении произведения, отзыва или
+# пользователя счётчики затронутых записей пересчитываются один раз
+# после удаления (см. deferred_counters). Отметки изменения списков
+# обновляются и при изменении выводимых в списках названия произведения,
+# текста отзыва и имени автора.
+
+
+def get_saved(model, pk, *fields):
+    """
+    Значения полей записи в БД или None, если записи уже нет.
+    """
+    queryset = model.objects.filter(pk=pk)
+    if transaction.get_connection().in_atomic_block:
+        queryset = queryset.select_for_update()
+    return queryset.values_list(*fields).first()
+
+
+def update_title(title_id, score_delta=0, count_delta=0):
+    Title.objects.add_score(
+        [title_id], score_delta, count_delta, reviews_modified=timezone.now()
+    )
+
+
+def update_review(review_id, count_delta=0, title_id=None):
+    """
+    Без title_id произведение отзыва находится подзапросом.
+    """
+    now = timezone.now()
+    Review.objects.filter(pk=review_id).update(
+        comments_count=F('comments_count') + count_delta,
+        comments_modified=now
+    )
+    if title_id is None:
+        title_id = Review.objects.filter(pk=review_id).values('title_id')
+    else:
+        title_id = [title_id]
+    # Список отзывов содержит количество комментариев.
+    Title.objects.filter(pk__in=title_id).update(reviews_modified=now)
+
+
+def get_review_title_id(comment):
+    """
+    Произведение отзыва, уже загруженного вместе с комментарием.
+    """
+    if not Comment.review.is_cached(comment):
+        return None
+    review = comment.review
+    # После присваивания review_id в кеше может остаться прежний отзыв.
+    return review.title_id if review.pk == comment.review_id else None
+
+
+def remember_review(sender, instance, raw=False, **kwargs):
+    instance._saved_rating = None
+    if not raw and not instance._state.adding:
+        instance._saved_rating = get_saved(
+            Review, instance.pk, 'title_id', 'score', 'text'
+        )
+
+
+def remember_deleted_review(sender, instance, **kwargs):
+    deferred = get_deferred_counters()
+    if deferred is None:
+        remember_review(sender, instance)
+    else:
+        instance._saved_rating = None
+        deferred['titles'].add(instance.title_id)
+
+
+def count_review(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    saved = instance._saved_rating
+    if created:
+        update_title(instance.title_id, instance.score, 1)
+    elif saved is None:
+        update_title(instance.title_id)
+    elif saved[0] != instance.title_id:
+        update_title(saved[0], -saved[1], -1)
+        update_title(instance.title_id, instance.score, 1)
+    else:
+        update_title(instance.title_id, instance.score - saved[1])
+    if saved is not None and saved[2] != instance.text:
+        # Комментарии выводятся с текстом своего отзыва.
+        Review.objects.filter(pk=instance.pk).update(
+            comments_modified=timezone.now()
+        )
+
+
+def uncount_review(sender, instance, **kwargs):
+    """
+    Оценка вычитается, только если запись удалил этот запрос.
+    """
+    saved = instance._saved_rating
+    if saved is not None:
+        update_title(saved[0], -saved[1], -1)
+
+
+def remember_comment(sender, instance, raw=False, **kwargs):
+    instance._saved_review = None
+    if not raw and not instance._state.adding:
+        instance._saved_review = get_saved(Comment, instance.pk, 'review_id')
+
+
+def remember_deleted_comment(sender, instance, **kwargs):
+    deferred = get_deferred_counters()
+    if deferred is None:
+        remember_comment(sender, instance)
+    else:
+        instance._saved_review = None
+        deferred['reviews'].add(instance.review_id)
+
+
+def count_comment(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    saved = instance._saved_review
+    title_id = get_review_title_id(instance)
+    if created:
+        update_review(instance.review_id, 1, title_id)
+    elif saved is not None and saved[0] != instance.review_id:
+        update_review(saved[0], -1)
+        update_review(instance.review_id, 1, title_id)
+    else:
+        update_review(instance.review_id, title_id=title_id)
+
+
+def uncount_comment(sender, instance, **kwargs):
+    saved = instance._saved_review
+    if saved is not None:
+        update_review(saved[0], -1)
+
+
+def remember_title(sender, instance, raw=False, **kwargs):
+    instance._saved_name = None
+    if not raw and not instance._state.adding:
+        instance._saved_name = get_saved(Title, instance.pk, 'name')
+
+
+def touch_renamed_title(sender, instance, created, raw, **kwargs):
+    """
+    Отзывы выводятся с названием произведения.
+    """
+    saved = getattr(instance, '_saved_name', None)
+    if saved is not None and saved[0] != instance.name:
+        Title.objects.filter(pk=instance.pk).update(
+            reviews_modified=timezone.now()
+        )
+
+
+def remember_username(sender, instance, raw=False, **kwargs):
+    instance._saved_username = None
+    if not raw and not instance._state.adding:
+        instance._saved_username = get_saved(User, instance.pk, 'username')
+
+
+def touch_renamed_user(sender, instance, created, raw, **kwargs):
+    """
+    Отзывы и комментарии выводятся с именем автора.
+    """
+    saved = getattr(instance, '_saved_username', None)
+    if saved is None or saved[0] == instance.username:
+        return
+    now = timezone.now()
+    Title.objects.filter(pk__in=Review.objects.filter(
+        author=instance
+    ).values('title_id')).update(reviews_modified=now)
+    Review.objects.filter(pk__in=Comment.objects.filter(
+        author=instance
+    ).values('review_id')).update(comments_modified=now)
+
+
+def refresh_title_leaderboards(sender, instance, created, raw, **kwargs):
+    """
+    Год и категория изменённого произведения переносятся в рейтинги.
+    У нового произведения ещё нет оценок, и в рейтинги оно не попадает.
+    """
+    if not created and not raw:
+        LeaderboardEntry.objects.refresh([instance.pk])
+
+
+def refresh_genre_leaderboards(sender, instance, action, reverse, pk_set,
+                               **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        LeaderboardEntry.objects.refresh([instance.pk])
+    elif action == 'post_clear':
+        LeaderboardEntry.objects.delete_scope(
+            LeaderboardEntry.SCOPE_GENRE, instance.pk
+        )
+    else:
+        LeaderboardEntry.objects.refresh(pk_set)
+
+
+def delete_genre_leaderboard(sender, instance, **kwargs):
+    LeaderboardEntry.objects.delete_scope(
+        LeaderboardEntry.SCOPE_GENRE, instance.pk
+    )
+
+
+def delete_category_leaderboard(sender, instance, **kwargs):
+    LeaderboardEntry.objects.delete_scope(
+        LeaderboardEntry.SCOPE_CATEGORY, instance.pk
+    )
+
+
+def record_review_activity(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        ActivityEvent.objects.record(instance)
+
+
+def record_comment_activity(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        ActivityEvent.objects.record(instance.review, instance)
+
+
+def refresh_genre_activity(sender, instance, action, reverse, pk_set,
+                           **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        ActivityFeedEntry.objects.refresh_genres([instance.pk])
+    elif action == 'post_clear':
+        ActivityFeedEntry.objects.delete_scope(
+            ActivityFeedEntry.SCOPE_GENRE, instance.pk
+        )
+    else:
+        ActivityFeedEntry.objects.refresh_genres(pk_set)
+
+
+def delete_genre_activity(sender, instance, **kwargs):
+    ActivityFeedEntry.objects.delete_scope(
+        ActivityFeedEntry.SCOPE_GENRE, instance.pk
+    )
+
+
+def connect_signals():
+    pre_save.connect(remember_review, sender=Review)
+    pre_delete.connect(remember_deleted_review, sender=Review)
+    pre_save.connect(remember_comment, sender=Comment)
+    pre_delete.connect(remember_deleted_comment, sender=Comment)
+    post_save.connect(count_review, sender=Review)
+    post_delete.connect(uncount_review, sender=Review)
+    post_save.connect(count_comment, sender=Comment)
+    post_delete.connect(uncount_comment, sender=Comment)
+    pre_save.connect(remember_title, sender=Title)
+    post_save.connect(touch_renamed_title, sender=Title)
+    pre_save.connect(remember_username, sender=User)
+    post_save.connect(touch_renamed_user, sender=User)
+    post_save.connect(refresh_title_leaderboards, sender=Title)
+    m2m_changed.connect(refresh_genre_leaderboards, sender=Title.genre.through)
+    post_delete.connect(delete_genre_leaderboard, sender=Genre)
+    post_delete.connect(delete_category_leaderboard, sender=Category)
+    post_save.connect(record_review_activity, sender=Review)
+    post_save.connect(record_comment_activity, sender=Comment)
+    m2m_changed.connect(refresh_genre_activity, sender=Title.genre.through)
+    post_delete.connect(delete_genre_activity, sender=Genre)
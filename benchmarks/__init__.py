@@ -0,0 +1,5 @@
+"""
+Нагрузочные замеры API на синтетических данных.
+
+Запуск из корня репозитория: python -m benchmarks --help
+"""
@@ -0,0 +1,110 @@
+import argparse
+import json
+import sys
+
+from . import environment
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description=(
+            'Замер задержек и количества SQL-запросов основных эндпоинтов '
+            'на синтетических данных в SQLite.'
+        )
+    )
+    parser.add_argument(
+        '--scale', type=float, default=1,
+        help='Множитель размера набора данных.'
+    )
+    parser.add_argument(
+        '--seed', type=int, default=42,
+        help='Зерно генератора данных.'
+    )
+    parser.add_argument(
+        '--iterations', type=int, default=200,
+        help='Количество замеряемых запросов в каждом сценарии.'
+    )
+    parser.add_argument(
+        '--warmup', type=int, default=10,
+        help='Количество запросов прогрева перед замером.'
+    )
+    parser.add_argument(
+        '--scenario', action='append', dest='scenarios',
+        help='Запустить только указанный сценарий (можно повторять).'
+    )
+    parser.add_argument(
+        '--database', default=':memory:',
+        help='Файл SQLite; по умолчанию БД в памяти.'
+    )
+    parser.add_argument(
+        '--no-cache', action='store_true',
+        help='Выключить кеш каталога.'
+    )
+    parser.add_argument(
+        '--serialization', action='store_true',
+        help=(
+            'Добавить в отчёт процессорное время сборки списков '
+            'сериализаторами и функциями api.projections на 1000 записей.'
+        )
+    )
+    parser.add_argument(
+        '--connections', action='store_true',
+        help=(
+            'Добавить в отчёт задержку запроса с новым соединением к БД '
+            'и с соединением из пула.'
+        )
+    )
+    parser.add_argument(
+        '--output', help='Файл для JSON-отчёта; по умолчанию stdout.'
+    )
+    parser.add_argument(
+        '--baseline', help='Прошлый отчёт для сравнения.'
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    environment.setup(args.database, cache=not args.no_cache)
+
+    from .dataset import generate
+    from .runner import compare, run
+    from .scenarios import SCENARIOS
+
+    names = args.scenarios or list(SCENARIOS)
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        sys.exit(f'Неизвестные сценарии: {", ".join(sorted(unknown))}')
+    dataset = generate(args.scale, args.seed)
+    report = run(
+        [SCENARIOS[name] for name in names],
+        dataset,
+        args.iterations,
+        args.warmup
+    )
+    if args.serialization:
+        from .serialization import run as run_serialization
+
+        report['serialization'] = run_serialization()
+    if args.connections:
+        from .connections import run as run_connections
+
+        report['connections'] = run_connections(
+            args.iterations, args.warmup
+        )
+    content = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(content + '\n')
+    else:
+        print(content)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+        for line in compare(report, baseline):
+            print(line, file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Задержка запроса с новым соединением к БД и с соединением из пула.
+
+Каждый запрос завершается закрытием соединения, как при CONN_MAX_AGE = 0
+в конце запроса gunicorn: без пула соединение закрывается, с пулом
+возвращается в пул. Данные копируются из текущей БД в файл SQLite,
+кеш каталога на время замера выключается, чтобы запрос доходил до БД.
+Для SQLite установка соединения дешевле, чем для PostgreSQL по сети,
+поэтому экономия здесь — нижняя оценка.
+"""
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+from .runner import percentile
+
+URL = '/api/v1/categories/'
+MODES = {
+    'reconnect': None,
+    'pool': {'MAX_SIZE': 1},
+}
+
+
+def copy_database(path):
+    import sqlite3
+
+    from django.db import connection
+
+    connection.ensure_connection()
+    target = sqlite3.connect(path)
+    try:
+        connection.connection.backup(target)
+    finally:
+        target.close()
+
+
+@contextmanager
+def use_connection(path, pool):
+    from django.db import connections
+    from django.db.utils import ConnectionHandler
+
+    from api_yamdb.db.pool import close_pools
+
+    original = connections['default']
+    handler = ConnectionHandler({'default': {
+        'ENGINE': 'api_yamdb.db.sqlite3',
+        'NAME': path,
+        'POOL': pool,
+    }})
+    connections['default'] = handler['default']
+    try:
+        yield handler['default']
+    finally:
+        handler['default'].close()
+        close_pools()
+        connections['default'] = original
+
+
+def measure(connection, client, iterations, warmup):
+    durations = []
+    for index in range(warmup + iterations):
+        started = time.perf_counter()
+        response = client.get(URL)
+        connection.close()
+        if index >= warmup:
+            durations.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.status_code
+    durations.sort()
+    return {
+        'p50_ms': round(percentile(durations, 0.50), 3),
+        'p95_ms': round(percentile(durations, 0.95), 3),
+        'mean_ms': round(sum(durations) / iterations, 3),
+    }
+
+
+def run(iterations=200, warmup=10):
+    """
+    Задержки в обоих режимах и экономия на запрос в мс.
+    """
+    from django.conf import settings
+    from rest_framework.test import APIClient
+
+    catalog_cache = settings.CATALOG_CACHE
+    settings.CATALOG_CACHE = dict(catalog_cache, ENABLED=False)
+    client = APIClient()
+    report = {'url': URL}
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'db.sqlite3')
+            copy_database(path)
+            for mode, pool in MODES.items():
+                with use_connection(path, pool) as connection:
+                    report[mode] = measure(
+                        connection, client, iterations, warmup
+                    )
+    finally:
+        settings.CATALOG_CACHE = catalog_cache
+    report['saved_ms_per_request'] = round(
+        report['reconnect']['mean_ms'] - report['pool']['mean_ms'], 3
+    )
+    return report
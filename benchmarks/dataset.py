@@ -0,0 +1,169 @@
+"""
+Генератор воспроизводимого набора данных заданного масштаба.
+
+При одинаковых scale и seed генерируются одинаковые записи. Все записи
+вставляются пачками с явными id, рейтинги и счётчики комментариев
+пересчитываются после вставки.
+"""
+import random
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+
+# Количество записей при scale=1.
+BASE_SIZES = {
+    'users': 200,
+    'categories': 10,
+    'genres': 30,
+    'titles': 1000,
+    'reviews': 5000,
+    'comments': 10000,
+}
+MAX_GENRES_PER_TITLE = 3
+START_DATE = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+Dataset = namedtuple('Dataset', ('scale', 'seed', 'counts'))
+
+
+def get_sizes(scale):
+    return {
+        name: max(1, int(size * scale)) for name, size in BASE_SIZES.items()
+    }
+
+
+def insert(model, objects):
+    # Размер пачки подбирает бэкенд: в Django 2.2 явный batch_size не
+    # ограничивается лимитами SQLite.
+    model.objects.bulk_create(objects)
+    return len(objects)
+
+
+def make_users(sizes):
+    from reviews.models import User
+
+    return [
+        User(
+            id=index,
+            username=f'user{index}',
+            email=f'user{index}@yamdb.fake',
+            role=User.USER_ROLE
+        )
+        for index in range(1, sizes['users'] + 1)
+    ]
+
+
+def make_titles(sizes, rand):
+    from reviews.models import Title
+
+    return [
+        Title(
+            id=index,
+            name=f'Произведение {index}',
+            year=rand.randint(1950, 2022),
+            description=f'Описание произведения {index}',
+            category_id=rand.randint(1, sizes['categories'])
+        )
+        for index in range(1, sizes['titles'] + 1)
+    ]
+
+
+def make_genre_links(sizes, rand):
+    from reviews.models import GenreTitle
+
+    links = []
+    genre_ids = range(1, sizes['genres'] + 1)
+    for title_id in range(1, sizes['titles'] + 1):
+        count = rand.randint(1, min(MAX_GENRES_PER_TITLE, sizes['genres']))
+        for genre_id in rand.sample(genre_ids, count):
+            links.append(GenreTitle(
+                id=len(links) + 1, title_id_id=title_id, genre_id_id=genre_id
+            ))
+    return links
+
+
+def make_reviews(sizes, rand):
+    """
+    Отзывы от случайных авторов; пара произведение-автор не повторяется.
+    """
+    from reviews.models import Review
+
+    limit = min(sizes['reviews'], sizes['titles'] * sizes['users'])
+    pairs = set()
+    while len(pairs) < limit:
+        pairs.add((
+            rand.randint(1, sizes['titles']), rand.randint(1, sizes['users'])
+        ))
+    return [
+        Review(
+            id=index,
+            title_id=title_id,
+            author_id=author_id,
+            text=f'Отзыв {index}',
+            score=rand.randint(1, 10),
+            pub_date=START_DATE + timedelta(minutes=index)
+        )
+        for index, (title_id, author_id) in enumerate(sorted(pairs), 1)
+    ]
+
+
+def make_comments(sizes, rand, reviews_count):
+    from reviews.models import Comment
+
+    return [
+        Comment(
+            id=index,
+            review_id=rand.randint(1, reviews_count),
+            author_id=rand.randint(1, sizes['users']),
+            text=f'Комментарий {index}',
+            pub_date=START_DATE + timedelta(minutes=index)
+        )
+        for index in range(1, sizes['comments'] + 1)
+    ]
+
+
+def generate(scale=1, seed=42):
+    """
+    Наполняет пустую БД и возвращает количество созданных записей.
+    """
+    from django.core.management import call_command
+    from django.core.management.color import no_style
+    from django.db import connection, transaction
+    from reviews.management.commands.load_csv import preserve_auto_now_add
+    from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                                Title, User)
+
+    rand = random.Random(seed)
+    sizes = get_sizes(scale)
+    counts = {}
+    with transaction.atomic():
+        counts['users'] = insert(User, make_users(sizes))
+        counts['categories'] = insert(Category, [
+            Category(id=index, name=f'Категория {index}',
+                     slug=f'category{index}')
+            for index in range(1, sizes['categories'] + 1)
+        ])
+        counts['genres'] = insert(Genre, [
+            Genre(id=index, name=f'Жанр {index}', slug=f'genre{index}')
+            for index in range(1, sizes['genres'] + 1)
+        ])
+        counts['titles'] = insert(Title, make_titles(sizes, rand))
+        counts['genre_links'] = insert(
+            GenreTitle, make_genre_links(sizes, rand)
+        )
+        with preserve_auto_now_add(Review):
+            counts['reviews'] = insert(Review, make_reviews(sizes, rand))
+        with preserve_auto_now_add(Comment):
+            counts['comments'] = insert(
+                Comment, make_comments(sizes, rand, counts['reviews'])
+            )
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [User, Category, Genre, Title, GenreTitle, Review,
+                         Comment]
+        )
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+    call_command('recalculate_ratings', stdout=StringIO())
+    call_command('recount_comments', stdout=StringIO())
+    call_command('rebuild_activity', stdout=StringIO())
+    return Dataset(scale, seed, counts)
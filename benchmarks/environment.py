@@ -0,0 +1,44 @@
+import os
+import sys
+
+import django
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_DIR = os.path.join(ROOT_DIR, 'api_yamdb')
+
+
+class DisableMigrations(dict):
+    """
+    Миграции в репозитории не хранятся, таблицы создаются по моделям.
+    """
+    def __contains__(self, item):
+        return True
+
+    def __getitem__(self, item):
+        return None
+
+
+def setup(database=':memory:', cache=True):
+    """
+    Настраивает Django на SQLite без внешних сервисов и создаёт таблицы.
+    """
+    if PROJECT_DIR not in sys.path:
+        sys.path.insert(0, PROJECT_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+    from django.conf import settings
+
+    settings.DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': database,
+    }
+    settings.MIGRATION_MODULES = DisableMigrations()
+    settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+    settings.CATALOG_CACHE = dict(settings.CATALOG_CACHE, ENABLED=cache)
+    # Сценарии регистрации и получения токена шлют сотни запросов с одного
+    # адреса, лимиты частоты исказили бы замер.
+    settings.AUTH_THROTTLE = dict(settings.AUTH_THROTTLE, ENABLED=False)
+    django.setup()
+
+    from django.core.management import call_command
+
+    call_command('migrate', run_syncdb=True, verbosity=0)
@@ -0,0 +1,116 @@
+"""
+Прогон сценариев и сборка отчёта.
+"""
+import math
+import platform
+import subprocess
+import time
+
+from .environment import ROOT_DIR
+
+
+def percentile(values, fraction):
+    """
+    Процентиль по методу ближайшего ранга для отсортированного списка.
+    """
+    if not values:
+        return None
+    rank = max(1, math.ceil(fraction * len(values)))
+    return values[rank - 1]
+
+
+class QueryCounter:
+    """
+    Считает SQL-запросы через execute_wrapper без сохранения их текста.
+    """
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def perform(call):
+    kwargs = {} if call.method == 'get' else {'format': 'json'}
+    return getattr(call.client, call.method)(call.url, call.data, **kwargs)
+
+
+def run_scenario(scenario, dataset, iterations, warmup=10):
+    from django.db import connection
+
+    state = scenario.setup(dataset, warmup + iterations)
+    for index in range(warmup):
+        perform(scenario.request(state, index))
+    durations = []
+    errors = 0
+    counter = QueryCounter()
+    started = time.perf_counter()
+    with connection.execute_wrapper(counter):
+        for index in range(warmup, warmup + iterations):
+            call = scenario.request(state, index)
+            request_started = time.perf_counter()
+            response = perform(call)
+            durations.append((time.perf_counter() - request_started) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+    elapsed = time.perf_counter() - started
+    durations.sort()
+    return {
+        'requests': iterations,
+        'errors': errors,
+        'p50_ms': round(percentile(durations, 0.50), 3),
+        'p95_ms': round(percentile(durations, 0.95), 3),
+        'p99_ms': round(percentile(durations, 0.99), 3),
+        'mean_ms': round(sum(durations) / iterations, 3),
+        'throughput_rps': round(iterations / elapsed, 1),
+        'queries_per_request': round(counter.count / iterations, 2),
+    }
+
+
+def get_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=ROOT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(scenarios, dataset, iterations, warmup=10):
+    import django
+
+    return {
+        'commit': get_commit(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'scale': dataset.scale,
+        'seed': dataset.seed,
+        'dataset': dataset.counts,
+        'iterations': iterations,
+        'scenarios': {
+            scenario.name: run_scenario(
+                scenario, dataset, iterations, warmup
+            )
+            for scenario in scenarios
+        },
+    }
+
+
+def compare(report, baseline):
+    """
+    Изменение p50, p95 и количества запросов относительно прошлого отчёта.
+    """
+    lines = []
+    for name, result in report['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if previous is None:
+            continue
+        changes = []
+        for metric in ('p50_ms', 'p95_ms', 'queries_per_request'):
+            if previous[metric]:
+                change = (result[metric] / previous[metric] - 1) * 100
+                changes.append(f'{metric} {change:+.1f}%')
+        lines.append(f'{name}: ' + ', '.join(changes))
+    return lines
@@ -0,0 +1,223 @@
+"""
+Сценарии нагрузки на основные эндпоинты.
+
+setup(dataset, iterations) готовит данные вне замера, request(state, index)
+возвращает клиент и параметры одного запроса.
+"""
+from collections import namedtuple
+from datetime import timedelta
+
+Scenario = namedtuple('Scenario', ('name', 'setup', 'request'))
+Call = namedtuple('Call', ('client', 'method', 'url', 'data'))
+
+
+def get_client(user=None):
+    from api.authentication import get_token_for_user
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    if user is not None:
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {get_token_for_user(user)}'
+        )
+    return client
+
+
+def create_users(prefix, count, **fields):
+    from reviews.models import User
+
+    User.objects.bulk_create(
+        User(username=f'{prefix}{index}', email=f'{prefix}{index}@yamdb.fake',
+             **fields)
+        for index in range(count)
+    )
+    return list(
+        User.objects.filter(username__startswith=prefix).order_by('pk')
+    )
+
+
+def setup_anonymous(dataset, iterations):
+    from django.db.models import Count
+    from reviews.models import Category, Genre, Review, Title
+
+    return {
+        'client': get_client(),
+        'title_ids': list(
+            Title.objects.order_by('pk').values_list('pk', flat=True)[:100]
+        ),
+        'reviewed_title_ids': list(
+            Title.objects.annotate(reviews_total=Count('reviews')).filter(
+                reviews_total__gt=0
+            ).order_by('-reviews_total', 'pk').values_list(
+                'pk', flat=True
+            )[:100]
+        ),
+        'reviews': list(
+            Review.objects.filter(comments__isnull=False).distinct().order_by(
+                'pk'
+            ).values_list('title_id', 'pk')[:100]
+        ),
+        'genres': list(Genre.objects.values_list('slug', flat=True)),
+        'categories': list(Category.objects.values_list('slug', flat=True)),
+    }
+
+
+def title_list(state, index):
+    filters = (
+        {},
+        {'genre': state['genres'][index % len(state['genres'])]},
+        {'category': state['categories'][index % len(state['categories'])]},
+        {'year': 1950 + index % 73},
+        {'name': f'Произведение {index % 100}'},
+    )
+    return Call(
+        state['client'], 'get', '/api/v1/titles/', filters[index % 5]
+    )
+
+
+def title_detail(state, index):
+    title_id = state['title_ids'][index % len(state['title_ids'])]
+    return Call(state['client'], 'get', f'/api/v1/titles/{title_id}/', None)
+
+
+def title_page(state, index):
+    ids = state['reviewed_title_ids']
+    title_id = ids[index % len(ids)]
+    return Call(
+        state['client'], 'get', f'/api/v1/titles/{title_id}/page/', None
+    )
+
+
+def review_list(state, index):
+    ids = state['reviewed_title_ids']
+    title_id = ids[index % len(ids)]
+    return Call(
+        state['client'], 'get', f'/api/v1/titles/{title_id}/reviews/', None
+    )
+
+
+def comment_list(state, index):
+    title_id, review_id = state['reviews'][index % len(state['reviews'])]
+    return Call(
+        state['client'],
+        'get',
+        f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/',
+        None
+    )
+
+
+def leaderboard(state, index):
+    urls = (
+        '/api/v1/leaderboards/titles/',
+        '/api/v1/leaderboards/genres/'
+        f'{state["genres"][index % len(state["genres"])]}/',
+        '/api/v1/leaderboards/categories/'
+        f'{state["categories"][index % len(state["categories"])]}/',
+    )
+    return Call(state['client'], 'get', urls[index % 3], None)
+
+
+def setup_review_create(dataset, iterations):
+    """
+    Для каждой итерации новый автор, чтобы отзывы не повторялись.
+    """
+    from reviews.models import Title
+
+    return {
+        'clients': [
+            get_client(user)
+            for user in create_users('reviewer', iterations)
+        ],
+        'title_ids': list(
+            Title.objects.order_by('pk').values_list('pk', flat=True)[:100]
+        ),
+    }
+
+
+def review_create(state, index):
+    title_id = state['title_ids'][index % len(state['title_ids'])]
+    return Call(
+        state['clients'][index],
+        'post',
+        f'/api/v1/titles/{title_id}/reviews/',
+        {'text': f'Отзыв {index}', 'score': index % 10 + 1}
+    )
+
+
+def setup_comment_create(dataset, iterations):
+    from reviews.models import Review, User
+
+    return {
+        'client': get_client(User.objects.order_by('pk').first()),
+        'reviews': list(
+            Review.objects.order_by('pk').values_list('title_id', 'pk')[:100]
+        ),
+    }
+
+
+def comment_create(state, index):
+    title_id, review_id = state['reviews'][index % len(state['reviews'])]
+    return Call(
+        state['client'],
+        'post',
+        f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/',
+        {'text': f'Комментарий {index}'}
+    )
+
+
+def setup_signup(dataset, iterations):
+    return {'client': get_client()}
+
+
+def signup(state, index):
+    return Call(
+        state['client'],
+        'post',
+        '/api/v1/auth/signup/',
+        {'username': f'signup{index}', 'email': f'signup{index}@yamdb.fake'}
+    )
+
+
+def setup_token(dataset, iterations):
+    """
+    Код подтверждения одноразовый, поэтому у каждого запроса свой
+    пользователь с кодом.
+    """
+    from api.models import ConfirmationCode, hash_code
+    from django.utils import timezone
+
+    users = create_users('tokenuser', iterations)
+    expires_at = timezone.now() + timedelta(days=1)
+    ConfirmationCode.objects.bulk_create(
+        ConfirmationCode(
+            user=user, code_hash=hash_code('code'), expires_at=expires_at
+        )
+        for user in users
+    )
+    return {'client': get_client(), 'users': users}
+
+
+def token(state, index):
+    user = state['users'][index]
+    return Call(
+        state['client'],
+        'post',
+        '/api/v1/auth/token/',
+        {'username': user.username, 'confirmation_code': 'code'}
+    )
+
+
+SCENARIOS = {
+    scenario.name: scenario for scenario in (
+        Scenario('titles-list', setup_anonymous, title_list),
+        Scenario('titles-detail', setup_anonymous, title_detail),
+        Scenario('titles-page', setup_anonymous, title_page),
+        Scenario('reviews-list', setup_anonymous, review_list),
+        Scenario('comments-list', setup_anonymous, comment_list),
+        Scenario('leaderboards', setup_anonymous, leaderboard),
+        Scenario('reviews-create', setup_review_create, review_create),
+        Scenario('comments-create', setup_comment_create, comment_create),
+        Scenario('signup', setup_signup, signup),
+        Scenario('token', setup_token, token),
+    )
+}
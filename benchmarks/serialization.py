@@ -0,0 +1,94 @@
+"""
+Процессорное время сборки списков: сериализаторы DRF против функций
+из api.projections. Время чтения из БД в замер не входит.
+"""
+import time
+
+ROWS = 1000
+
+
+def measure(build, repeat):
+    """
+    Лучшее из repeat процессорное время одного вызова build() в мс.
+    """
+    best = None
+    for _ in range(repeat):
+        started = time.process_time()
+        build()
+        elapsed = (time.process_time() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def get_cases(rows):
+    from api import projections
+    from api.serializers import (CommentSerializer, ReviewSerializer,
+                                 TitleGetSerializer)
+    from reviews.models import Comment, Review, Title
+
+    titles = list(Title.objects.with_relations().order_by('id')[:rows])
+    title_rows = list(Title.objects.order_by('id').values(
+        *projections.TITLE_COLUMNS
+    )[:rows])
+    genres = projections.get_genres([row['id'] for row in title_rows])
+    reviews = list(
+        Review.objects.select_related('author', 'title').order_by('id')[:rows]
+    )
+    review_rows = list(Review.objects.order_by('id').values(
+        'title__name', *projections.REVIEW_COLUMNS
+    )[:rows])
+    comments = list(
+        Comment.objects.select_related('author', 'review').order_by('id')[
+            :rows
+        ]
+    )
+    comment_rows = list(Comment.objects.order_by('id').values(
+        'review__text', *projections.COMMENT_COLUMNS
+    )[:rows])
+    return {
+        'titles': (
+            lambda: TitleGetSerializer(titles, many=True).data,
+            lambda: [
+                projections.title_to_dict(row, genres.get(row['id'], []))
+                for row in title_rows
+            ],
+            len(titles),
+        ),
+        'reviews': (
+            lambda: ReviewSerializer(reviews, many=True).data,
+            lambda: [
+                projections.review_to_dict(row, row['title__name'])
+                for row in review_rows
+            ],
+            len(reviews),
+        ),
+        'comments': (
+            lambda: CommentSerializer(comments, many=True).data,
+            lambda: [
+                projections.comment_to_dict(row, row['review__text'])
+                for row in comment_rows
+            ],
+            len(comments),
+        ),
+    }
+
+
+def run(rows=ROWS, repeat=5):
+    """
+    Время в мс на 1000 записей для каждого списка.
+    """
+    report = {}
+    for name, (serialize, project, count) in get_cases(rows).items():
+        if not count:
+            continue
+        scale = ROWS / count
+        serializer_ms = measure(serialize, repeat) * scale
+        projection_ms = measure(project, repeat) * scale
+        report[name] = {
+            'rows': count,
+            'serializer_ms_per_1000': round(serializer_ms, 3),
+            'projection_ms_per_1000': round(projection_ms, 3),
+            'speedup': round(serializer_ms / projection_ms, 1)
+            if projection_ms else None,
+        }
+    return report
@@ -1,9 +1,48 @@
+import os
 import sys
 from os.path import abspath, dirname, join
 
+import pytest
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 infra_dir_path = join(root_dir, 'infra')
 
 pytest_plugins = [
+    'tests.fixtures.fixture_user',
+    'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(scope='session')
+def django_db_modify_db_settings():
+    """
+    Если адрес сервера БД не задан, тесты выполняются на SQLite в памяти.
+    """
+    from django.db import connections
+    from django.db.utils import load_backend
+
+    if os.getenv('DB_HOST'):
+        return
+    settings_dict = dict(
+        connections['default'].settings_dict,
+        ENGINE='django.db.backends.sqlite3',
+        NAME=':memory:'
+    )
+    connections['default'] = load_backend(
+        settings_dict['ENGINE']
+    ).DatabaseWrapper(settings_dict, 'default')
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """
+    Кеш в памяти общий для всех тестов, поэтому очищается перед каждым.
+    """
+    from api.authentication import user_versions, verified_tokens
+    from django.core.cache import caches
+
+    for cache in caches.all():
+        cache.clear()
+    verified_tokens.clear()
+    user_versions.clear()
@@ -0,0 +1,52 @@
+import pytest
+
+
+@pytest.fixture
+def make_catalog(django_user_model):
+    """
+    Создаёт size произведений с жанрами и категорией, по size отзывов
+    у первого произведения и по size комментариев у первого отзыва.
+    """
+    from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                                Title)
+
+    def make(size):
+        authors = [
+            django_user_model.objects.create_user(
+                username=f'author{index}',
+                email=f'author{index}@yamdb.fake'
+            )
+            for index in range(size)
+        ]
+        category = Category.objects.create(name='Фильм', slug='movie')
+        genres = [
+            Genre.objects.create(name=f'Жанр {index}', slug=f'genre{index}')
+            for index in range(2)
+        ]
+        titles = [
+            Title.objects.create(
+                name=f'Произведение {index}',
+                year=2000 + index,
+                description='Описание',
+                category=category
+            )
+            for index in range(size)
+        ]
+        GenreTitle.objects.bulk_create(
+            GenreTitle(genre_id=genre, title_id=title)
+            for title in titles
+            for genre in genres
+        )
+        title = titles[0]
+        for author in authors:
+            Review.objects.create(
+                title=title, author=author, text='Отзыв', score=5
+            )
+        review = title.reviews.order_by('pk').first()
+        for author in authors:
+            Comment.objects.create(
+                review=review, author=author, text='Комментарий'
+            )
+        return title, review
+
+    return make
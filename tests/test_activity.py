@@ -0,0 +1,157 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+
+from .fixtures.fixture_user import get_client
+
+URL = '/api/v1/activity/'
+
+
+def get_feed(client, **params):
+    response = client.get(URL, params)
+    assert response.status_code == 200, (
+        f'Проверьте, что GET-запрос к `{URL}` возвращает статус 200'
+    )
+    return response.json()
+
+
+def get_keys(client, **params):
+    return [
+        (event['type'], event['review'], event['comment'])
+        for event in get_feed(client, **params)['results']
+    ]
+
+
+@pytest.mark.django_db
+class TestActivity:
+
+    def test_api_creates_events(self, anon_client, make_catalog,
+                                django_user_model):
+        title, review = make_catalog(1)
+        reader = django_user_model.objects.create_user(
+            username='reader', email='reader@yamdb.fake'
+        )
+        client = get_client(reader)
+        response = client.post(
+            f'/api/v1/titles/{title.pk}/reviews/',
+            {'text': 'Новый отзыв', 'score': 8},
+            format='json'
+        )
+        assert response.status_code == 201
+        new_review = response.json()['id']
+        response = client.post(
+            f'/api/v1/titles/{title.pk}/reviews/{new_review}/comments/',
+            {'text': 'Новый комментарий'},
+            format='json'
+        )
+        assert response.status_code == 201
+        events = get_feed(anon_client, user='reader')['results']
+        assert [event['type'] for event in events] == ['comment', 'review'], (
+            'Проверьте, что лента выводит новые события первыми'
+        )
+        assert events[0]['comment'] == response.json()['id']
+        assert events[0]['text'] == 'Новый комментарий'
+        assert events[0]['score'] is None
+        assert events[1]['review'] == new_review
+        assert events[1]['score'] == 8
+        assert events[1]['author'] == 'reader'
+        assert events[1]['title'] == {'id': title.pk, 'name': title.name}
+        assert len(get_keys(anon_client)) == 4
+
+    def test_filters(self, anon_client, make_catalog):
+        from reviews.models import Genre
+
+        title, review = make_catalog(2)
+        assert len(get_keys(anon_client, title=title.pk)) == 4
+        assert len(get_keys(anon_client, genre='genre0')) == 4
+        assert get_keys(anon_client, user='author1') == [
+            ('comment', review.pk, review.comments.last().pk),
+            ('review', title.reviews.last().pk, None),
+        ]
+        assert get_keys(anon_client, title=title.pk + 1) == [], (
+            'Проверьте, что лента произведения без отзывов пуста'
+        )
+        Genre.objects.create(name='Пустой', slug='empty')
+        assert get_keys(anon_client, genre='empty') == []
+        for params in ({'genre': 'unknown'}, {'user': 'nobody'},
+                       {'title': 999}):
+            assert anon_client.get(URL, params).status_code == 404
+        response = anon_client.get(URL, {'title': title.pk, 'user': 'x'})
+        assert response.status_code == 400, (
+            'Проверьте, что фильтры ленты нельзя сочетать'
+        )
+
+    def test_cursor_pages(self, anon_client, make_catalog):
+        make_catalog(3)
+        first = get_feed(anon_client, limit=4)
+        assert len(first['results']) == 4
+        assert first['previous'] is None
+        second = anon_client.get(first['next']).json()
+        assert len(second['results']) == 2
+        assert second['next'] is None
+        ids = [
+            event['id'] for event in first['results'] + second['results']
+        ]
+        assert ids == sorted(ids, reverse=True) and len(set(ids)) == 6, (
+            'Проверьте, что страницы ленты идут по курсору без повторов'
+        )
+
+    def test_genres_and_deletion(self, anon_client, make_catalog):
+        from reviews.models import ActivityEvent, ActivityFeedEntry, Genre
+
+        title, review = make_catalog(2)
+        title.genre.set(Genre.objects.filter(slug='genre1'))
+        assert get_keys(anon_client, genre='genre0') == [], (
+            'Проверьте, что ленты жанров следуют за жанрами произведения'
+        )
+        assert len(get_keys(anon_client, genre='genre1')) == 4
+        Genre.objects.get(slug='genre1').title_set.clear()
+        assert get_keys(anon_client, genre='genre1') == []
+        review.delete()
+        assert ActivityEvent.objects.count() == 1, (
+            'Проверьте, что события удаляются вместе с отзывом '
+            'и его комментариями'
+        )
+        assert ActivityFeedEntry.objects.count() == 3
+
+    def test_rebuild_command(self, anon_client, make_catalog):
+        from reviews.models import ActivityEvent, ActivityFeedEntry
+
+        make_catalog(3)
+        expected = get_keys(anon_client)
+        entries = ActivityFeedEntry.objects.count()
+        ActivityEvent.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_activity', '--chunk-size', '2', stdout=out)
+        assert 'Создано событий: 6' in out.getvalue()
+        assert get_keys(anon_client) == expected, (
+            'Проверьте, что rebuild_activity восстанавливает порядок ленты'
+        )
+        assert ActivityFeedEntry.objects.count() == entries
+
+    def test_rebuild_failure_keeps_feed(self, anon_client, make_catalog,
+                                        monkeypatch):
+        from reviews.management.commands import rebuild_activity
+
+        make_catalog(2)
+        expected = get_keys(anon_client)
+
+        def fail(self, chunk):
+            raise RuntimeError
+
+        monkeypatch.setattr(rebuild_activity.Command, 'create_events', fail)
+        with pytest.raises(RuntimeError):
+            call_command('rebuild_activity', stdout=StringIO())
+        assert get_keys(anon_client) == expected, (
+            'Проверьте, что ленты пересоздаются одной транзакцией'
+        )
+
+    def test_event_recorded_once(self, make_catalog):
+        from reviews.models import ActivityEvent
+
+        _, review = make_catalog(1)
+        for comment in (None, review.comments.get()):
+            with pytest.raises(IntegrityError), transaction.atomic():
+                ActivityEvent.objects.record(review, comment)
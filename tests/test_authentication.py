@@ -0,0 +1,92 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+USERS_URL = '/api/v1/users/'
+ME_URL = '/api/v1/users/me/'
+
+
+def user_queries(context):
+    return [
+        query['sql'] for query in context.captured_queries
+        if 'reviews_user' in query['sql']
+    ]
+
+
+@pytest.mark.django_db
+class TestClaimsAuthentication:
+
+    def test_permission_check_without_user_query(self, user_client):
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.get(USERS_URL)
+        assert response.status_code == 403
+        assert not user_queries(context), (
+            'Проверьте, что пользователь собирается из токена без запроса '
+            'к таблице пользователей'
+        )
+
+    def test_role_change_invalidates_token(self, admin, admin_client):
+        assert admin_client.get(USERS_URL).status_code == 200
+        admin.role = 'user'
+        admin.save()
+        assert admin_client.get(USERS_URL).status_code == 403, (
+            'Проверьте, что после смены роли старый токен не даёт прежних '
+            'прав'
+        )
+
+    def test_demotion_survives_cache_eviction(self, admin, admin_client):
+        from django.core.cache import caches
+
+        assert admin_client.get(USERS_URL).status_code == 200
+        admin.role = 'user'
+        admin.save(update_fields=['role'])
+        for cache in caches.all():
+            cache.clear()
+        assert admin_client.get(USERS_URL).status_code == 403, (
+            'Проверьте, что отзыв прав не зависит от кеша Django'
+        )
+
+    def test_change_in_other_process(self, admin, admin_client,
+                                     monkeypatch):
+        import time
+
+        from django.db.models import F
+
+        assert admin_client.get(USERS_URL).status_code == 200
+        type(admin).objects.filter(pk=admin.pk).update(
+            role='user', token_version=F('token_version') + 1
+        )
+        now = time.monotonic()
+        monkeypatch.setattr(time, 'monotonic', lambda: now + 10)
+        assert admin_client.get(USERS_URL).status_code == 403, (
+            'Проверьте, что версия токенов перечитывается из БД '
+            'по истечении VERSION_TTL'
+        )
+
+    def test_deleted_user_is_rejected(self, user, user_client):
+        assert user_client.get(ME_URL).status_code == 200
+        user.delete()
+        assert user_client.get(ME_URL).status_code == 401
+
+    def test_token_without_claims_is_checked_once(self, user):
+        from rest_framework.test import APIClient
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}'
+        )
+        for expected in (1, 0):
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(USERS_URL)
+            assert response.status_code == 403
+            assert len(user_queries(context)) == expected, (
+                'Проверьте, что токен без роли проверяется по БД один раз, '
+                'а затем берётся из кеша'
+            )
+
+    def test_me_reads_current_profile(self, user, user_client):
+        user.bio = 'Новая биография'
+        user.save()
+        response = user_client.get(ME_URL)
+        assert response.json()['bio'] == 'Новая биография'
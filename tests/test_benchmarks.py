@@ -0,0 +1,59 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestBenchmarks:
+
+    def test_dataset_is_reproducible(self):
+        from reviews.models import Category, Genre, Review, Title, User
+
+        from benchmarks.dataset import generate
+
+        dataset = generate(scale=0.01, seed=1)
+        assert dataset.counts['titles'] == Title.objects.count()
+        reviews = list(Review.objects.order_by('pk').values_list(
+            'title_id', 'author_id', 'score'
+        ))
+        assert len(reviews) == dataset.counts['reviews']
+        for model in (Title, Genre, Category, User):
+            model.objects.all().delete()
+        generate(scale=0.01, seed=1)
+        assert reviews == list(Review.objects.order_by('pk').values_list(
+            'title_id', 'author_id', 'score'
+        )), 'Проверьте, что при одинаковом seed данные совпадают'
+
+    def test_scenarios_run_without_errors(self):
+        from benchmarks.dataset import generate
+        from benchmarks.runner import run
+        from benchmarks.scenarios import SCENARIOS
+
+        dataset = generate(scale=0.01)
+        report = run(list(SCENARIOS.values()), dataset, iterations=3,
+                     warmup=1)
+        for name, result in report['scenarios'].items():
+            assert result['errors'] == 0, (
+                f'Проверьте, что запросы сценария {name} выполняются '
+                'без ошибок'
+            )
+            for metric in ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps',
+                           'queries_per_request'):
+                assert metric in result
+
+    def test_serialization_report(self):
+        from benchmarks.dataset import generate
+        from benchmarks.serialization import run
+
+        generate(scale=0.01)
+        report = run(rows=20, repeat=1)
+        assert set(report) == {'titles', 'reviews', 'comments'}
+        for result in report.values():
+            assert result['serializer_ms_per_1000'] > 0
+            assert result['projection_ms_per_1000'] > 0
+
+    def test_connections_report(self):
+        from benchmarks.connections import run
+
+        report = run(iterations=3, warmup=1)
+        for mode in ('reconnect', 'pool'):
+            assert report[mode]['mean_ms'] > 0
+        assert 'saved_ms_per_request' in report
@@ -0,0 +1,110 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+TITLES_URL = '/api/v1/titles/'
+GENRES_URL = '/api/v1/genres/'
+CATEGORIES_URL = '/api/v1/categories/'
+
+
+@pytest.fixture
+def catalog():
+    from reviews.models import Category, Genre
+
+    Category.objects.create(name='Фильм', slug='movie')
+    Genre.objects.create(name='Драма', slug='drama')
+    Genre.objects.create(name='Комедия', slug='comedy')
+
+
+def make_titles(count, **fields):
+    return [
+        dict({
+            'name': f'Произведение {index}',
+            'year': 2000,
+            'description': 'Описание',
+            'genre': ['drama', 'comedy'],
+            'category': 'movie',
+        }, **fields)
+        for index in range(count)
+    ]
+
+
+@pytest.mark.django_db
+class TestBulkCreate:
+
+    def test_titles_created_in_bulk(self, admin_client, catalog):
+        from reviews.models import GenreTitle, Title
+
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(
+                TITLES_URL, make_titles(20), format='json'
+            )
+        assert response.status_code == 201, response.json()
+        data = response.json()
+        assert len(data) == 20
+        assert {genre['slug'] for genre in data[0]['genre']} == {
+            'drama', 'comedy'
+        }
+        assert data[0]['category']['slug'] == 'movie'
+        assert Title.objects.count() == 20
+        assert GenreTitle.objects.count() == 40
+        genre_inserts = [
+            query for query in context.captured_queries
+            if query['sql'].startswith('INSERT INTO "reviews_genretitle"')
+        ]
+        assert len(genre_inserts) == 1, (
+            'Проверьте, что связи с жанрами вставляются одним запросом'
+        )
+
+    def test_errors_reported_per_item(self, admin_client, catalog):
+        from reviews.models import Title
+
+        titles = make_titles(3)
+        titles[1]['genre'] = ['unknown']
+        titles[2]['year'] = 3000
+        response = admin_client.post(TITLES_URL, titles, format='json')
+        assert response.status_code == 400
+        errors = response.json()
+        assert errors[0] == {}
+        assert 'genre' in errors[1]
+        assert 'year' in errors[2]
+        assert not Title.objects.exists(), (
+            'Проверьте, что при ошибке в одном элементе ничего не создаётся'
+        )
+
+    def test_single_object_create_unchanged(self, admin_client, catalog):
+        response = admin_client.post(
+            TITLES_URL, make_titles(1)[0], format='json'
+        )
+        assert response.status_code == 201
+        assert response.json()['category']['slug'] == 'movie'
+
+    @pytest.mark.parametrize('url', (GENRES_URL, CATEGORIES_URL))
+    def test_duplicate_slugs_rejected(self, url, admin_client, catalog):
+        response = admin_client.post(url, [
+            {'name': 'Новый', 'slug': 'new'},
+            {'name': 'Новый', 'slug': 'new'},
+            {'name': 'Старый', 'slug': 'movie' if 'categ' in url else 'drama'},
+        ], format='json')
+        assert response.status_code == 400
+        errors = response.json()
+        assert errors[0] == {}
+        assert 'slug' in errors[1] and 'slug' in errors[2]
+
+    def test_genres_created_and_cache_invalidated(self, admin_client,
+                                                  anon_client):
+        assert anon_client.get(GENRES_URL).json()['count'] == 0
+        response = admin_client.post(GENRES_URL, [
+            {'name': f'Жанр {index}', 'slug': f'genre{index}'}
+            for index in range(5)
+        ], format='json')
+        assert response.status_code == 201
+        assert anon_client.get(GENRES_URL).json()['count'] == 5, (
+            'Проверьте, что после массового создания кеш списка сбрасывается'
+        )
+
+    def test_bulk_create_admin_only(self, user_client, catalog):
+        response = user_client.post(
+            TITLES_URL, make_titles(2), format='json'
+        )
+        assert response.status_code == 403
@@ -0,0 +1,100 @@
+import pytest
+
+CACHE_STATS_URL = '/api/v1/stats/cache/'
+
+
+@pytest.fixture(autouse=True)
+def catalog_cache(settings):
+    """
+    Тесты выполняются в одном процессе, поэтому кеш в памяти процесса
+    для них общий.
+    """
+    settings.CATALOG_CACHE = dict(settings.CATALOG_CACHE, ENABLED=True)
+
+
+def get_stats(client, group):
+    return client.get(CACHE_STATS_URL).data['groups'][group]
+
+
+@pytest.mark.django_db
+class TestCatalogCache:
+
+    def test_repeated_request_is_served_from_cache(
+            self, anon_client, admin_client, make_catalog,
+            django_assert_num_queries):
+        make_catalog(3)
+        first = anon_client.get('/api/v1/titles/?limit=2')
+        with django_assert_num_queries(0):
+            second = anon_client.get('/api/v1/titles/?limit=2')
+        assert first.data == second.data
+        stats = get_stats(admin_client, 'titles')
+        assert (stats['hits'], stats['misses']) == (1, 1), (
+            'Проверьте, что счётчики попаданий и промахов кеша учитывают '
+            'запросы к списку произведений'
+        )
+
+    def test_query_params_are_part_of_key(self, anon_client, make_catalog):
+        make_catalog(3)
+        assert len(anon_client.get('/api/v1/titles/?limit=1').data[
+            'results'
+        ]) == 1
+        assert len(anon_client.get('/api/v1/titles/?limit=2').data[
+            'results'
+        ]) == 2
+
+    def test_new_review_invalidates_rating(self, anon_client, user_client,
+                                           make_catalog):
+        title, _ = make_catalog(1)
+        url = f'/api/v1/titles/{title.pk}/'
+        assert anon_client.get(url).data['rating'] == 5
+        user_client.post(
+            f'{url}reviews/', {'text': 'Отзыв', 'score': 10}, format='json'
+        )
+        assert anon_client.get(url).data['rating'] == 7, (
+            'Проверьте, что новый отзыв сбрасывает кеш произведений'
+        )
+
+    def test_category_change_invalidates_titles_and_categories(
+            self, anon_client, make_catalog):
+        from reviews.models import Category
+
+        make_catalog(1)
+        anon_client.get('/api/v1/titles/')
+        anon_client.get('/api/v1/categories/')
+        Category.objects.update_or_create(
+            slug='movie', defaults={'name': 'Кино'}
+        )
+        titles = anon_client.get('/api/v1/titles/').data['results']
+        categories = anon_client.get('/api/v1/categories/').data['results']
+        assert titles[0]['category']['name'] == 'Кино'
+        assert categories[0]['name'] == 'Кино'
+
+    def test_genre_link_invalidates_titles(self, anon_client, make_catalog):
+        from reviews.models import Genre
+
+        title, _ = make_catalog(1)
+        anon_client.get('/api/v1/titles/')
+        genre = Genre.objects.create(name='Новый', slug='new')
+        title.genre.add(genre)
+        genres = anon_client.get('/api/v1/titles/').data['results'][0][
+            'genre'
+        ]
+        assert {'name': 'Новый', 'slug': 'new'} in genres
+
+    def test_stats_are_admin_only(self, user_client):
+        assert user_client.get(CACHE_STATS_URL).status_code == 403
+
+    def test_process_local_cache_warning(self, settings):
+        from api.cache import check_shared_cache
+
+        assert [
+            message.id for message in check_shared_cache(None)
+        ] == ['api.W001'], (
+            'Проверьте, что включённый кеш каталога в памяти процесса '
+            'вызывает предупреждение'
+        )
+        settings.CACHES = dict(settings.CACHES, default={
+            'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+            'LOCATION': 'memcached:11211',
+        })
+        assert check_shared_cache(None) == []
@@ -0,0 +1,153 @@
+import time
+from datetime import datetime, timezone
+
+import pytest
+from django.utils.http import http_date
+
+NOW = time.time()
+
+
+@pytest.mark.django_db
+class TestConditionalLists:
+
+    @pytest.fixture
+    def urls(self, make_catalog):
+        title, review = make_catalog(3)
+        reviews_url = f'/api/v1/titles/{title.pk}/reviews/'
+        return {
+            'reviews': reviews_url,
+            'comments': f'{reviews_url}{review.pk}/comments/',
+        }
+
+    @pytest.mark.parametrize('name', ['reviews', 'comments'])
+    def test_not_modified_by_etag(self, name, urls, anon_client,
+                                  django_assert_num_queries):
+        response = anon_client.get(urls[name])
+        etag = response['ETag']
+        with django_assert_num_queries(1):
+            response = anon_client.get(urls[name], HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, (
+            'Проверьте, что при совпадении ETag список не передаётся '
+            'повторно'
+        )
+        assert response['ETag'] == etag
+
+    @pytest.mark.parametrize('name', ['reviews', 'comments'])
+    def test_not_modified_since(self, name, urls, anon_client, monkeypatch):
+        monkeypatch.setattr(time, 'time', lambda: NOW + 60)
+        last_modified = anon_client.get(urls[name])['Last-Modified']
+        response = anon_client.get(
+            urls[name], HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        assert response.status_code == 304
+
+    def test_etag_depends_on_query(self, urls, anon_client):
+        first = anon_client.get(urls['reviews'])['ETag']
+        second = anon_client.get(f'{urls["reviews"]}?cursor=')['ETag']
+        assert first != second, (
+            'Проверьте, что разные страницы списка имеют разные ETag'
+        )
+
+    def test_new_review_changes_etag(self, urls, anon_client, user_client):
+        etag = anon_client.get(urls['reviews'])['ETag']
+        user_client.post(
+            urls['reviews'], {'text': 'Новый', 'score': 7}, format='json'
+        )
+        response = anon_client.get(urls['reviews'], HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что после добавления отзыва ETag списка меняется'
+        )
+
+    def test_comment_edit_changes_etag(self, urls, anon_client):
+        from reviews.models import Comment
+
+        etag = anon_client.get(urls['comments'])['ETag']
+        comment = Comment.objects.order_by('pk').first()
+        comment.text = 'Исправленный'
+        comment.save()
+        response = anon_client.get(urls['comments'], HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        Comment.objects.filter(pk=comment.pk).first().delete()
+        response = anon_client.get(
+            urls['comments'], HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        assert response.status_code == 200, (
+            'Проверьте, что после удаления комментария ETag списка меняется'
+        )
+
+    def test_embedded_values_change_etag(self, urls, anon_client,
+                                         admin_client, django_user_model):
+        from reviews.models import Review
+
+        review = Review.objects.order_by('pk').first()
+
+        def assert_changed(name, change):
+            etag = anon_client.get(urls[name])['ETag']
+            change()
+            response = anon_client.get(urls[name], HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == 200, (
+                f'Проверьте, что ETag списка {name} меняется вместе '
+                'с выводимыми в нём текстом отзыва, названием произведения '
+                'и именем автора'
+            )
+
+        author = django_user_model.objects.get(username='author1')
+
+        def rename_author():
+            author.username = f'{author.username}x'
+            author.save()
+
+        assert_changed('comments', lambda: admin_client.patch(
+            urls['comments'].rsplit('comments/', 1)[0],
+            {'text': 'Исправленный отзыв'}, format='json'
+        ))
+        assert_changed('reviews', lambda: admin_client.patch(
+            f'/api/v1/titles/{review.title_id}/',
+            {'name': 'Новое название'}, format='json'
+        ))
+        for name in ('reviews', 'comments'):
+            assert_changed(name, rename_author)
+
+    def test_write_in_same_second_is_not_hidden(self, urls, anon_client,
+                                                monkeypatch):
+        from reviews.models import Title
+
+        second = int(NOW)
+
+        def set_modified(offset):
+            Title.objects.update(reviews_modified=datetime.fromtimestamp(
+                second + offset, timezone.utc
+            ))
+
+        set_modified(0.2)
+        monkeypatch.setattr(time, 'time', lambda: second + 0.5)
+        response = anon_client.get(urls['reviews'])
+        assert 'Last-Modified' not in response, (
+            'Проверьте, что Last-Modified не отдаётся до окончания секунды '
+            'изменения'
+        )
+        set_modified(0.7)
+        monkeypatch.setattr(time, 'time', lambda: second + 5)
+        response = anon_client.get(
+            urls['reviews'], HTTP_IF_MODIFIED_SINCE=http_date(second)
+        )
+        assert response.status_code == 200, (
+            'Проверьте, что запись в ту же секунду не даёт ответа 304'
+        )
+        response = anon_client.get(
+            urls['reviews'],
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        assert response.status_code == 304
+
+    def test_list_without_modified_is_plain(self):
+        from api.conditional import ConditionalListMixin
+
+        class PlainList:
+            def list(self, request, *args, **kwargs):
+                return 'plain'
+
+        view = type('ViewSet', (ConditionalListMixin, PlainList), {})()
+        assert view.list(None) == 'plain', (
+            'Проверьте, что без метода вьюсета список выводится как обычно'
+        )
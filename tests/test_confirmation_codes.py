@@ -0,0 +1,85 @@
+import re
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+TOKEN_URL = '/api/v1/auth/token/'
+USER = {'username': 'reader', 'email': 'reader@yamdb.fake'}
+
+
+def get_sent_code():
+    from api.models import OutgoingEmail
+
+    body = OutgoingEmail.objects.order_by('-pk').first().body
+    return re.search(r'\(confirmation_code\) (\S+) ', body).group(1)
+
+
+def get_token(client, code):
+    return client.post(
+        TOKEN_URL, {'username': USER['username'], 'confirmation_code': code}
+    )
+
+
+@pytest.mark.django_db
+class TestConfirmationCodes:
+
+    def test_code_is_single_use(self, anon_client):
+        from api.models import ConfirmationCode
+
+        assert anon_client.post(SIGNUP_URL, USER).status_code == 200
+        code = get_sent_code()
+        assert not ConfirmationCode.objects.filter(code_hash=code).exists()
+        assert get_token(anon_client, 'wrong').status_code == 400
+        response = get_token(anon_client, code)
+        assert response.status_code == 200
+        assert 'token' in response.json()
+        assert get_token(anon_client, code).status_code == 400, (
+            'Проверьте, что код подтверждения действует только один раз'
+        )
+        assert not ConfirmationCode.objects.exists()
+
+    def test_signup_retry_does_not_rewrite_user(self, anon_client):
+        anon_client.post(SIGNUP_URL, USER)
+        first = get_sent_code()
+        with CaptureQueriesContext(connection) as context:
+            response = anon_client.post(SIGNUP_URL, USER)
+        assert response.status_code == 200
+        statements = [query['sql'] for query in context.captured_queries]
+        assert not [sql for sql in statements if sql.startswith('UPDATE')], (
+            'Проверьте, что повторная регистрация не перезаписывает '
+            'пользователя'
+        )
+        assert len([
+            sql for sql in statements
+            if sql.startswith('INSERT INTO "api_confirmationcode"')
+        ]) == 1
+        second = get_sent_code()
+        assert first != second
+        assert get_token(anon_client, first).status_code == 200
+        assert get_token(anon_client, second).status_code == 400, (
+            'Проверьте, что после получения токена остальные коды '
+            'пользователя недействительны'
+        )
+
+    def test_expired_codes(self, anon_client, settings):
+        from api.models import ConfirmationCode
+        from django.utils import timezone
+
+        anon_client.post(SIGNUP_URL, USER)
+        code = get_sent_code()
+        anon_client.post(SIGNUP_URL, USER)
+        ConfirmationCode.objects.filter(
+            pk=ConfirmationCode.objects.order_by('pk').first().pk
+        ).update(expires_at=timezone.now() - timedelta(seconds=1))
+        assert get_token(anon_client, code).status_code == 400, (
+            'Проверьте, что просроченный код не принимается'
+        )
+        out = StringIO()
+        call_command('delete_expired_codes', '--chunk-size', '1', stdout=out)
+        assert 'Удалено просроченных кодов: 1' in out.getvalue()
+        assert ConfirmationCode.objects.count() == 1
@@ -0,0 +1,199 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from .fixtures.fixture_user import get_client
+
+
+def get_counters(title, review):
+    title.refresh_from_db()
+    review.refresh_from_db()
+    return (
+        title.reviews_count, title.rating_sum, review.comments_count
+    )
+
+
+def assert_counters_match(title, review):
+    title.refresh_from_db()
+    review.refresh_from_db()
+    assert title.reviews_count == title.reviews.count(), (
+        'Проверьте, что количество отзывов произведения совпадает '
+        'с отзывами в БД'
+    )
+    assert title.rating_sum == sum(
+        title.reviews.values_list('score', flat=True)
+    )
+    assert review.comments_count == review.comments.count(), (
+        'Проверьте, что количество комментариев отзыва совпадает '
+        'с комментариями в БД'
+    )
+
+
+DELETE_BUDGET = {'user': 25, 'title': 21}
+
+
+@pytest.mark.django_db
+class TestCounters:
+
+    def test_api_writes(self, user_client, make_catalog):
+        title, review = make_catalog(2)
+        assert get_counters(title, review) == (2, 10, 2)
+        reviews_url = f'/api/v1/titles/{title.pk}/reviews/'
+        response = user_client.post(
+            reviews_url, {'text': 'Отзыв', 'score': 9}, format='json'
+        )
+        assert response.status_code == 201
+        assert response.json()['comments_count'] == 0
+        own_url = f'{reviews_url}{response.json()["id"]}/'
+        comments_url = f'{reviews_url}{review.pk}/comments/'
+        response = user_client.post(
+            comments_url, {'text': 'Комментарий'}, format='json'
+        )
+        assert response.status_code == 201
+        comment_url = f'{comments_url}{response.json()["id"]}/'
+        assert get_counters(title, review) == (3, 19, 3)
+
+        response = user_client.patch(own_url, {'score': 1}, format='json')
+        assert response.status_code == 200
+        assert get_counters(title, review) == (3, 11, 3)
+
+        assert user_client.delete(comment_url).status_code == 204
+        assert user_client.delete(own_url).status_code == 204
+        assert get_counters(title, review) == (2, 10, 2)
+
+        data = user_client.get(f'/api/v1/titles/{title.pk}/').json()
+        assert data['reviews_count'] == 2, (
+            'Проверьте, что произведение возвращает количество отзывов'
+        )
+        data = user_client.get(reviews_url).json()
+        assert {
+            item['id']: item['comments_count'] for item in data['results']
+        }[review.pk] == 2, (
+            'Проверьте, что отзыв возвращает количество комментариев'
+        )
+
+    def test_comment_changes_reviews_list_etag(self, user_client,
+                                               make_catalog):
+        title, review = make_catalog(1)
+        reviews_url = f'/api/v1/titles/{title.pk}/reviews/'
+        etag = user_client.get(reviews_url)['ETag']
+        user_client.post(
+            f'{reviews_url}{review.pk}/comments/',
+            {'text': 'Комментарий'},
+            format='json'
+        )
+        response = user_client.get(reviews_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что новый комментарий меняет ETag списка отзывов, '
+            'в котором показано количество комментариев'
+        )
+
+    def test_cascade_and_direct_model_changes(self, make_catalog):
+        from reviews.models import Comment, Review
+
+        title, review = make_catalog(3)
+        other = Review.objects.exclude(pk=review.pk).first()
+        # Изменения через модели, как в админке.
+        moved = review.comments.order_by('pk').first()
+        moved.review = other
+        moved.save()
+        other.score = 10
+        other.save()
+        assert_counters_match(title, review)
+        assert_counters_match(title, other)
+
+        # Удаление автора удаляет его отзывы и комментарии каскадом.
+        other.author.delete()
+        assert not Review.objects.filter(pk=other.pk).exists()
+        assert_counters_match(title, review)
+        assert Comment.objects.filter(review=review).count() == 1
+
+    def test_repeated_delete_is_counted_once(self, make_catalog):
+        from reviews.models import Review
+
+        title, review = make_catalog(2)
+        stale = Review.objects.get(pk=review.pk)
+        review.delete()
+        stale.delete()
+        title.refresh_from_db()
+        assert title.reviews_count == 1, (
+            'Проверьте, что повторное удаление отзыва не уменьшает '
+            'счётчик ещё раз'
+        )
+
+    def test_recount_comments_command(self, make_catalog):
+        from reviews.models import Review
+
+        title, review = make_catalog(2)
+        Review.objects.update(comments_count=7)
+        out = StringIO()
+        call_command('recount_comments', '--dry-run', stdout=out)
+        assert 'найдено расхождений: 2' in out.getvalue()
+        review.refresh_from_db()
+        assert review.comments_count == 7
+        call_command('recount_comments', '--chunk-size', '1',
+                     stdout=StringIO())
+        assert_counters_match(title, review)
+        assert set(
+            Review.objects.values_list('comments_count', flat=True)
+        ) == {0, 2}
+
+    @pytest.mark.parametrize('size', [2, 8])
+    def test_cascade_delete_queries(self, make_catalog, django_user_model,
+                                    size):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from reviews.models import LeaderboardEntry
+
+        title, review = make_catalog(size)
+        author = django_user_model.objects.get(username='author1')
+        with CaptureQueriesContext(connection) as queries:
+            author.delete()
+        assert len(queries) <= DELETE_BUDGET['user'], (
+            'Проверьте, что удаление пользователя пересчитывает счётчики '
+            'один раз, а не для каждого его отзыва и комментария'
+        )
+        assert_counters_match(title, review)
+        assert title.reviews_count == size - 1
+        with CaptureQueriesContext(connection) as queries:
+            title.delete()
+        assert len(queries) <= DELETE_BUDGET['title'], (
+            'Проверьте, что удаление произведения не пересчитывает '
+            'счётчики для каждого отзыва и комментария'
+        )
+        assert not LeaderboardEntry.objects.filter(title=title.pk).exists()
+
+    def test_save_of_deleted_review_inserts_it(self, make_catalog):
+        from reviews.models import Review
+
+        title, review = make_catalog(2)
+        stale = Review.objects.get(pk=review.pk)
+        review.delete()
+        stale.save()
+        assert Review.objects.filter(pk=stale.pk).exists(), (
+            'Проверьте, что сохранение удалённого отзыва добавляет его '
+            'заново, как у обычной модели'
+        )
+
+    def test_failed_comment_create_is_rolled_back(self, user_client,
+                                                  make_catalog, monkeypatch):
+        from reviews.models import ActivityEventQuerySet
+
+        title, review = make_catalog(2)
+
+        def fail(self, review, comment=None):
+            raise RuntimeError
+
+        monkeypatch.setattr(ActivityEventQuerySet, 'record', fail)
+        with pytest.raises(RuntimeError):
+            user_client.post(
+                f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/',
+                {'text': 'Комментарий'},
+                format='json'
+            )
+        assert get_counters(title, review) == (2, 10, 2), (
+            'Проверьте, что комментарий и счётчики записываются одной '
+            'транзакцией'
+        )
+        assert_counters_match(title, review)
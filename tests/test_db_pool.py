@@ -0,0 +1,159 @@
+import sqlite3
+
+import pytest
+from django.db import OperationalError
+from django.db.utils import ConnectionHandler
+
+from api_yamdb.db.pool import (ConnectionPool, PoolTimeoutError, close_pools,
+                               get_stats)
+
+
+def make_pool(**options):
+    return ConnectionPool(**dict(
+        {'max_size': 2, 'idle_timeout': 60, 'timeout': 0.05,
+         'pre_ping': True, 'ping_after': 0},
+        **options
+    ))
+
+
+def connect():
+    return sqlite3.connect(':memory:', check_same_thread=False)
+
+
+@pytest.fixture
+def pooled_connections(tmp_path, django_db_blocker):
+    """
+    Подключения к одному файлу SQLite через бэкенд с пулом.
+    """
+    databases = {
+        'default': {'ENGINE': 'django.db.backends.sqlite3'},
+        'pooled': {
+            'ENGINE': 'api_yamdb.db.sqlite3',
+            'NAME': str(tmp_path / 'db.sqlite3'),
+            'POOL': {'MAX_SIZE': 1, 'TIMEOUT': 0.05},
+        },
+    }
+    handlers = []
+
+    def make():
+        handlers.append(ConnectionHandler(databases))
+        return handlers[-1]['pooled']
+
+    with django_db_blocker.unblock():
+        yield make
+        for handler in handlers:
+            handler['pooled'].close()
+        close_pools()
+
+
+class TestConnectionPool:
+
+    def test_reuse_and_max_size(self):
+        pool = make_pool()
+        first, _ = pool.checkout(connect)
+        second, _ = pool.checkout(connect)
+        with pytest.raises(PoolTimeoutError):
+            pool.checkout(connect)
+        pool.checkin(first)
+        reused, _ = pool.checkout(connect)
+        assert reused is first, (
+            'Проверьте, что возвращённое соединение выдаётся повторно'
+        )
+        stats = pool.stats()
+        assert stats['connects'] == 2
+        assert stats['checkouts'] == 3
+        assert stats['timeouts'] == 1
+        assert stats['utilization'] == 1
+        assert stats['wait_ms'] >= 50
+        pool.checkin(second)
+        assert pool.stats()['in_use'] == 1
+
+    def test_dead_and_idle_connections_are_replaced(self):
+        pool = make_pool()
+        broken, _ = pool.checkout(connect)
+        pool.checkin(broken)
+        broken.close()
+        fresh, _ = pool.checkout(connect)
+        assert fresh is not broken, (
+            'Проверьте, что соединение, не прошедшее проверку, заменяется '
+            'новым'
+        )
+        assert pool.stats()['ping_failures'] == 1
+        assert pool.stats()['size'] == 1
+
+        pool.checkin(fresh)
+        pool.idle_timeout = 0
+        assert pool.checkout(connect)[0] is not fresh, (
+            'Проверьте, что простаивавшие дольше IDLE_TIMEOUT соединения '
+            'закрываются'
+        )
+        with pytest.raises(sqlite3.ProgrammingError):
+            fresh.execute('SELECT 1')
+        assert pool.stats()['ping_failures'] == 1
+
+    def test_recently_returned_connection_is_not_pinged(self):
+        pool = make_pool(ping_after=60)
+        connection, _ = pool.checkout(connect)
+        pool.checkin(connection)
+        connection.close()
+        assert pool.checkout(connect)[0] is connection, (
+            'Проверьте, что соединение, простоявшее меньше PING_AFTER '
+            'секунд, выдаётся без проверки запросом SELECT 1'
+        )
+        assert pool.stats()['ping_failures'] == 0
+
+
+class TestPooledBackend:
+
+    def test_connection_is_reused_between_requests(self, pooled_connections):
+        connection = pooled_connections()
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE TABLE item (id integer)')
+        raw = connection.connection
+        connection.close()
+        connection.ensure_connection()
+        assert connection.connection is raw, (
+            'Проверьте, что закрытое соединение возвращается в пул, '
+            'а не закрывается'
+        )
+
+        connection.set_autocommit(False)
+        with connection.cursor() as cursor:
+            cursor.execute('INSERT INTO item VALUES (1)')
+        connection.close()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM item')
+            assert cursor.fetchone() == (0,), (
+                'Проверьте, что незавершённая транзакция откатывается при '
+                'возврате соединения в пул'
+            )
+        stats = get_stats()['pooled']
+        assert stats['connects'] == 1
+        assert stats['checkouts'] == 3
+
+    def test_exhausted_pool_raises_operational_error(self,
+                                                     pooled_connections):
+        first = pooled_connections()
+        first.ensure_connection()
+        second = pooled_connections()
+        with pytest.raises(OperationalError):
+            second.ensure_connection()
+        first.close()
+        second.ensure_connection()
+        stats = get_stats()['pooled']
+        assert stats['timeouts'] == 1
+        assert stats['wait_ms'] >= 50
+        assert stats['utilization'] == 1
+
+    @pytest.mark.django_db
+    def test_stats_view(self, pooled_connections, admin_client,
+                        user_client):
+        url = '/api/v1/stats/db-pool/'
+        pooled_connections().ensure_connection()
+        assert user_client.get(url).status_code == 403
+        response = admin_client.get(url)
+        assert response.status_code == 200
+        assert response.json()['pooled']['in_use'] == 1, (
+            'Проверьте, что администратору доступны счётчики пулов '
+            'соединений'
+        )
@@ -0,0 +1,69 @@
+import csv
+import json
+from io import StringIO
+
+import pytest
+
+TITLES_URL = '/api/v1/export/titles/'
+REVIEWS_URL = '/api/v1/export/reviews/'
+
+
+def read_ndjson(response):
+    content = b''.join(response.streaming_content).decode()
+    return [json.loads(line) for line in content.splitlines()]
+
+
+@pytest.mark.django_db
+class TestExport:
+
+    def test_export_admin_only(self, user_client, anon_client):
+        for client in (user_client, anon_client):
+            response = client.get(TITLES_URL)
+            assert response.status_code in (401, 403), (
+                'Проверьте, что выгрузка доступна только администратору'
+            )
+
+    def test_titles_ndjson(self, admin_client, make_catalog, settings):
+        settings.EXPORT_CHUNK_SIZE = 2
+        title, _ = make_catalog(5)
+        title.refresh_from_db()
+        response = admin_client.get(TITLES_URL)
+        assert response.status_code == 200
+        assert response.streaming, (
+            'Проверьте, что выгрузка отдаётся потоковым ответом'
+        )
+        assert response['Content-Type'].startswith('application/x-ndjson')
+        rows = read_ndjson(response)
+        assert [row['id'] for row in rows] == sorted(
+            row['id'] for row in rows
+        )
+        first = next(row for row in rows if row['id'] == title.id)
+        assert first['rating'] == title.rating
+        assert first['category'] == title.category.slug
+        assert first['genre'] == sorted(
+            title.genre.values_list('slug', flat=True)
+        )
+
+    def test_resume_after_id(self, admin_client, make_catalog):
+        make_catalog(4)
+        rows = read_ndjson(admin_client.get(REVIEWS_URL))
+        resumed = read_ndjson(
+            admin_client.get(REVIEWS_URL, {'after': rows[1]['id']})
+        )
+        assert resumed == rows[2:], (
+            'Проверьте, что параметр after продолжает выгрузку после '
+            'указанного id'
+        )
+
+    def test_reviews_csv(self, admin_client, make_catalog):
+        _, review = make_catalog(3)
+        response = admin_client.get(REVIEWS_URL, {'format': 'csv'})
+        assert response['Content-Type'].startswith('text/csv')
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.DictReader(StringIO(content)))
+        assert len(rows) == 3
+        assert rows[0]['author'] == review.author.username
+
+    def test_invalid_after(self, admin_client):
+        response = admin_client.get(TITLES_URL, {'after': 'abc'})
+        assert response.status_code == 400
@@ -0,0 +1,253 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .fixtures.fixture_user import get_client
+
+URL = '/api/v1/leaderboards/titles/'
+
+
+def make_title(name, year=2000, category=None, genres=()):
+    from reviews.models import Title
+
+    title = Title.objects.create(
+        name=name, year=year, description='Описание', category=category
+    )
+    title.genre.set(genres)
+    return title
+
+
+def make_authors(count):
+    from reviews.models import User
+
+    return [
+        User.objects.create_user(
+            username=f'critic{index}', email=f'critic{index}@yamdb.fake'
+        )
+        for index in range(count)
+    ]
+
+
+def rate(title, authors, scores):
+    """
+    Отзывы создаются через API, как их оставляют пользователи.
+    """
+    for author, score in zip(authors, scores):
+        response = get_client(author).post(
+            f'/api/v1/titles/{title.pk}/reviews/',
+            {'text': 'Отзыв', 'score': score},
+            format='json'
+        )
+        assert response.status_code == 201
+
+
+def get_names(client, url, **params):
+    response = client.get(url, params)
+    assert response.status_code == 200, (
+        f'Проверьте, что GET-запрос к `{url}` возвращает статус 200'
+    )
+    return [entry['title']['name'] for entry in response.json()]
+
+
+def get_entries():
+    from reviews.models import LeaderboardEntry
+
+    return sorted(LeaderboardEntry.objects.values_list(
+        'title_id', 'scope', 'scope_id', 'year', 'rating_sum',
+        'rating_count', 'rank'
+    ))
+
+
+@pytest.mark.django_db
+class TestLeaderboard:
+
+    def test_single_review_is_not_ranked(self, anon_client):
+        authors = make_authors(3)
+        rate(make_title('Один отзыв'), authors, [10])
+        rate(make_title('Три отзыва'), authors, [7, 8, 9])
+        response = anon_client.get(URL)
+        assert response.status_code == 200
+        data = response.json()
+        assert [entry['title']['name'] for entry in data] == ['Три отзыва'], (
+            'Проверьте, что произведения, у которых меньше '
+            'LEADERBOARD_MIN_REVIEWS отзывов, не попадают в рейтинг'
+        )
+        assert data[0]['position'] == 1
+        assert data[0]['average'] == 8
+        assert data[0]['rating_count'] == 3
+        assert data[0]['title']['rating'] == 8
+
+    def test_scopes_and_year_range(self, anon_client):
+        from reviews.models import Category, Genre
+
+        movie = Category.objects.create(name='Фильм', slug='movie')
+        book = Category.objects.create(name='Книга', slug='book')
+        drama = Genre.objects.create(name='Драма', slug='drama')
+        comedy = Genre.objects.create(name='Комедия', slug='comedy')
+        authors = make_authors(3)
+        rate(make_title('Старая драма', 1950, movie, [drama]),
+             authors, [10, 10, 9])
+        rate(make_title('Комедия', 2000, movie, [comedy]),
+             authors, [9, 9, 9])
+        rate(make_title('Новая драма', 2010, book, [drama, comedy]),
+             authors, [6, 7, 8])
+        assert get_names(anon_client, URL) == [
+            'Старая драма', 'Комедия', 'Новая драма'
+        ]
+        assert get_names(anon_client, URL, limit=2) == [
+            'Старая драма', 'Комедия'
+        ]
+        assert get_names(
+            anon_client, '/api/v1/leaderboards/genres/drama/'
+        ) == ['Старая драма', 'Новая драма']
+        assert get_names(
+            anon_client, '/api/v1/leaderboards/categories/movie/'
+        ) == ['Старая драма', 'Комедия']
+        assert get_names(
+            anon_client, '/api/v1/leaderboards/genres/comedy/',
+            year_from=2005
+        ) == ['Новая драма']
+        assert get_names(anon_client, URL, year_to=2000) == [
+            'Старая драма', 'Комедия'
+        ]
+        assert anon_client.get(
+            '/api/v1/leaderboards/genres/unknown/'
+        ).status_code == 404
+        for params in ({'limit': 0}, {'limit': 1000},
+                       {'year_from': 2010, 'year_to': 2000}):
+            assert anon_client.get(URL, params).status_code == 400, (
+                f'Проверьте, что параметры {params} отклоняются'
+            )
+
+    def test_follows_review_and_title_changes(self, admin_client,
+                                              anon_client):
+        from reviews.models import Genre
+
+        drama = Genre.objects.create(name='Драма', slug='drama')
+        comedy = Genre.objects.create(name='Комедия', slug='comedy')
+        authors = make_authors(4)
+        first = make_title('Первое', genres=[drama])
+        second = make_title('Второе', genres=[drama])
+        rate(first, authors, [8, 8, 7])
+        rate(second, authors, [7, 7, 7])
+        assert get_names(anon_client, URL) == ['Первое', 'Второе']
+
+        review = second.reviews.get(author=authors[0])
+        response = get_client(authors[0]).patch(
+            f'/api/v1/titles/{second.pk}/reviews/{review.pk}/',
+            {'score': 10},
+            format='json'
+        )
+        assert response.status_code == 200
+        assert get_names(anon_client, URL) == ['Второе', 'Первое'], (
+            'Проверьте, что изменение оценки меняет позиции в рейтинге'
+        )
+
+        response = get_client(authors[1]).delete(
+            f'/api/v1/titles/{second.pk}/reviews/'
+            f'{second.reviews.get(author=authors[1]).pk}/'
+        )
+        assert response.status_code == 204
+        assert get_names(anon_client, URL) == ['Первое'], (
+            'Проверьте, что произведение выбывает из рейтинга, когда '
+            'отзывов становится меньше минимума'
+        )
+        rate(second, authors[3:], [10])
+        assert get_names(anon_client, URL) == ['Второе', 'Первое']
+
+        response = admin_client.patch(
+            f'/api/v1/titles/{first.pk}/',
+            {'genre': ['comedy'], 'year': 1990},
+            format='json'
+        )
+        assert response.status_code == 200
+        assert get_names(
+            anon_client, '/api/v1/leaderboards/genres/drama/'
+        ) == ['Второе']
+        assert get_names(
+            anon_client, '/api/v1/leaderboards/genres/comedy/',
+            year_to=1995
+        ) == ['Первое'], (
+            'Проверьте, что изменение жанров и года произведения '
+            'переносится в рейтинги'
+        )
+
+        entries = get_entries()
+        call_command('rebuild_leaderboards', stdout=StringIO())
+        assert get_entries() == entries, (
+            'Проверьте, что рейтинги после изменений совпадают '
+            'с пересчитанными заново'
+        )
+
+        comedy.delete()
+        assert get_names(
+            anon_client, '/api/v1/leaderboards/genres/drama/'
+        ) == ['Второе']
+        assert anon_client.get(
+            '/api/v1/leaderboards/genres/comedy/'
+        ).status_code == 404
+
+    def test_read_does_not_depend_on_catalog_size(self, anon_client):
+        authors = make_authors(3)
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as context:
+                names = get_names(anon_client, URL, limit=3)
+            assert len(names) == 3
+            return len(context.captured_queries)
+
+        for index in range(3):
+            rate(make_title(f'Произведение {index}'), authors, [5, 6, 7])
+        small = count_queries()
+        for index in range(3, 20):
+            rate(make_title(f'Произведение {index}'), authors, [5, 6, 7])
+        assert count_queries() == small, (
+            'Проверьте, что количество запросов к рейтингу не зависит '
+            'от размера каталога'
+        )
+
+    def test_zero_min_reviews(self, anon_client, settings):
+        from reviews.models import get_rank
+
+        settings.LEADERBOARD_MIN_REVIEWS = 0
+        assert get_rank(0, 0) == 0.0
+        authors = make_authors(2)
+        title = make_title('Один отзыв')
+        rate(title, authors, [6])
+        assert get_names(anon_client, URL) == ['Один отзыв']
+        response = get_client(authors[0]).delete(
+            f'/api/v1/titles/{title.pk}/reviews/{title.reviews.get().pk}/'
+        )
+        assert response.status_code == 204
+        rate(make_title('Два отзыва'), authors, [7, 9])
+        assert get_names(anon_client, URL) == ['Два отзыва'], (
+            'Проверьте, что при LEADERBOARD_MIN_REVIEWS = 0 произведения '
+            'без отзывов не попадают в рейтинг'
+        )
+
+    def test_title_deleted_during_read(self, anon_client, monkeypatch):
+        from reviews.models import LeaderboardQuerySet, Title
+
+        authors = make_authors(3)
+        rate(make_title('Первое'), authors, [9, 9, 9])
+        rate(make_title('Второе'), authors, [5, 5, 5])
+        top = LeaderboardQuerySet.top
+
+        def top_and_delete(self, *args, **kwargs):
+            entries = list(top(self, *args, **kwargs))
+            Title.objects.filter(name='Первое').delete()
+            return entries
+
+        monkeypatch.setattr(LeaderboardQuerySet, 'top', top_and_delete)
+        response = anon_client.get(URL)
+        assert response.status_code == 200, (
+            'Проверьте, что рейтинг пропускает произведения, удалённые '
+            'после чтения записей рейтинга'
+        )
+        assert [
+            (entry['position'], entry['title']['name'])
+            for entry in response.json()
+        ] == [(1, 'Второе')]
@@ -0,0 +1,96 @@
+import csv
+import os
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+
+def count_rows(filename):
+    from django.conf import settings
+
+    path = os.path.join(settings.BASE_DIR, 'static', 'data', filename)
+    with open(path, encoding='utf-8', newline='') as file:
+        return sum(1 for _ in csv.DictReader(file))
+
+
+@pytest.mark.django_db
+class TestLoadCsv:
+
+    def test_dry_run_writes_nothing(self):
+        from reviews.models import Title
+
+        call_command('load_csv', '--dry-run', stdout=StringIO())
+        assert not Title.objects.exists(), (
+            'Проверьте, что с ключом --dry-run данные не записываются'
+        )
+
+    def test_rate_with_frozen_clock(self, monkeypatch):
+        from reviews.management.commands import load_csv
+
+        monkeypatch.setattr(load_csv.time, 'monotonic', lambda: 100.0)
+        call_command('load_csv', '--dry-run', stdout=StringIO())
+
+    def test_load_dataset(self):
+        from reviews.models import Comment, GenreTitle, Review, Title, User
+
+        call_command('load_csv', '--batch-size', '10', stdout=StringIO())
+        for model, filename in (
+            (User, 'users.csv'),
+            (Title, 'titles.csv'),
+            (GenreTitle, 'genre_title.csv'),
+            (Review, 'review.csv'),
+            (Comment, 'comments.csv'),
+        ):
+            assert model.objects.count() == count_rows(filename), (
+                f'Проверьте, что из файла {filename} загружаются все строки'
+            )
+        review = Review.objects.get(pk=1)
+        assert review.pub_date.year == 2019, (
+            'Проверьте, что дата публикации берётся из файла'
+        )
+        title = review.title
+        assert title.rating_count == title.reviews.count(), (
+            'Проверьте, что после загрузки рейтинги пересчитываются'
+        )
+
+    def test_rows_with_unknown_references_are_skipped(self, tmp_path):
+        from reviews.models import Review
+
+        (tmp_path / 'review.csv').write_text(
+            'id,title_id,text,author,score,pub_date\n'
+            '1,999,Текст,999,5,2020-01-01T00:00:00Z\n',
+            encoding='utf-8'
+        )
+        call_command('load_csv', '--path', str(tmp_path), stdout=StringIO())
+        assert not Review.objects.exists(), (
+            'Проверьте, что строки со ссылками на несуществующие записи '
+            'пропускаются'
+        )
+
+    def test_genre_links_refresh_leaderboards_and_feeds(self, tmp_path,
+                                                        make_catalog):
+        from reviews.models import (ActivityFeedEntry, Genre,
+                                    LeaderboardEntry)
+
+        title, _ = make_catalog(3)
+        genre = Genre.objects.create(name='Новый', slug='new')
+        (tmp_path / 'genre_title.csv').write_text(
+            'id,title_id,genre_id\n'
+            f'1000,{title.pk},{genre.pk}\n',
+            encoding='utf-8'
+        )
+        call_command('load_csv', '--path', str(tmp_path), stdout=StringIO())
+        assert LeaderboardEntry.objects.filter(
+            scope=LeaderboardEntry.SCOPE_GENRE, scope_id=genre.pk,
+            title=title
+        ).exists(), (
+            'Проверьте, что после загрузки связей жанров рейтинги жанров '
+            'пересоздаются'
+        )
+        assert ActivityFeedEntry.objects.filter(
+            scope=ActivityFeedEntry.SCOPE_GENRE, scope_id=genre.pk
+        ).count() == 6, (
+            'Проверьте, что после загрузки связей жанров ленты жанров '
+            'пересоздаются'
+        )
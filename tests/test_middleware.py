@@ -0,0 +1,58 @@
+import logging
+
+import pytest
+
+TITLES_URL = '/api/v1/titles/'
+
+
+@pytest.fixture
+def instrumented_client(settings):
+    from rest_framework.test import APIClient
+
+    settings.SQL_INSTRUMENTATION = {'ENABLED': True, 'SLOW_QUERY_MS': 1000}
+    return APIClient()
+
+
+@pytest.mark.django_db
+class TestQueryInstrumentation:
+
+    def test_disabled_by_default(self, anon_client):
+        response = anon_client.get(TITLES_URL)
+        assert 'Server-Timing' not in response, (
+            'Проверьте, что без настройки заголовок Server-Timing не '
+            'добавляется'
+        )
+
+    def test_server_timing_and_log(self, instrumented_client, make_catalog,
+                                   caplog):
+        make_catalog(2)
+        with caplog.at_level(logging.INFO, logger='api.sql'):
+            response = instrumented_client.get(TITLES_URL)
+        timing = response['Server-Timing']
+        for metric in ('db;dur=', 'view;dur=', 'render;dur=', 'total;dur='):
+            assert metric in timing, (
+                f'Проверьте, что заголовок Server-Timing содержит {metric}'
+            )
+        records = [
+            record for record in caplog.records
+            if getattr(record, 'route', None) == 'titles-list'
+        ]
+        assert len(records) == 1, (
+            'Проверьте, что в лог пишется строка с именем маршрута'
+        )
+        assert records[0].queries > 0
+
+    def test_slow_query_logged_with_plan(self, instrumented_client, settings,
+                                         caplog):
+        settings.SQL_INSTRUMENTATION = {'ENABLED': True, 'SLOW_QUERY_MS': 0}
+        with caplog.at_level(logging.WARNING, logger='api.sql'):
+            instrumented_client.get(TITLES_URL)
+        slow = [
+            record.getMessage() for record in caplog.records
+            if record.levelno == logging.WARNING
+        ]
+        assert slow, 'Проверьте, что медленные запросы пишутся в лог'
+        assert all('SELECT' in message for message in slow)
+        assert 'plan=None' not in slow[0], (
+            'Проверьте, что для медленного запроса логируется план'
+        )
@@ -0,0 +1,99 @@
+import pytest
+from django.core import mail
+from django.core.management import call_command
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+
+
+@pytest.mark.django_db
+class TestEmailOutbox:
+
+    def test_signup_enqueues_email(self, anon_client):
+        from api.models import OutgoingEmail
+
+        response = anon_client.post(
+            SIGNUP_URL,
+            {'username': 'newuser', 'email': 'newuser@yamdb.fake'},
+            format='json'
+        )
+        assert response.status_code == 200
+        assert len(mail.outbox) == 0, (
+            'Проверьте, что при регистрации письмо не отправляется '
+            'синхронно'
+        )
+        email = OutgoingEmail.objects.get()
+        assert email.recipient == 'newuser@yamdb.fake'
+        assert email.status == OutgoingEmail.PENDING
+
+    def test_worker_sends_batch(self, anon_client):
+        from api.models import OutgoingEmail
+
+        for index in range(3):
+            anon_client.post(
+                SIGNUP_URL,
+                {'username': f'user{index}',
+                 'email': f'user{index}@yamdb.fake'},
+                format='json'
+            )
+        call_command('send_outbox', '--once', '--batch-size', '2')
+        assert len(mail.outbox) == 3
+        assert not OutgoingEmail.objects.exclude(
+            status=OutgoingEmail.SENT
+        ).exists()
+
+    def test_failed_send_is_retried_later(self, monkeypatch):
+        from api.models import OutgoingEmail
+        from api.outbox import enqueue_email, send_batch
+        from django.core.mail import EmailMessage
+
+        def fail(self, fail_silently=False):
+            raise OSError('connection refused')
+
+        email = enqueue_email('Тема', 'Текст', 'user@yamdb.fake')
+        monkeypatch.setattr(EmailMessage, 'send', fail)
+        assert send_batch() == 1
+        email.refresh_from_db()
+        assert email.status == OutgoingEmail.PENDING
+        assert email.attempts == 1
+        assert 'connection refused' in email.last_error
+        assert send_batch() == 0, (
+            'Проверьте, что письмо после ошибки откладывается на время '
+            'задержки'
+        )
+
+    def test_stats_are_admin_only(self, admin_client, user_client):
+        from api.outbox import enqueue_email
+
+        enqueue_email('Тема', 'Текст', 'user@yamdb.fake')
+        assert user_client.get('/api/v1/stats/outbox/').status_code == 403
+        stats = admin_client.get('/api/v1/stats/outbox/').data
+        assert stats['pending'] == 1
+
+    def test_old_sent_emails_are_purged(self):
+        from datetime import timedelta
+        from io import StringIO
+
+        from api.models import OutgoingEmail
+        from api.outbox import enqueue_email
+        from django.utils import timezone
+
+        for index in range(3):
+            enqueue_email('Тема', 'Текст', f'user{index}@yamdb.fake')
+        emails = OutgoingEmail.objects.order_by('pk')
+        emails.filter(recipient='user0@yamdb.fake').update(
+            status=OutgoingEmail.SENT,
+            sent=timezone.now() - timedelta(days=8)
+        )
+        emails.filter(recipient='user1@yamdb.fake').update(
+            status=OutgoingEmail.FAILED
+        )
+        out = StringIO()
+        call_command('send_outbox', '--once', stdout=out)
+        assert 'Удалено отправленных писем: 1' in out.getvalue()
+        assert list(emails.values_list('recipient', 'status')) == [
+            ('user1@yamdb.fake', OutgoingEmail.FAILED),
+            ('user2@yamdb.fake', OutgoingEmail.SENT),
+        ], (
+            'Проверьте, что обработчик удаляет только письма, '
+            'отправленные раньше RETENTION секунд назад'
+        )
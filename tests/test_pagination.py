@@ -0,0 +1,114 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+PAGE_SIZE = 10
+
+
+def collect_pages(client, url):
+    ids, pages = [], 0
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает статус 200'
+        )
+        ids.extend(item['id'] for item in response.data['results'])
+        url = response.data['next']
+        pages += 1
+    return ids, pages
+
+
+@pytest.mark.django_db
+class TestCursorPagination:
+
+    @pytest.mark.parametrize('url', [
+        '/api/v1/titles/?cursor=',
+        '/api/v1/titles/{title}/reviews/?cursor=',
+        '/api/v1/titles/{title}/reviews/{review}/comments/?cursor=',
+    ])
+    def test_cursor_walks_all_rows(self, url, anon_client, make_catalog):
+        title, review = make_catalog(25)
+        url = url.format(title=title.pk, review=review.pk)
+        ids, pages = collect_pages(anon_client, url)
+        assert len(ids) == len(set(ids)) == 25, (
+            'Проверьте, что при выводе по курсору каждая запись '
+            'возвращается ровно один раз'
+        )
+        assert pages == 3, (
+            f'Проверьте, что по курсору выводится по {PAGE_SIZE} записей '
+            'на страницу'
+        )
+
+    def test_cursor_is_stable_for_equal_names(self, anon_client,
+                                              make_catalog):
+        from reviews.models import Title
+
+        make_catalog(25)
+        Title.objects.update(name='Одинаковое название')
+        ids, _ = collect_pages(anon_client, '/api/v1/titles/?cursor=')
+        assert ids == sorted(ids), (
+            'Проверьте, что записи с одинаковым названием упорядочиваются '
+            'по id'
+        )
+        assert len(set(ids)) == 25
+
+    @pytest.mark.parametrize('url', [
+        '/api/v1/titles/?cursor=',
+        '/api/v1/titles/{title}/reviews/?cursor=',
+    ])
+    def test_equal_keys_do_not_use_offset(self, url, anon_client,
+                                          make_catalog):
+        from django.utils import timezone
+        from reviews.models import Review, Title
+
+        title, _ = make_catalog(25)
+        Title.objects.update(name='Одинаковое название')
+        Review.objects.update(pub_date=timezone.now())
+        url = url.format(title=title.pk)
+        with CaptureQueriesContext(connection) as context:
+            ids, _ = collect_pages(anon_client, url)
+        assert ids == sorted(ids) and len(set(ids)) == 25
+        offsets = [
+            query['sql'] for query in context.captured_queries
+            if 'OFFSET' in query['sql']
+        ]
+        assert not offsets, (
+            'Проверьте, что записи с одинаковым ключом сортировки '
+            'не пропускаются смещением:\n' + '\n'.join(offsets)
+        )
+
+    def test_previous_link(self, anon_client, make_catalog):
+        make_catalog(25)
+        first = anon_client.get('/api/v1/titles/?cursor=').data
+        second = anon_client.get(first['next']).data
+        back = anon_client.get(second['previous']).data
+        assert [item['id'] for item in back['results']] == [
+            item['id'] for item in first['results']
+        ], 'Проверьте, что ссылка previous возвращает предыдущую страницу'
+
+    def test_offset_mode_is_default(self, anon_client, make_catalog):
+        make_catalog(25)
+        response = anon_client.get('/api/v1/titles/?limit=5&offset=20')
+        assert response.data['count'] == 25, (
+            'Проверьте, что без параметра cursor сохраняется вывод '
+            'со смещением'
+        )
+        assert len(response.data['results']) == 5
+
+    def test_cursor_with_offset_is_rejected(self, anon_client, make_catalog):
+        from base64 import b64encode
+
+        make_catalog(3)
+        cursor = b64encode(b'o=100000').decode()
+        response = anon_client.get(f'/api/v1/titles/?cursor={cursor}')
+        assert response.status_code == 404, (
+            'Проверьте, что курсор со смещением отклоняется'
+        )
+
+    def test_search_with_cursor_is_rejected(self, anon_client):
+        response = anon_client.get('/api/v1/titles/?search=x&cursor=')
+        assert response.status_code == 400, (
+            'Проверьте, что поиск по релевантности не сочетается '
+            'с курсором'
+        )
+        assert 'cursor' in response.json()
@@ -0,0 +1,67 @@
+import pytest
+
+
+def get_both(client, settings, url, params=None):
+    """
+    Ответы со сборкой из values() и через сериализаторы DRF.
+    """
+    from django.core.cache import caches
+
+    responses = []
+    for fast in (True, False):
+        for cache in caches.all():
+            cache.clear()
+        settings.FAST_LIST_SERIALIZATION = fast
+        response = client.get(url, params)
+        assert response.status_code == 200, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает статус 200'
+        )
+        responses.append(response.content)
+    return responses
+
+
+@pytest.mark.django_db
+class TestProjections:
+
+    def test_titles_list_is_identical(self, anon_client, settings,
+                                      make_catalog):
+        from reviews.models import Genre, Title
+
+        title, _ = make_catalog(3)
+        # Жанр добавлен последним, но по slug идёт первым.
+        title.genre.add(Genre.objects.create(name='Аниме', slug='anime'))
+        Title.objects.create(name='Без категории', year=1990)
+        url = '/api/v1/titles/'
+        for params in (None, {'limit': 2, 'offset': 1}, {'genre': 'anime'},
+                       {'category': 'movie', 'year': 2001},
+                       {'name': 'категор'}, {'cursor': ''}):
+            fast, regular = get_both(anon_client, settings, url, params)
+            assert fast == regular, (
+                f'Проверьте, что список произведений с параметрами {params} '
+                'совпадает с выводом TitleGetSerializer'
+            )
+
+    def test_reviews_and_comments_are_identical(self, anon_client, settings,
+                                                make_catalog):
+        title, review = make_catalog(12)
+        reviews_url = f'/api/v1/titles/{title.pk}/reviews/'
+        comments_url = f'{reviews_url}{review.pk}/comments/'
+        for url in (reviews_url, comments_url):
+            for params in (None, {'page': 2}, {'cursor': ''}):
+                fast, regular = get_both(anon_client, settings, url, params)
+                assert fast == regular, (
+                    f'Проверьте, что ответ `{url}` с параметрами {params} '
+                    'совпадает с выводом сериализатора'
+                )
+
+    def test_list_without_projection_is_plain(self):
+        from api.projections import ProjectedListMixin
+
+        class PlainList:
+            def list(self, request, *args, **kwargs):
+                return 'plain'
+
+        view = type('ViewSet', (ProjectedListMixin, PlainList), {})()
+        assert view.list(None) == 'plain', (
+            'Проверьте, что без метода вьюсета список выводится как обычно'
+        )
@@ -0,0 +1,163 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+FULL_PAGE = 10
+
+QUERY_BUDGET = {
+    'titles-list': 3,
+    'titles-detail': 2,
+    'categories-list': 2,
+    'genres-list': 2,
+    'reviews-list': 3,
+    'reviews-detail': 2,
+    'comments-list': 3,
+    'comments-detail': 2,
+}
+
+# Параметры страницы из одной записи и полной страницы списка. Отзывы
+# и комментарии выводятся по PAGE_SIZE записей, поэтому страница из
+# одной записи — вторая.
+PAGE_PARAMS = {
+    'titles-list': ('limit=1', f'limit={FULL_PAGE}'),
+    'categories-list': ('limit=1', f'limit={FULL_PAGE}'),
+    'genres-list': ('limit=1', f'limit={FULL_PAGE}'),
+    'reviews-list': ('page=2', 'page=1'),
+    'comments-list': ('page=2', 'page=1'),
+}
+
+
+def get_url(name, title, review):
+    return {
+        'titles-list': '/api/v1/titles/',
+        'titles-detail': f'/api/v1/titles/{title.pk}/',
+        'categories-list': '/api/v1/categories/',
+        'genres-list': '/api/v1/genres/',
+        'reviews-list': f'/api/v1/titles/{title.pk}/reviews/',
+        'reviews-detail': (
+            f'/api/v1/titles/{title.pk}/reviews/{review.pk}/'
+        ),
+        'comments-list': (
+            f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/'
+        ),
+        'comments-detail': (
+            f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/'
+            f'{review.comments.order_by("pk").first().pk}/'
+        ),
+    }[name]
+
+
+def get_page(client, url):
+    """
+    Количество SQL-запросов и записей на странице списка.
+    """
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200, (
+        f'Проверьте, что GET-запрос к `{url}` возвращает статус 200'
+    )
+    return len(context.captured_queries), len(response.data['results'])
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200, (
+        f'Проверьте, что GET-запрос к `{url}` возвращает статус 200'
+    )
+    return len(context.captured_queries)
+
+
+@pytest.mark.django_db
+class TestQueryBudget:
+
+    @pytest.mark.parametrize('name', QUERY_BUDGET)
+    def test_query_budget(self, name, anon_client, make_catalog):
+        title, review = make_catalog(FULL_PAGE)
+        url = get_url(name, title, review)
+        queries = count_queries(anon_client, url)
+        assert queries <= QUERY_BUDGET[name], (
+            f'Запрос к `{url}` выполняет {queries} SQL-запросов, '
+            f'допустимо не более {QUERY_BUDGET[name]}'
+        )
+
+    @pytest.mark.parametrize('name', PAGE_PARAMS)
+    def test_queries_do_not_depend_on_page_size(self, name, anon_client,
+                                                make_catalog):
+        from reviews.models import Category, Genre
+
+        title, review = make_catalog(FULL_PAGE + 1)
+        Category.objects.bulk_create(
+            Category(name=f'Категория {index}', slug=f'category{index}')
+            for index in range(FULL_PAGE)
+        )
+        Genre.objects.bulk_create(
+            Genre(name=f'Жанр {index}', slug=f'extra{index}')
+            for index in range(FULL_PAGE)
+        )
+        url = get_url(name, title, review)
+        small, full = (
+            get_page(anon_client, f'{url}?{params}')
+            for params in PAGE_PARAMS[name]
+        )
+        assert (small[1], full[1]) == (1, FULL_PAGE), (
+            f'Проверьте, что страницы `{url}` содержат 1 и {FULL_PAGE} '
+            'записей'
+        )
+        assert small[0] == full[0], (
+            f'Количество SQL-запросов к `{url}` зависит от размера страницы: '
+            f'{small[0]} для 1 записи и {full[0]} для {FULL_PAGE}'
+        )
+
+
+def count_reads(context, table):
+    """
+    Запросы, читающие таблицу, в том числе подзапросами.
+    """
+    return sum(
+        1 for query in context.captured_queries
+        if f'FROM "{table}"' in query['sql']
+    )
+
+
+@pytest.mark.django_db
+class TestParentLoadedOnce:
+
+    def test_review_create_loads_title_once(self, user_client,
+                                            make_catalog):
+        title, _ = make_catalog(1)
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(
+                f'/api/v1/titles/{title.pk}/reviews/',
+                {'text': 'Отзыв', 'score': 7},
+                format='json'
+            )
+        assert response.status_code == 201
+        assert count_reads(context, 'reviews_title') == 1, (
+            'Проверьте, что при создании отзыва произведение загружается '
+            'из БД один раз'
+        )
+
+    def test_comment_create_loads_review_once(self, user_client,
+                                              make_catalog):
+        title, review = make_catalog(1)
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(
+                f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/',
+                {'text': 'Комментарий'},
+                format='json'
+            )
+        assert response.status_code == 201
+        assert count_reads(context, 'reviews_review') == 1, (
+            'Проверьте, что при создании комментария отзыв загружается '
+            'из БД один раз'
+        )
+
+    def test_comment_of_other_title_not_found(self, user_client,
+                                              make_catalog):
+        title, review = make_catalog(2)
+        other = title.__class__.objects.exclude(pk=title.pk).first()
+        response = user_client.get(
+            f'/api/v1/titles/{other.pk}/reviews/{review.pk}/comments/'
+        )
+        assert response.status_code == 404
@@ -0,0 +1,76 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# Большие таблицы, которые нельзя читать полным перебором строк.
+HOT_TABLES = (
+    'reviews_title', 'reviews_review', 'reviews_comment',
+    'reviews_genretitle', 'reviews_leaderboardentry',
+    'reviews_activityevent', 'reviews_activityfeedentry',
+)
+TABLE_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)$')
+
+
+def get_urls(title, review):
+    return (
+        '/api/v1/titles/',
+        '/api/v1/titles/?cursor=',
+        f'/api/v1/titles/?year={title.year}',
+        f'/api/v1/titles/?category={title.category.slug}',
+        '/api/v1/titles/?genre=genre0',
+        f'/api/v1/titles/{title.pk}/reviews/',
+        f'/api/v1/titles/{title.pk}/reviews/?cursor=',
+        f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/',
+        f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/?cursor=',
+        f'/api/v1/titles/{title.pk}/page/',
+        f'/api/v1/titles/{title.pk}/page/?order=top',
+        '/api/v1/leaderboards/titles/',
+        '/api/v1/leaderboards/genres/genre0/',
+        f'/api/v1/leaderboards/categories/{title.category.slug}/',
+        '/api/v1/activity/',
+        f'/api/v1/activity/?title={title.pk}',
+        '/api/v1/activity/?genre=genre0',
+        f'/api/v1/activity/?user={review.author.username}',
+    )
+
+
+def explain(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def get_plan_problems(url, client):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    problems = []
+    for query in context.captured_queries:
+        sql = query['sql']
+        if not sql.startswith('SELECT'):
+            continue
+        # captured_queries содержит SQL с подставленными параметрами.
+        for line in explain(sql, ()):
+            scan = TABLE_SCAN.match(line)
+            if 'TEMP B-TREE' in line or (
+                scan and scan.group(1) in HOT_TABLES
+            ):
+                problems.append(f'{line}: {sql}')
+    return problems
+
+
+@pytest.mark.django_db
+class TestQueryPlans:
+
+    def test_hot_endpoints_use_indexes(self, anon_client, make_catalog):
+        if connection.vendor != 'sqlite':
+            pytest.skip('Планы проверяются через EXPLAIN QUERY PLAN SQLite')
+        title, review = make_catalog(3)
+        for url in get_urls(title, review):
+            problems = get_plan_problems(url, anon_client)
+            assert not problems, (
+                f'Запрос к `{url}` читает таблицу полным перебором или '
+                'сортирует результат без индекса:\n' + '\n'.join(problems)
+            )
@@ -0,0 +1,150 @@
+import pytest
+
+TITLES_URL = '/api/v1/titles/'
+
+
+def add_title(using, name, **fields):
+    from reviews.models import Title
+
+    return Title.objects.using(using).create(name=name, year=2000, **fields)
+
+
+def get_names(client):
+    response = client.get(TITLES_URL)
+    assert response.status_code == 200
+    return [item['name'] for item in response.json()['results']]
+
+
+@pytest.fixture
+def add_replica(settings, tmp_path):
+    """
+    Реплика — отдельная БД SQLite с теми же таблицами, но своими данными,
+    поэтому по ответу видно, из какой БД он прочитан.
+    """
+    from django.core.management import call_command
+    from django.db import connections
+    from django.db.utils import load_backend
+
+    aliases = []
+
+    def add(alias, name):
+        settings_dict = dict(connections['default'].settings_dict, NAME=name)
+        connections[alias] = load_backend(
+            settings_dict['ENGINE']
+        ).DatabaseWrapper(settings_dict, alias)
+        aliases.append(alias)
+        settings.DATABASE_REPLICAS = {
+            'ALIASES': aliases, 'STICKY_SECONDS': 60, 'RETRY_AFTER': 60
+        }
+        return connections[alias]
+
+    def add_working(alias='replica'):
+        connection = add(alias, str(tmp_path / f'{alias}.sqlite3'))
+        call_command('migrate', database=alias, run_syncdb=True,
+                     verbosity=0)
+        return connection
+
+    def add_broken(alias='broken'):
+        return add(alias, str(tmp_path / 'missing' / f'{alias}.sqlite3'))
+
+    yield add_working, add_broken
+    for alias in aliases:
+        connections[alias].close()
+        del connections[alias]
+
+
+@pytest.mark.django_db(transaction=True)
+class TestReplicas:
+
+    def test_reads_go_to_replica(self, anon_client, add_replica):
+        add_working, _ = add_replica
+        add_working()
+        add_title('default', 'Основная')
+        add_title('replica', 'Реплика')
+        assert get_names(anon_client) == ['Реплика'], (
+            'Проверьте, что GET-запросы читают данные с реплики'
+        )
+
+    def test_reads_stick_to_primary_after_write(self, settings, user_client,
+                                                anon_client, add_replica):
+        from django.core.cache import cache
+
+        add_working, _ = add_replica
+        add_working()
+        title = add_title('default', 'Произведение')
+        add_title('replica', 'Произведение', pk=title.pk)
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        response = user_client.post(
+            url, {'text': 'Отзыв', 'score': 7}, format='json'
+        )
+        assert response.status_code == 201
+        assert user_client.get(url).json()['count'] == 1, (
+            'Проверьте, что после записи клиент читает с основной БД '
+            'и видит свой отзыв'
+        )
+        assert anon_client.get(url).json()['count'] == 0, (
+            'Проверьте, что другие клиенты читают с реплики'
+        )
+
+        settings.DATABASE_REPLICAS = dict(
+            settings.DATABASE_REPLICAS, STICKY_SECONDS=0
+        )
+        cache.clear()
+        title.reviews.get().delete()
+        user_client.post(url, {'text': 'Отзыв', 'score': 7}, format='json')
+        assert user_client.get(url).json()['count'] == 0, (
+            'Проверьте, что после STICKY_SECONDS клиент снова читает '
+            'с реплики'
+        )
+
+    def test_failover_to_primary(self, anon_client, add_replica):
+        from django.core.cache import cache
+
+        add_working, add_broken = add_replica
+        add_broken()
+        add_title('default', 'Основная')
+        assert get_names(anon_client) == ['Основная'], (
+            'Проверьте, что при недоступной реплике чтение идёт '
+            'с основной БД'
+        )
+        add_working()
+        add_title('replica', 'Реплика')
+        cache.clear()
+        assert get_names(anon_client) == ['Реплика'], (
+            'Проверьте, что недоступная реплика пропускается, '
+            'а доступная используется'
+        )
+
+    def test_catalog_cache_is_not_filled_from_lagging_replica(
+            self, settings, user_client, anon_client, add_replica):
+        settings.CATALOG_CACHE = dict(settings.CATALOG_CACHE, ENABLED=True)
+        add_working, _ = add_replica
+        add_working()
+        title = add_title('default', 'Произведение')
+        add_title('replica', 'Произведение', pk=title.pk)
+        url = f'/api/v1/titles/{title.pk}/'
+        response = user_client.post(
+            f'{url}reviews/', {'text': 'Отзыв', 'score': 7}, format='json'
+        )
+        assert response.status_code == 201
+        assert anon_client.get(url).json()['rating'] is None
+        assert user_client.get(url).json()['rating'] == 7, (
+            'Проверьте, что клиент после записи не получает из кеша ответ, '
+            'прочитанный с отстающей реплики'
+        )
+        settings.DATABASE_REPLICAS = dict(
+            settings.DATABASE_REPLICAS, ALIASES=[]
+        )
+        assert anon_client.get(url).json()['rating'] == 7, (
+            'Проверьте, что ответ реплики сразу после записи не сохраняется '
+            'в кеш каталога'
+        )
+
+    def test_replicas_require_shared_cache(self, settings):
+        from api_yamdb.db.router import check_shared_cache
+
+        assert check_shared_cache(None) == []
+        settings.DATABASE_REPLICAS = {'ALIASES': ['replica1']}
+        assert [message.id for message in check_shared_cache(None)] == [
+            'api_yamdb.E001'
+        ]
@@ -0,0 +1,66 @@
+import pytest
+
+
+def get_names(client, query):
+    response = client.get(f'/api/v1/titles/?{query}')
+    assert response.status_code == 200, (
+        f'Проверьте, что поиск `{query}` возвращает статус 200'
+    )
+    return [item['name'] for item in response.data['results']]
+
+
+@pytest.fixture
+def titles():
+    from reviews.models import Title
+
+    return [
+        Title.objects.create(name=name, year=2000, description=description)
+        for name, description in (
+            ('Крестный отец', 'Сага о семье дона Корлеоне'),
+            ('Крестный отец 2', 'Продолжение истории семьи'),
+            ('Побег из Шоушенка', 'Отец и сын в тюрьме не встречаются'),
+            ('Звёздные войны', 'Далёкая галактика'),
+        )
+    ]
+
+
+@pytest.mark.django_db
+class TestTitleSearch:
+
+    def test_search_by_name(self, anon_client, titles):
+        names = get_names(anon_client, 'search=крестный')
+        assert sorted(names) == ['Крестный отец', 'Крестный отец 2'], (
+            'Проверьте, что поиск находит произведения по словам названия '
+            'без учёта регистра'
+        )
+
+    def test_search_by_word_prefix(self, anon_client, titles):
+        assert get_names(anon_client, 'search=звёзд') == ['Звёздные войны']
+
+    def test_search_ignores_description_by_default(self, anon_client,
+                                                   titles):
+        assert get_names(anon_client, 'search=галактика') == [], (
+            'Проверьте, что по умолчанию поиск идёт только по названию'
+        )
+
+    def test_search_with_description(self, anon_client, titles):
+        names = get_names(
+            anon_client, 'search=отец&search_description=true'
+        )
+        assert set(names) == {
+            'Крестный отец', 'Крестный отец 2', 'Побег из Шоушенка'
+        }
+        assert names[-1] == 'Побег из Шоушенка', (
+            'Проверьте, что совпадения в названии ранжируются выше '
+            'совпадений в описании'
+        )
+
+    def test_index_follows_changes(self, anon_client, titles):
+        titles[3].name = 'Новая надежда'
+        titles[3].save()
+        titles[0].delete()
+        assert get_names(anon_client, 'search=надежда') == ['Новая надежда']
+        assert get_names(anon_client, 'search=звёздные') == []
+        assert get_names(anon_client, 'search=крестный') == [
+            'Крестный отец 2'
+        ], 'Проверьте, что поисковый индекс обновляется вместе с таблицей'
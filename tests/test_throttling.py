@@ -0,0 +1,103 @@
+import time
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+TOKEN_URL = '/api/v1/auth/token/'
+
+
+@pytest.fixture
+def rates(settings):
+    settings.AUTH_THROTTLE = {
+        'RATES': {
+            'signup': {'ip': '100/min', 'username': '2/min', 'email': '2/min'},
+            'token': {'ip': '2/min', 'username': '100/min'},
+        },
+    }
+
+
+def signup(client, username, email, **extra):
+    return client.post(
+        SIGNUP_URL, {'username': username, 'email': email}, format='json',
+        **extra
+    )
+
+
+def assert_rejected_without_db(response_factory):
+    with CaptureQueriesContext(connection) as context:
+        response = response_factory()
+    assert response.status_code == 429, (
+        'Проверьте, что запрос сверх лимита возвращает статус 429'
+    )
+    assert int(response['Retry-After']) > 0, (
+        'Проверьте, что ответ 429 содержит заголовок Retry-After'
+    )
+    assert not context.captured_queries, (
+        'Проверьте, что отклонённый запрос не обращается к БД'
+    )
+    return response
+
+
+@pytest.mark.django_db
+class TestAuthThrottling:
+
+    def test_signup_limited_by_username_and_email(self, anon_client, rates):
+        for _ in range(2):
+            response = signup(anon_client, 'bot', 'bot@yamdb.fake')
+            assert response.status_code == 200
+        assert_rejected_without_db(
+            lambda: signup(anon_client, 'BOT', 'other@yamdb.fake')
+        )
+        assert_rejected_without_db(
+            lambda: signup(anon_client, 'other', 'Bot@yamdb.fake')
+        )
+        response = signup(anon_client, 'user', 'user@yamdb.fake')
+        assert response.status_code == 200, (
+            'Проверьте, что лимит одного пользователя не мешает другим'
+        )
+
+    def test_token_limited_by_ip(self, anon_client, rates):
+        data = {'username': 'nobody', 'confirmation_code': 'code'}
+        for _ in range(2):
+            assert anon_client.post(TOKEN_URL, data).status_code == 404
+        assert_rejected_without_db(lambda: anon_client.post(TOKEN_URL, data))
+        response = anon_client.post(TOKEN_URL, data, REMOTE_ADDR='10.0.0.2')
+        assert response.status_code == 404, (
+            'Проверьте, что лимит IP-адреса не мешает другим адресам'
+        )
+
+    def test_bucket_refills(self, anon_client, rates, monkeypatch):
+        data = {'username': 'nobody', 'confirmation_code': 'code'}
+        anon_client.post(TOKEN_URL, data)
+        anon_client.post(TOKEN_URL, data)
+        response = anon_client.post(TOKEN_URL, data)
+        assert response.status_code == 429
+        assert int(response['Retry-After']) == 30
+        now = time.time()
+        monkeypatch.setattr(time, 'time', lambda: now + 30)
+        assert anon_client.post(TOKEN_URL, data).status_code == 404, (
+            'Проверьте, что маркеры восполняются за период лимита'
+        )
+        assert anon_client.post(TOKEN_URL, data).status_code == 429
+
+    def test_spoofed_forwarded_for_keeps_ip_bucket(self, anon_client,
+                                                   rates):
+        data = {'username': 'nobody', 'confirmation_code': 'code'}
+        for index in range(3):
+            # Адрес, поставленный прокси, всегда последний в заголовке.
+            response = anon_client.post(
+                TOKEN_URL, data,
+                HTTP_X_FORWARDED_FOR=f'192.0.2.{index}, 10.0.0.3'
+            )
+        assert response.status_code == 429, (
+            'Проверьте, что подменённый X-Forwarded-For не даёт новую '
+            'корзину IP-адреса'
+        )
+        response = anon_client.post(
+            TOKEN_URL, data, HTTP_X_FORWARDED_FOR='10.0.0.4'
+        )
+        assert response.status_code == 404, (
+            'Проверьте, что клиенты за прокси получают разные корзины'
+        )
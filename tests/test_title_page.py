@@ -0,0 +1,100 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# Произведение с жанрами, отзывы и последние комментарии к ним.
+PAGE_QUERIES = 4
+
+
+def get_url(title):
+    return f'/api/v1/titles/{title.pk}/page/'
+
+
+def add_reviews(title, count):
+    """
+    Отзывы с оценками 1..count; у отзыва с оценкой n — n комментариев.
+    """
+    from reviews.models import Comment, Review, User
+
+    for score in range(1, count + 1):
+        author = User.objects.create_user(
+            username=f'reader{score}', email=f'reader{score}@yamdb.fake'
+        )
+        review = Review.objects.create(
+            title=title, author=author, text=f'Отзыв {score}', score=score
+        )
+        for index in range(score):
+            Comment.objects.create(
+                review=review, author=author, text=f'Комментарий {index}'
+            )
+
+
+@pytest.mark.django_db
+class TestTitlePage:
+
+    def test_page_structure(self, anon_client, make_catalog):
+        title, review = make_catalog(3)
+        response = anon_client.get(get_url(title))
+        assert response.status_code == 200
+        data = response.json()
+        assert data['title']['id'] == title.pk
+        assert {'name', 'genre', 'category', 'rating'} <= set(data['title'])
+        assert data['reviews_count'] == 3
+        assert len(data['reviews']) == 3
+        first = next(
+            item for item in data['reviews'] if item['id'] == review.pk
+        )
+        assert first['comments_count'] == 3, (
+            'Проверьте, что для отзыва возвращается количество комментариев'
+        )
+        latest = review.comments.order_by('-pub_date', '-pk').first()
+        assert first['latest_comment']['id'] == latest.pk
+        assert first['latest_comment']['text'] == latest.text
+        others = [item for item in data['reviews'] if item is not first]
+        assert all(item['comments_count'] == 0 for item in others)
+        assert all(item['latest_comment'] is None for item in others)
+
+    def test_order_limit_and_fields(self, anon_client, make_catalog):
+        title, _ = make_catalog(1)
+        title.reviews.all().delete()
+        add_reviews(title, 6)
+        response = anon_client.get(
+            get_url(title), {'order': 'top', 'reviews': 3,
+                             'fields': 'name,rating'}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert set(data['title']) == {'name', 'rating'}, (
+            'Проверьте, что параметр fields ограничивает поля произведения'
+        )
+        assert [item['score'] for item in data['reviews']] == [6, 5, 4]
+        assert [item['comments_count'] for item in data['reviews']] == [
+            6, 5, 4
+        ]
+        response = anon_client.get(get_url(title), {'reviews': 2})
+        assert [item['text'] for item in response.json()['reviews']] == [
+            'Отзыв 6', 'Отзыв 5'
+        ], 'Проверьте, что по умолчанию возвращаются последние отзывы'
+
+    def test_invalid_params(self, anon_client, make_catalog):
+        title, _ = make_catalog(1)
+        for params in ({'reviews': 1000}, {'reviews': -1},
+                       {'order': 'random'}, {'fields': 'name,password'}):
+            response = anon_client.get(get_url(title), params)
+            assert response.status_code == 400, (
+                f'Проверьте, что параметры {params} отклоняются'
+            )
+        assert anon_client.get('/api/v1/titles/0/page/').status_code == 404
+
+    def test_query_count_is_fixed(self, anon_client, make_catalog):
+        title, _ = make_catalog(1)
+        add_reviews(title, 10)
+        with CaptureQueriesContext(connection) as context:
+            response = anon_client.get(get_url(title), {'reviews': 20})
+        assert response.status_code == 200
+        assert len(response.json()['reviews']) == 11
+        assert len(context.captured_queries) <= PAGE_QUERIES, (
+            f'Страница произведения выполняет '
+            f'{len(context.captured_queries)} SQL-запросов, допустимо не '
+            f'более {PAGE_QUERIES}'
+        )
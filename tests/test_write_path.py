@@ -0,0 +1,74 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# Событие ленты активности добавляет три запроса: вставку события,
+# выбор жанров произведения и вставку записей лент одним запросом.
+WRITE_BUDGET = {
+    # Оценка отзыва обновляет и произведение, и его позиции в рейтингах.
+    'reviews-create': 7,
+    # Счётчик комментариев виден в списке отзывов, поэтому вместе с ним
+    # обновляется и отметка изменения отзывов произведения.
+    'comments-create': 7,
+}
+
+
+def count_statements(context):
+    """
+    Запросы без точек сохранения, которые добавляет транзакция теста.
+    """
+    return sum(
+        1 for query in context.captured_queries
+        if 'SAVEPOINT' not in query['sql']
+    )
+
+
+@pytest.mark.django_db
+class TestWritePath:
+
+    def test_duplicate_review_rejected(self, user_client, make_catalog):
+        title, _ = make_catalog(1)
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        data = {'text': 'Отзыв', 'score': 10}
+        assert user_client.post(url, data, format='json').status_code == 201
+        title.refresh_from_db()
+        rating_count = title.rating_count
+        response = user_client.post(url, data, format='json')
+        assert response.status_code == 400, (
+            'Проверьте, что повторный отзыв на произведение отклоняется'
+        )
+        assert 'non_field_errors' in response.json()
+        title.refresh_from_db()
+        assert title.rating_count == rating_count, (
+            'Проверьте, что отклонённый отзыв не меняет рейтинг'
+        )
+
+    def test_review_create_budget(self, user_client, make_catalog):
+        title, _ = make_catalog(1)
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(
+                f'/api/v1/titles/{title.pk}/reviews/',
+                {'text': 'Отзыв', 'score': 7},
+                format='json'
+            )
+        assert response.status_code == 201
+        queries = count_statements(context)
+        assert queries <= WRITE_BUDGET['reviews-create'], (
+            f'Создание отзыва выполняет {queries} SQL-запросов, допустимо '
+            f'не более {WRITE_BUDGET["reviews-create"]}'
+        )
+
+    def test_comment_create_budget(self, user_client, make_catalog):
+        title, review = make_catalog(1)
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(
+                f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/',
+                {'text': 'Комментарий'},
+                format='json'
+            )
+        assert response.status_code == 201
+        queries = count_statements(context)
+        assert queries <= WRITE_BUDGET['comments-create'], (
+            f'Создание комментария выполняет {queries} SQL-запросов, '
+            f'допустимо не более {WRITE_BUDGET["comments-create"]}'
+        )